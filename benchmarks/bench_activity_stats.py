@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+ActivityStats benchmark: the tutorials' per-neuron make() vs session-batched statistics.
+
+Loads synthetic sessions into the electrophysiology tutorials' ``Neuron`` table
+(batched ingest from ``examples/ephys_ingest.py``), then populates the
+tutorials' per-neuron ``ActivityStats`` and the session-batched
+``SessionActivityStats`` from ``examples/activity_stats_batched.py``. Reports
+neurons/s for both and checks that they compute the same values.
+
+Usage:
+    python benchmarks/bench_activity_stats.py
+    python benchmarks/bench_activity_stats.py --neurons 5000 --activity npy
+"""
+
+import argparse
+import datetime
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from activity_stats_batched import BLOCK_SIZE, session_activity_stats  # noqa: E402
+from ephys_ingest import concurrent_uploads, neuron_rows  # noqa: E402
+
+DATA_DIR = Path(tempfile.gettempdir()) / "bench_activity_stats"
+STORE = "bench_ephys"
+ACTIVITY_TYPES = {
+    "blob": "<blob>",
+    "npy": f"<npy_async@{STORE}>",
+}
+
+schema = dj.Schema()
+
+
+def data_file(key):
+    return DATA_DIR / f"data_{key['mouse_id']}_{key['session_date']}.npy"
+
+
+@schema
+class Session(dj.Manual):
+    definition = """
+    mouse_id : int32
+    session_date : date
+    """
+
+
+@schema
+class Neuron(dj.Imported):
+    definition = """
+    -> Session
+    neuron_id : int16
+    ---
+    activity : {activity_type}    # neural activity trace
+    """
+
+    def make(self, key):
+        data = np.load(data_file(key), mmap_mode='r')
+        with concurrent_uploads():
+            self.insert(neuron_rows(key, data))
+
+
+@schema
+class ActivityStats(dj.Computed):
+    definition = """
+    -> Neuron
+    ---
+    mean_activity : float32
+    std_activity : float32
+    max_activity : float32
+    """
+
+    def make(self, key):
+        activity = (Neuron & key).fetch1('activity')
+
+        self.insert1({
+            **key,
+            'mean_activity': np.mean(activity),
+            'std_activity': np.std(activity),
+            'max_activity': np.max(activity)
+        })
+
+
+@schema
+class SessionActivityStats(dj.Computed):
+    definition = """
+    -> Session
+    ---
+    n_neurons : int32
+    """
+
+    class Unit(dj.Part):
+        definition = """
+        -> master
+        -> Neuron
+        ---
+        mean_activity : float32
+        std_activity : float32
+        max_activity : float32
+        """
+
+    block_size = BLOCK_SIZE
+
+    def make(self, key):
+        stats = session_activity_stats(Neuron & key, block_size=self.block_size)
+        self.insert1({**key, 'n_neurons': len(stats)})
+        self.Unit.insert(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session-batched ActivityStats")
+    add_common_arguments(parser)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--neurons", type=int, default=2000, help="Neurons per session")
+    parser.add_argument("--timepoints", type=int, default=2000)
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument(
+        "--activity",
+        choices=sorted(ACTIVITY_TYPES),
+        default="blob",
+        help="Store traces in-table (blob) or as .npy objects in a file store (npy)",
+    )
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    store_path = Path(tempfile.mkdtemp(prefix="bench_ephys_store_"))
+    dj.config.stores[STORE] = {'protocol': 'file', 'location': str(store_path)}
+    Neuron.definition = Neuron.definition.format(activity_type=ACTIVITY_TYPES[args.activity])
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+    sessions = [
+        {'mouse_id': k, 'session_date': datetime.date(2017, 5, 15) + datetime.timedelta(days=k)}
+        for k in range(args.sessions)
+    ]
+    for key in sessions:
+        np.save(data_file(key), rng.standard_normal((args.neurons, args.timepoints)).astype(np.float32))
+    neurons = args.sessions * args.neurons
+
+    metrics = {}
+    activate_fresh(schema, schema_name(args, "activity_stats"))
+    try:
+        Session.insert(sessions)
+        print("Loading neurons...", flush=True)
+        Neuron.populate()
+
+        print("ActivityStats (per neuron)...", flush=True)
+        with timer(metrics, "per_neuron_s"):
+            ActivityStats.populate()
+        metrics["per_neuron_neurons_per_s"] = neurons / metrics["per_neuron_s"]
+
+        print("SessionActivityStats (batched)...", flush=True)
+        SessionActivityStats.block_size = args.block_size
+        with timer(metrics, "batched_s"):
+            SessionActivityStats.populate()
+        metrics["batched_neurons_per_s"] = neurons / metrics["batched_s"]
+        metrics["batched_speedup"] = metrics["per_neuron_s"] / metrics["batched_s"]
+
+        columns = ('mean_activity', 'std_activity', 'max_activity')
+        expected = ActivityStats.to_pandas(order_by='KEY')[list(columns)].to_numpy()
+        batched = SessionActivityStats.Unit.to_pandas(order_by='KEY')[list(columns)].to_numpy()
+        metrics["max_abs_diff"] = float(np.abs(expected - batched).max())
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+        shutil.rmtree(store_path, ignore_errors=True)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    params = {
+        "sessions": args.sessions,
+        "neurons": args.neurons,
+        "timepoints": args.timepoints,
+        "block_size": args.block_size,
+        "activity": args.activity,
+    }
+    result = record("activity_stats", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
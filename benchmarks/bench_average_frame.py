@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+AverageFrame benchmark: whole-stack ``io.imread`` vs single-pass streaming statistics.
+
+Writes a synthetic two-photon-like TIFF stack (uncompressed, so it is memory
+mapped, and zlib-compressed, so it is streamed page by page), then computes the
+average frame with the calcium-imaging tutorial's ``io.imread(path).mean(axis=0)``
+and with ``examples/streaming_frame_stats.py``. Reports frames/s, MB/s and peak
+traced memory, and checks that the means agree. Finally populates the tutorial's
+Scan → AverageFrame pipeline with ``make()`` using the streaming reader.
+
+Usage:
+    python benchmarks/bench_average_frame.py
+    python benchmarks/bench_average_frame.py --frames 20000 --size 512 --tutorial-max-frames 0
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+import tifffile
+from skimage import io
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    peak_memory,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from streaming_frame_stats import BLOCK_FRAMES, frame_stats  # noqa: E402
+
+DATA_DIR = Path(tempfile.gettempdir()) / "bench_average_frame"
+
+schema = dj.Schema()
+
+
+def write_movie(path, frames, size, compression=None, chunk=500, seed=0):
+    """Write a ``(frames, size, size)`` uint16 stack, one page per frame, without holding it in memory."""
+    rng = np.random.default_rng(seed)
+    baseline = rng.uniform(200, 1000, (size, size))
+
+    def pages():
+        for start in range(0, frames, chunk):
+            yield from rng.poisson(baseline, (min(chunk, frames - start), size, size)).astype(np.uint16)
+
+    tifffile.imwrite(
+        path, pages(), shape=(frames, size, size), dtype=np.uint16,
+        bigtiff=True, compression=compression,
+    )
+
+
+@schema
+class Scan(dj.Manual):
+    definition = """
+    scan_idx : int16
+    ---
+    fps : float32             # frames per second
+    file_name : varchar(128)  # TIFF filename
+    """
+
+
+@schema
+class AverageFrame(dj.Imported):
+    definition = """
+    -> Scan
+    ---
+    average_frame : <blob>    # mean fluorescence across frames
+    std_frame : <blob>        # per-pixel standard deviation
+    max_frame : <blob>        # per-pixel maximum
+    """
+
+    workers = None
+
+    def make(self, key):
+        file_name = (Scan & key).fetch1('file_name')
+        stats = frame_stats(DATA_DIR / file_name, stats=('mean', 'std', 'max'), workers=self.workers)
+        self.insert1({
+            **key,
+            'average_frame': stats['mean'],
+            'std_frame': stats['std'],
+            'max_frame': stats['max'],
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming AverageFrame computation")
+    add_common_arguments(parser)
+    parser.add_argument("--frames", type=int, default=4000)
+    parser.add_argument("--size", type=int, default=512, help="Frame width and height")
+    parser.add_argument("--block-frames", type=int, default=BLOCK_FRAMES)
+    parser.add_argument("--workers", type=int, help="Reduction threads (default: CPU count)")
+    parser.add_argument(
+        "--tutorial-max-frames",
+        type=int,
+        default=10_000,
+        help="Largest movie to load whole with io.imread (default: 10000)",
+    )
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    movie_bytes = args.frames * args.size * args.size * 2
+    metrics = {"movie_bytes": movie_bytes}
+    files = {"raw": "bench_scan_raw.tif", "zlib": "bench_scan_zlib.tif"}
+    try:
+        for name, file_name in files.items():
+            path = DATA_DIR / file_name
+            print(f"Writing {name} movie ({movie_bytes / 2**30:.1f} GiB)...", flush=True)
+            write_movie(path, args.frames, args.size, compression=None if name == "raw" else "zlib")
+
+            with peak_memory(metrics, f"streaming_{name}_peak_bytes"), \
+                    timer(metrics, f"streaming_{name}_s"):
+                streamed = frame_stats(path, block_frames=args.block_frames, workers=args.workers)
+            metrics[f"streaming_{name}_frames_per_s"] = args.frames / metrics[f"streaming_{name}_s"]
+            metrics[f"streaming_{name}_mb_per_s"] = movie_bytes / 1e6 / metrics[f"streaming_{name}_s"]
+
+            if args.frames <= args.tutorial_max_frames:
+                with peak_memory(metrics, f"tutorial_{name}_peak_bytes"), \
+                        timer(metrics, f"tutorial_{name}_s"):
+                    movie = io.imread(path)
+                    mean = movie.mean(axis=0)
+                    del movie
+                metrics[f"tutorial_{name}_frames_per_s"] = args.frames / metrics[f"tutorial_{name}_s"]
+                metrics[f"streaming_{name}_speedup"] = (
+                    metrics[f"tutorial_{name}_s"] / metrics[f"streaming_{name}_s"]
+                )
+                metrics[f"mean_{name}_max_abs_diff"] = float(np.abs(streamed['mean'] - mean).max())
+
+        print("Populating AverageFrame...", flush=True)
+        activate_fresh(schema, schema_name(args, "calcium"))
+        try:
+            Scan.insert(
+                {'scan_idx': k, 'fps': 15, 'file_name': file_name}
+                for k, file_name in enumerate(files.values())
+            )
+            AverageFrame.workers = args.workers
+            with timer(metrics, "populate_s"):
+                AverageFrame.populate()
+            metrics["populate_frames_per_s"] = len(files) * args.frames / metrics["populate_s"]
+        finally:
+            if not args.keep:
+                schema.drop(prompt=False)
+    finally:
+        for file_name in files.values():
+            (DATA_DIR / file_name).unlink(missing_ok=True)
+
+    params = {
+        "frames": args.frames,
+        "size": args.size,
+        "block_frames": args.block_frames,
+        "workers": args.workers,
+    }
+    result = record("average_frame", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
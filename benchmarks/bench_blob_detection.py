@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Blob detection benchmark: single-call ``blob_doh`` vs overlapping-tile detection.
+
+Synthesizes a large image of Gaussian spots, times the tutorial's single
+``blob_doh`` call against ``examples/blob_tiled.py``, and checks that both find
+the same blobs. Then populates the tutorial's Image → Detection pipeline both
+ways, with part rows inserted one dict per blob (tutorial) or as one DataFrame.
+
+Usage:
+    python benchmarks/bench_blob_detection.py
+    python benchmarks/bench_blob_detection.py --size 20000 --single-max 8192 --processes 32
+"""
+
+import argparse
+import sys
+
+import datajoint as dj
+import numpy as np
+from scipy.spatial import cKDTree
+from skimage.feature import blob_doh
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from blob_tiled import TILE_SIZE, blob_doh_tiled, blob_rows  # noqa: E402
+
+PARAMS = {'min_sigma': 2.0, 'max_sigma': 6.0, 'threshold': 0.001}
+
+schema = dj.Schema()
+
+
+def synthesize(size, density=2e-4, seed=0):
+    """``size`` × ``size`` float32 image of randomly placed Gaussian spots."""
+    rng = np.random.default_rng(seed)
+    img = np.zeros((size, size), dtype=np.float32)
+    n = int(density * size * size)
+    rows, cols = rng.integers(0, size, (2, n))
+    sigmas = rng.uniform(PARAMS['min_sigma'], PARAMS['max_sigma'], n)
+    for r, c, s in zip(rows, cols, sigmas):
+        h = int(3 * s) + 1
+        r0, r1, c0, c1 = max(r - h, 0), min(r + h + 1, size), max(c - h, 0), min(c + h + 1, size)
+        yy, xx = np.ogrid[r0:r1, c0:c1]
+        img[r0:r1, c0:c1] += np.exp(-((yy - r) ** 2 + (xx - c) ** 2) / (2 * s * s))
+    img /= img.max()
+    return img
+
+
+def recall(reference, candidate, tolerance=1.0):
+    """Fraction of ``reference`` blobs with a ``candidate`` blob within ``tolerance`` pixels."""
+    if not len(reference):
+        return 1.0
+    if not len(candidate):
+        return 0.0
+    distance, _ = cKDTree(candidate[:, :2]).query(reference[:, :2])
+    return float(np.mean(distance <= tolerance))
+
+
+@schema
+class Image(dj.Manual):
+    definition = """
+    # Images for blob detection
+    image_id : int16
+    ---
+    image_name : varchar(100)
+    image : <blob>              # serialized numpy array
+    """
+
+
+@schema
+class DetectionParams(dj.Lookup):
+    definition = """
+    # Blob detection parameter sets
+    params_id : int16
+    ---
+    min_sigma : float32         # minimum blob size
+    max_sigma : float32         # maximum blob size
+    threshold : float32         # detection sensitivity
+    """
+    contents = [{'params_id': 1, **PARAMS}]
+
+
+@schema
+class Detection(dj.Computed):
+    definition = """
+    # Blob detection results
+    -> Image
+    -> DetectionParams
+    ---
+    num_blobs : int32          # number of blobs detected
+    """
+
+    class Blob(dj.Part):
+        definition = """
+        # Individual detected blobs
+        -> master
+        blob_idx : int32
+        ---
+        x : float32             # x coordinate
+        y : float32             # y coordinate
+        radius : float32        # blob radius
+        """
+
+    tiled = False
+    processes = None
+
+    def make(self, key):
+        img = (Image & key).fetch1('image')
+        params = (DetectionParams & key).fetch1()
+        kwargs = {name: params[name] for name in ('min_sigma', 'max_sigma', 'threshold')}
+
+        if not self.tiled:
+            blobs = blob_doh(img, **kwargs)
+            self.insert1({**key, 'num_blobs': len(blobs)})
+            self.Blob.insert([
+                {**key, 'blob_idx': i, 'x': x, 'y': y, 'radius': r}
+                for i, (x, y, r) in enumerate(blobs)
+            ])
+            return
+
+        blobs = blob_doh_tiled(img, processes=self.processes, **kwargs)
+        self.insert1({**key, 'num_blobs': len(blobs)})
+        self.Blob.insert(blob_rows(key, blobs))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark overlapping-tile blob detection")
+    add_common_arguments(parser)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2048, 8192])
+    parser.add_argument("--tile", type=int, default=TILE_SIZE)
+    parser.add_argument("--processes", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        "--single-max",
+        type=int,
+        default=8192,
+        help="Largest size to run the single-call blob_doh at (default: 8192)",
+    )
+    parser.add_argument(
+        "--pipeline-size", type=int, default=4096, help="Image size for the pipeline run"
+    )
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    for size in args.sizes:
+        print(f"Size {size}x{size}...", flush=True)
+        img = synthesize(size)
+        megapixels = size * size / 1e6
+        with timer(metrics, f"tiled_{size}_s"):
+            tiled = blob_doh_tiled(img, tile=args.tile, processes=args.processes, **PARAMS)
+        metrics[f"tiled_{size}_megapixels_per_s"] = megapixels / metrics[f"tiled_{size}_s"]
+        metrics[f"tiled_{size}_blobs"] = len(tiled)
+        if size <= args.single_max:
+            with timer(metrics, f"single_{size}_s"):
+                single = blob_doh(img, **PARAMS)
+            metrics[f"single_{size}_megapixels_per_s"] = megapixels / metrics[f"single_{size}_s"]
+            metrics[f"single_{size}_blobs"] = len(single)
+            metrics[f"tiled_{size}_speedup"] = metrics[f"single_{size}_s"] / metrics[f"tiled_{size}_s"]
+            metrics[f"tiled_{size}_recall"] = recall(single, tiled)
+            metrics[f"tiled_{size}_precision"] = recall(tiled, single)
+
+    print(f"Populating Detection at {args.pipeline_size}x{args.pipeline_size}...", flush=True)
+    activate_fresh(schema, schema_name(args, "blobs"))
+    try:
+        Image.insert1(
+            {'image_id': 1, 'image_name': 'synthetic', 'image': synthesize(args.pipeline_size)}
+        )
+        Detection.processes = args.processes
+        for mode, tiled in (("single", False), ("tiled", True)):
+            Detection.tiled = tiled
+            with timer(metrics, f"populate_{mode}_s"):
+                Detection.populate()
+            blobs = len(Detection.Blob())
+            metrics[f"populate_{mode}_blob_rows_per_s"] = blobs / metrics[f"populate_{mode}_s"]
+            Detection.delete()
+        metrics["populate_speedup"] = metrics["populate_single_s"] / metrics["populate_tiled_s"]
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "sizes": args.sizes,
+        "tile": args.tile,
+        "processes": args.processes,
+        "single_max": args.single_max,
+        "pipeline_size": args.pipeline_size,
+    }
+    result = record("blob_detection", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Cascade delete benchmark on a deep master-part graph: ``delete()`` vs ``batched_delete``.
+
+Declares a synthetic pipeline with ``Subject`` → ``Session``. ``Session`` has a
+chain of ``--depth`` part-of-part tables (``Session.Level1`` →
+``Session.Level2`` → ...), each with ``--fanout`` rows per parent row. Below the
+last level sits a ``--chain`` of downstream tables (``Stage1`` → ``Stage2``
+→ ...). A ``Comparison`` table references ``Session`` twice, once through a
+renamed foreign key. ``--subjects`` subjects with ``--sessions`` sessions each
+fill the tables.
+
+Three cascades are measured, each seeded on a subject of its own for each
+method:
+
+- ``session``: one session.
+- ``subject``: one subject, with all of its sessions.
+- ``part``: one session's rows of ``Session.Level{depth // 2}``, with
+  ``part_integrity="cascade"``, which pulls in the session and all of its parts.
+
+For each cascade it times the preview (``dj.Diagram.cascade(...).counts()``
+vs ``batched_delete(..., dry_run=True)``) and the delete (``delete()`` vs
+``batched_delete`` from ``examples/batched_cascade.py``). It reports rows/s,
+the speedup, and the materialization and delete time of each table that
+``batched_delete`` visits. ``mismatches`` counts tables whose deleted rows
+differ from the preview counts.
+
+Usage:
+    python benchmarks/bench_cascade.py
+    python benchmarks/bench_cascade.py --depth 8 --fanout 3 --chain 5 --sessions 20
+"""
+
+import argparse
+import sys
+
+import datajoint as dj
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    print_table,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from batched_cascade import batched_delete  # noqa: E402
+
+SCENARIOS = ["session", "subject", "part"]
+
+context = {}
+schema = dj.Schema(context=context)
+
+
+def declare(depth, chain):
+    """Declare the pipeline on ``schema``; returns its table classes by name."""
+
+    @schema
+    class Subject(dj.Manual):
+        definition = """
+        subject_id : int32
+        """
+
+    context["Subject"] = Subject
+    parts = {}
+    parent = "master"
+    for level in range(1, depth + 1):
+        parts[f"Level{level}"] = type(f"Level{level}", (dj.Part,), {
+            "definition": f"""
+            -> {parent}
+            level{level}_id : int16
+            """,
+        })
+        parent = f"Session.Level{level}"
+    context["Session"] = schema(type("Session", (dj.Manual,), {
+        "definition": """
+        -> Subject
+        session_id : int16
+        """,
+        **parts,
+    }))
+
+    @schema
+    class Comparison(dj.Manual):
+        definition = """
+        -> Session
+        -> Session.proj(baseline_subject='subject_id', baseline_session='session_id')
+        """
+
+    context["Comparison"] = Comparison
+    parent = f"Session.Level{depth}"
+    for k in range(1, chain + 1):
+        name = f"Stage{k}"
+        context[name] = schema(type(name, (dj.Manual,), {
+            "definition": f"""
+            -> {parent}
+            ---
+            value : float32
+            """,
+        }))
+        parent = name
+    return context
+
+
+def fill(args, tables):
+    """Insert every subject's sessions, part rows and stage rows."""
+    subjects = [{"subject_id": s} for s in range(args.subjects)]
+    tables["Subject"].insert(subjects)
+    rows = [{**s, "session_id": t} for s in subjects for t in range(args.sessions)]
+    tables["Session"].insert(rows)
+    tables["Comparison"].insert(
+        {**r, "baseline_subject": r["subject_id"], "baseline_session": 0} for r in rows
+    )
+    for level in range(1, args.depth + 1):
+        rows = [{**r, f"level{level}_id": i} for r in rows for i in range(args.fanout)]
+        for batch in chunked(rows, 10_000):
+            getattr(tables["Session"], f"Level{level}").insert(batch)
+    for k in range(1, args.chain + 1):
+        for batch in chunked(rows, 10_000):
+            tables[f"Stage{k}"].insert({**r, "value": 0.0} for r in batch)
+
+
+def short(name):
+    """Table name without schema or quotes."""
+    return name.rsplit(".", 1)[-1].strip('`"')
+
+
+def seed(scenario, tables, subject_id, depth):
+    """Restricted seed table and ``part_integrity`` for one cascade."""
+    session = {"subject_id": subject_id, "session_id": 0}
+    if scenario == "session":
+        return tables["Session"] & session, "enforce"
+    if scenario == "subject":
+        return tables["Subject"] & {"subject_id": subject_id}, "enforce"
+    return getattr(tables["Session"], f"Level{max(depth // 2, 1)}") & session, "cascade"
+
+
+def row_counts(names):
+    return {name: len(dj.FreeTable(schema.connection, name)) for name in names}
+
+
+def mismatches(expected, before, after):
+    """Tables whose deleted rows differ from ``expected``."""
+    return sum(before[name] - after[name] != expected.get(name, 0) for name in before)
+
+
+def run_scenario(scenario, args, tables, metrics, subject_ids):
+    builtin, part_integrity = seed(scenario, tables, next(subject_ids), args.depth)
+    batched, _ = seed(scenario, tables, next(subject_ids), args.depth)
+
+    print(f"{scenario}: preview...", flush=True)
+    with timer(metrics, f"{scenario}_preview_s"):
+        expected = dj.Diagram.cascade(builtin, part_integrity=part_integrity).counts()
+    with timer(metrics, f"{scenario}_batched_preview_s"):
+        dry = batched_delete(batched, part_integrity=part_integrity, dry_run=True)
+    metrics[f"{scenario}_batched_preview_speedup"] = (
+        metrics[f"{scenario}_preview_s"] / metrics[f"{scenario}_batched_preview_s"]
+    )
+    batched_expected = dj.Diagram.cascade(batched, part_integrity=part_integrity).counts()
+    metrics["mismatches"] += sum(
+        dry[name]["rows"] != batched_expected.get(name, 0) for name in dry
+    )
+
+    print(f"{scenario}: delete()...", flush=True)
+    before = row_counts(expected)
+    with timer(metrics, f"{scenario}_delete_s"):
+        builtin.delete(prompt=False, part_integrity=part_integrity)
+    metrics["mismatches"] += mismatches(expected, before, row_counts(expected))
+    metrics[f"{scenario}_delete_rows_per_s"] = sum(expected.values()) / metrics[f"{scenario}_delete_s"]
+
+    print(f"{scenario}: batched_delete...", flush=True)
+    before = row_counts(batched_expected)
+    with timer(metrics, f"{scenario}_batched_s"):
+        stats = batched_delete(batched, part_integrity=part_integrity)
+    metrics["mismatches"] += mismatches(batched_expected, before, row_counts(batched_expected))
+    metrics[f"{scenario}_batched_rows_per_s"] = sum(batched_expected.values()) / metrics[f"{scenario}_batched_s"]
+    metrics[f"{scenario}_batched_speedup"] = metrics[f"{scenario}_delete_s"] / metrics[f"{scenario}_batched_s"]
+
+    rows = []
+    for name, s in stats.items():
+        table = short(name)
+        metrics[f"{scenario}_batched_{table}_materialize_s"] = s["materialize_s"]
+        metrics[f"{scenario}_batched_{table}_delete_s"] = s["delete_s"]
+        rows.append({
+            "table": table,
+            "rows": s["rows"],
+            "materialize_ms": f"{s['materialize_s'] * 1000:.1f}",
+            "delete_ms": f"{s['delete_s'] * 1000:.1f}",
+        })
+    print_table(rows, ["table", "rows", "materialize_ms", "delete_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cascade delete on deep master-part graphs")
+    add_common_arguments(parser)
+    parser.add_argument("--depth", type=int, default=6, help="Part-of-part levels under Session")
+    parser.add_argument("--fanout", type=int, default=3, help="Part rows per parent row at each level")
+    parser.add_argument("--chain", type=int, default=3, help="Downstream tables below the last level")
+    parser.add_argument("--subjects", type=int, default=12)
+    parser.add_argument("--sessions", type=int, default=5, help="Sessions per subject")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+    if args.subjects < 2 * len(SCENARIOS):
+        parser.error(f"--subjects must be at least {2 * len(SCENARIOS)}")
+
+    tables = declare(args.depth, args.chain)
+    metrics = {"mismatches": 0}
+    activate_fresh(schema, schema_name(args, "cascade"))
+    try:
+        print(f"Inserting {args.subjects * args.sessions} sessions...", flush=True)
+        fill(args, tables)
+        subject_ids = iter(range(args.subjects))
+        for scenario in SCENARIOS:
+            run_scenario(scenario, args, tables, metrics, subject_ids)
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "depth": args.depth,
+        "fanout": args.fanout,
+        "chain": args.chain,
+        "subjects": args.subjects,
+        "sessions": args.sessions,
+    }
+    result = record("cascade", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
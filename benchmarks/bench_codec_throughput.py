@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Codec throughput benchmark: MB/s, allocations and copies per encode and decode.
+
+Runs each codec in ``--codecs`` on synthetic arrays of every ``--dtypes`` and
+``--sizes`` combination. Any registered codec name works. Append ``@`` to
+store the values in a scratch object store, e.g. ``npy@`` or ``blob@``. By
+default it compares ``<blob>``, ``<npy@>`` and the zero-copy ``<array>`` codec
+from ``examples/array_codec.py``. Load other codecs with ``--import``.
+
+Each codec is measured at two levels:
+
+- ``codec``: ``encode`` and ``decode`` called directly, without a database.
+  In-table codecs only, following their chain (``get_dtype``) down to the core
+  type.
+- ``table``: ``insert`` and ``to_arrays`` of ``--volume`` MB of rows through
+  a table with one attribute of that codec. This includes the driver and, for
+  ``@`` codecs, the object store. Lazy references such as ``NpyRef`` are loaded
+  with ``np.asarray``.
+
+For each combination it reports:
+
+- ``mb_per_s``: payload megabytes (array ``nbytes``) per second, from the
+  median of ``--repeats`` runs.
+- ``alloc_bytes``: the peak traced allocation during the call.
+- ``copies``: ``alloc_bytes / nbytes``, the number of payload-sized buffers
+  alive at the peak. The returned value counts as one. A zero-copy decode
+  scores close to 0.
+- ``memcpy_equiv``: the call's time divided by one ``np.copyto`` of the
+  payload. This estimates how many times the data was copied in total,
+  including buffers that were freed before the peak.
+
+Every value is checked against its source after the roundtrip. Failures are
+counted in ``mismatches``.
+
+Usage:
+    python benchmarks/bench_codec_throughput.py
+    python benchmarks/bench_codec_throughput.py --codecs blob array --sizes 0.01 1 256 --dtypes float64 uint8
+"""
+
+import argparse
+import importlib.util
+import itertools
+import re
+import sys
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    percentile,
+    peak_memory,
+    record,
+    remove_scratch_store,
+    repeat,
+    report,
+    schema_name,
+    scratch_store,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+import array_codec  # noqa: E402,F401  registers <array>
+
+STORE = "bench_codec"
+MB = 1 << 20
+
+schema = dj.Schema()
+
+
+def label(codec):
+    """Metric prefix for a codec argument, e.g. ``npy@`` → ``npy_store``."""
+    return codec.rstrip("@") + ("_store" if codec.endswith("@") else "")
+
+
+def size_label(size_mb):
+    return f"{size_mb:g}mb".replace(".", "p")
+
+
+def make_array(rng, dtype, size_mb):
+    """A 2-D array of ``dtype`` with about ``size_mb`` megabytes of random values."""
+    dtype = np.dtype(dtype)
+    count = max(1, int(size_mb * MB) // dtype.itemsize)
+    shape = (count // 128, 128) if count >= 128 else (count,)
+    if dtype.kind in "iu":
+        return rng.integers(0, 100, size=shape, dtype=dtype)
+    return rng.standard_normal(shape).astype(dtype)
+
+
+def in_table_chain(name):
+    """The codecs an in-table value passes through, outermost first, or None for store-only codecs."""
+    chain = []
+    while True:
+        codec = dj.get_codec(name)
+        try:
+            dtype = codec.get_dtype(False)
+        except Exception:
+            return None
+        chain.append(codec)
+        match = re.fullmatch(r"<(\w+)>", dtype)
+        if match is None:
+            return chain
+        name = match.group(1)
+
+
+def encode(chain, value):
+    for codec in chain:
+        value = codec.encode(value)
+    return value
+
+
+def decode(chain, stored):
+    for codec in reversed(chain):
+        stored = codec.decode(stored)
+    return stored
+
+
+def tag(array, value):
+    """Overwrite the first 8 bytes of ``array`` so hash-addressed stores cannot deduplicate it."""
+    array.reshape(-1).view(np.uint8)[:8] = np.frombuffer(np.int64(value).tobytes(), np.uint8)
+
+
+def same(expected, value):
+    value = value if isinstance(value, np.ndarray) else np.asarray(value)
+    return value.dtype == expected.dtype and value.shape == expected.shape \
+        and value.tobytes() == expected.tobytes()
+
+
+def memcpy_s(array, repeats):
+    """Median time of one copy of ``array`` into a preallocated buffer."""
+    out = np.empty_like(array)
+    return percentile(repeat(lambda: np.copyto(out, array), repeats), 50)
+
+
+def measure(metrics, prefix, fn, nbytes, copy_s, repeats):
+    """Throughput, peak allocation and copy estimates of ``fn``; returns its last result."""
+    samples = repeat(fn, repeats)
+    median = percentile(samples, 50)
+    metrics[f"{prefix}_mb_per_s"] = nbytes / MB / median
+    metrics[f"{prefix}_memcpy_equiv"] = median / copy_s
+    with peak_memory(metrics, f"{prefix}_alloc_bytes"):
+        result = fn()
+    metrics[f"{prefix}_copies"] = metrics[f"{prefix}_alloc_bytes"] / nbytes
+    return result
+
+
+def codec_level(metrics, prefix, chain, array, copy_s, repeats):
+    stored = measure(metrics, f"{prefix}_encode", lambda: encode(chain, array), array.nbytes, copy_s, repeats)
+    metrics[f"{prefix}_stored_bytes"] = len(memoryview(stored).cast("B"))
+    decoded = measure(metrics, f"{prefix}_decode", lambda: decode(chain, stored), array.nbytes, copy_s, repeats)
+    return same(array, decoded)
+
+
+def table_level(metrics, prefix, table, payloads, copy_s, repeats):
+    nbytes = sum(p.nbytes for p in payloads)
+    copy_s *= len(payloads)
+    runs = itertools.count()
+
+    def insert():
+        run = next(runs)
+        for i, payload in enumerate(payloads):
+            tag(payload, run * len(payloads) + i)
+        table.delete_quick()
+        table.insert({"payload_id": i, "payload": p} for i, p in enumerate(payloads))
+
+    def fetch():
+        rows = table.to_dicts(order_by="KEY")
+        return [v if isinstance(v, np.ndarray) else np.asarray(v) for v in (r["payload"] for r in rows)]
+
+    measure(metrics, f"{prefix}_insert", insert, nbytes, copy_s, repeats)
+    values = measure(metrics, f"{prefix}_fetch", fetch, nbytes, copy_s, repeats)
+    table.delete_quick()
+    return len(values) == len(payloads) and all(map(same, payloads, values))
+
+
+def declare_tables(codecs):
+    """One ``Payload`` table per codec, keyed by codec argument."""
+    tables = {}
+    for i, codec in enumerate(codecs):
+        attribute = f"<{codec}{STORE}>" if codec.endswith("@") else f"<{codec}>"
+        cls = type(f"Payload{chr(ord('A') + i)}", (dj.Manual,), {"definition": f"""
+            payload_id : int32
+            ---
+            payload : {attribute}
+            """})
+        tables[codec] = schema(cls)()
+    return tables
+
+
+def import_codecs(paths):
+    """Import modules that register additional codecs."""
+    for path in map(Path, paths):
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        spec.loader.exec_module(importlib.util.module_from_spec(spec))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark codec encode/decode throughput")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--codecs",
+        nargs="+",
+        default=["blob", "array", "blob@", "npy@", "array@"],
+        help="Registered codec names, with @ for store-backed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--import",
+        dest="imports",
+        nargs="+",
+        default=[],
+        metavar="PATH",
+        help="Python files that define additional codecs",
+    )
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.01, 1, 64], help="Array sizes in MB")
+    parser.add_argument("--dtypes", nargs="+", default=["float64", "float32", "int16", "uint8"])
+    parser.add_argument("--volume", type=float, default=256, help="MB inserted per table-level run")
+    parser.add_argument("--max-rows", type=int, default=1000, help="Row limit per table-level run")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--store",
+        choices=["file", "s3"],
+        default="file",
+        help="Scratch store protocol for @ codecs (default: file)",
+    )
+
+    args = parser.parse_args()
+    import_codecs(args.imports)
+    unknown = [c for c in args.codecs if c.rstrip("@") not in dj.list_codecs()]
+    if unknown:
+        parser.error(f"unregistered codecs: {', '.join(unknown)}")
+    if configure(args):
+        return
+
+    metrics = {"mismatches": 0}
+    rng = np.random.default_rng(0)
+    spec = scratch_store(args.store)
+    dj.config.stores[STORE] = spec
+    activate_fresh(schema, schema_name(args, "codec_throughput"))
+    try:
+        tables = declare_tables(args.codecs)
+        for dtype in args.dtypes:
+            for size_mb in args.sizes:
+                array = make_array(rng, dtype, size_mb)
+                copy_s = memcpy_s(array, args.repeats)
+                rows = max(1, min(args.max_rows, int(args.volume / size_mb)))
+                payloads = [array.copy() for _ in range(rows)]
+                print(f"{dtype} {size_mb:g} MB ({rows} rows per table run)...", flush=True)
+                for codec in args.codecs:
+                    prefix = f"{label(codec)}_{dtype}_{size_label(size_mb)}"
+                    ok = table_level(metrics, f"{prefix}_table", tables[codec], payloads, copy_s, args.repeats)
+                    chain = None if codec.endswith("@") else in_table_chain(codec)
+                    if chain:
+                        ok &= codec_level(metrics, f"{prefix}_codec", chain, array, copy_s, args.repeats)
+                    metrics["mismatches"] += not ok
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+            remove_scratch_store(spec)
+
+    params = {
+        "codecs": args.codecs,
+        "sizes": args.sizes,
+        "dtypes": args.dtypes,
+        "volume": args.volume,
+        "max_rows": args.max_rows,
+        "repeats": args.repeats,
+        "store": args.store,
+    }
+    result = record("codec_throughput", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
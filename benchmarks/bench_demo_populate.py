@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Populate and query benchmark on a scaled-up ``demo_modules`` pipeline.
+
+Fills acquisition.Lab/Subject/Session with synthetic rows, then times:
+
+1. Key-source computation for the processing and analysis tables
+2. ``populate()`` throughput of ProcessedSession and the analysis tables
+3. A fixed set of cross-schema restriction and aggregation queries
+
+Usage:
+    python benchmarks/bench_demo_populate.py --backend both
+    python benchmarks/bench_demo_populate.py --labs 100 --subjects-per-lab 100 \\
+        --sessions-per-subject 100   # 10^6 sessions
+
+Results are appended to benchmarks/results/history.jsonl and compared with the
+most recent run under a different DataJoint version.
+"""
+
+import argparse
+import sys
+
+import demo_pipeline
+from demo_pipeline import acquisition, analysis, processing
+from harness import add_common_arguments, configure, record, repeat, report, summarize, timer
+
+
+def key_source_queries():
+    """Key sources of the auto-populated demo tables, and their pending subsets."""
+    return {
+        "processed_session": processing.ProcessedSession.key_source,
+        "processed_session_pending": (
+            processing.ProcessedSession.key_source - processing.ProcessedSession
+        ),
+        "subject_analysis": analysis.SubjectAnalysis.key_source,
+        "cross_session_analysis": analysis.CrossSessionAnalysis.key_source,
+    }
+
+
+def restriction_queries():
+    """Representative cross-schema queries over the populated pipeline."""
+    female = acquisition.Subject & {"sex": "F"}
+    return {
+        # Semijoin across schemas: processing rows restricted by an acquisition attribute
+        "processed_by_subject_attr": processing.ProcessedSession & female,
+        # Chain of restrictions through two schema boundaries
+        "analysis_by_lab": analysis.CrossSessionAnalysis
+        & (acquisition.Subject & (acquisition.Lab & "institution = 'Institute 3'")),
+        # Antijoin: sessions not yet processed with every parameter set
+        "unprocessed_sessions": acquisition.Session - processing.ProcessedSession,
+        # Join + restriction on a computed attribute
+        "join_quality": (acquisition.Session * processing.ProcessedSession)
+        & "quality_score > 0.5",
+        # Aggregation across the schema boundary
+        "sessions_per_subject": acquisition.Subject.aggr(
+            processing.ProcessedSession, n="count(*)"
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark populate and queries on demo_modules")
+    add_common_arguments(parser)
+    parser.add_argument("--labs", type=int, default=10)
+    parser.add_argument("--subjects-per-lab", type=int, default=100)
+    parser.add_argument("--sessions-per-subject", type=int, default=100)
+    parser.add_argument(
+        "--chunk-size", type=int, default=10_000, help="Rows per bulk insert (default: 10000)"
+    )
+    parser.add_argument(
+        "--populate-limit",
+        type=int,
+        default=10_000,
+        help="max_calls per populate() to bound the run time (default: 10000; 0 = all)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Repetitions per query (default: 5)"
+    )
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    params = {
+        "labs": args.labs,
+        "subjects_per_lab": args.subjects_per_lab,
+        "sessions_per_subject": args.sessions_per_subject,
+        "populate_limit": args.populate_limit,
+    }
+    n_sessions = args.labs * args.subjects_per_lab * args.sessions_per_subject
+    print(f"Generating {n_sessions:,} sessions on {args.backend}...", flush=True)
+
+    demo_pipeline.activate(args)
+    try:
+        metrics = demo_pipeline.generate(
+            args.labs, args.subjects_per_lab, args.sessions_per_subject, args.chunk_size
+        )
+
+        print("Timing key-source computation...", flush=True)
+        for name, query in key_source_queries().items():
+            metrics.update(summarize(repeat(lambda: len(query), args.repeat), f"key_source_{name}"))
+
+        max_calls = args.populate_limit or None
+        for name, table in (
+            ("processed_session", processing.ProcessedSession),
+            ("subject_analysis", analysis.SubjectAnalysis),
+            ("cross_session_analysis", analysis.CrossSessionAnalysis),
+        ):
+            print(f"Populating {table.__name__}...", flush=True)
+            with timer(metrics, f"populate_{name}_s"):
+                result = table.populate(max_calls=max_calls)
+            calls = result["success_count"]
+            metrics[f"populate_{name}_calls"] = calls
+            metrics[f"populate_{name}_keys_per_s"] = calls / metrics[f"populate_{name}_s"]
+
+        print("Timing cross-schema queries...", flush=True)
+        for name, query in restriction_queries().items():
+            metrics.update(summarize(repeat(lambda: len(query), args.repeat), f"query_{name}"))
+    finally:
+        if not args.keep:
+            demo_pipeline.drop()
+
+    result = record("demo_populate", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Diagram rendering benchmark: plain ``dj.Diagram`` vs the cached, collapsible renderer.
+
+Declares a generated, scaled-up copy of the ``demo_modules`` structure (about 300
+tables by default) and times:
+
+1. Plain ``dj.Diagram(...).make_svg()`` of the full pipeline
+2. ``CachedDiagram`` first render (layout computed and cached) and repeat render
+3. All modules collapsed, then one module expanded (cold and warm)
+4. A zoomed-in render of one copy's tables using the cached full layout
+
+Usage:
+    python benchmarks/bench_diagram.py
+    python benchmarks/bench_diagram.py --copies 100   # ~900 tables
+"""
+
+import argparse
+import sys
+import tempfile
+
+from harness import ROOT, add_common_arguments, configure, record, report, timer
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+import scaled_modules  # noqa: E402
+from diagram_layout_cache import CachedDiagram  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached diagram rendering")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--copies",
+        type=int,
+        default=34,
+        help="Copies of the demo pipeline to declare (9 tables each, default: 34)",
+    )
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    import datajoint as dj
+
+    schemas, tables = scaled_modules.declare(args, args.copies)
+    metrics = {"tables": sum(len(t) for t in tables), "schemas": len(schemas)}
+    try:
+        print(f"Rendering {metrics['tables']} tables in {len(schemas)} schemas...", flush=True)
+        with timer(metrics, "plain_render_s"):
+            dj.Diagram.from_sequence(schemas).make_svg()
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            diagram = CachedDiagram(*schemas, cache_dir=cache_dir)
+            with timer(metrics, "cached_cold_render_s"):
+                diagram.make_svg()
+            with timer(metrics, "cached_warm_render_s"):
+                diagram.make_svg()
+
+            diagram.collapse()
+            with timer(metrics, "collapsed_cold_render_s"):
+                diagram.make_svg()
+            diagram.expand(schemas[0])
+            with timer(metrics, "expand_one_cold_render_s"):
+                diagram.make_svg()
+            diagram.collapse(schemas[0])
+            with timer(metrics, "collapsed_warm_render_s"):
+                diagram.make_svg()
+            diagram.expand(schemas[0])
+            with timer(metrics, "expand_one_warm_render_s"):
+                diagram.make_svg()
+
+            diagram.expand()
+            zoom = [table for module_tables in tables[:3] for table in module_tables]
+            with timer(metrics, "zoom_render_s"):
+                diagram.make_svg(zoom=zoom)
+
+            metrics["layout_cache_hits"] = diagram.hits
+            metrics["layout_cache_misses"] = diagram.misses
+        metrics["warm_speedup"] = metrics["plain_render_s"] / metrics["cached_warm_render_s"]
+    finally:
+        if not args.keep:
+            scaled_modules.drop(schemas)
+
+    result = record("diagram", args, {"copies": args.copies}, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Per-key vs batched populate for event detection on the demo pipeline.
+
+``processing.EventDetection`` computes and inserts the events of one
+ProcessedSession per ``make()`` call, so each session costs its own fetch,
+insert and transaction. ``batched.BatchedEventDetection`` computes a whole
+batch of sessions in one vectorized pass and inserts all event rows in one
+statement per batch. Both produce identical events; this benchmark reports
+event rows/s for each path.
+
+Usage:
+    python benchmarks/bench_event_detection.py --backend both
+    python benchmarks/bench_event_detection.py --sessions-per-subject 200 --batch-size 500
+"""
+
+import argparse
+import sys
+
+import demo_pipeline
+from demo_pipeline import acquisition, batched, processing
+from harness import add_common_arguments, configure, record, report, timer
+
+MODULES = (acquisition, processing, batched)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-key event detection")
+    add_common_arguments(parser)
+    parser.add_argument("--labs", type=int, default=2)
+    parser.add_argument("--subjects-per-lab", type=int, default=10)
+    parser.add_argument("--sessions-per-subject", type=int, default=50)
+    parser.add_argument(
+        "--batch-size", type=int, default=200, help="Sessions per batch (default: 200)"
+    )
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    params = {
+        "labs": args.labs,
+        "subjects_per_lab": args.subjects_per_lab,
+        "sessions_per_subject": args.sessions_per_subject,
+        "batch_size": args.batch_size,
+    }
+
+    demo_pipeline.activate(args, MODULES)
+    try:
+        demo_pipeline.generate(args.labs, args.subjects_per_lab, args.sessions_per_subject)
+        print("Populating ProcessedSession...", flush=True)
+        processing.ProcessedSession.populate()
+
+        metrics = {"sessions": len(processing.ProcessedSession())}
+
+        print("Per-key EventDetection.populate()...", flush=True)
+        with timer(metrics, "per_key_s"):
+            processing.EventDetection.populate()
+        metrics["per_key_rows"] = len(processing.EventDetection())
+        metrics["per_key_rows_per_s"] = metrics["per_key_rows"] / metrics["per_key_s"]
+
+        print("Batched BatchedEventDetection.populate()...", flush=True)
+        with timer(metrics, "batch_assign_s"):
+            metrics["batches"] = batched.EventBatch.assign(args.batch_size)
+        with timer(metrics, "batched_s"):
+            batched.BatchedEventDetection.populate()
+        metrics["batched_rows"] = len(batched.BatchedEventDetection.Event())
+        metrics["batched_rows_per_s"] = metrics["batched_rows"] / metrics["batched_s"]
+        metrics["batched_speedup"] = metrics["per_key_s"] / metrics["batched_s"]
+
+        if metrics["batched_rows"] != metrics["per_key_rows"]:
+            print(
+                f"ERROR: batched path produced {metrics['batched_rows']} events, "
+                f"per-key path {metrics['per_key_rows']}",
+                file=sys.stderr,
+            )
+            sys.exit(2)
+    finally:
+        if not args.keep:
+            demo_pipeline.drop(MODULES)
+
+    result = record("event_detection", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Garbage collection benchmark: ``dj.gc`` single pass vs ``ParallelCollector``.
+
+Fills a scratch store (a local directory, or the compose MinIO with
+``--store s3``) through a ``Recording`` table that has a hash-addressed
+``<blob@>`` and a schema-addressed ``<npy@>`` attribute. The store has no
+``partition_pattern``, since ``dj.gc`` only walks ``{schema_prefix}/{schema}/``
+and would not see partitioned objects to compare against. The hash section is
+flat (no ``subfolding``), so ``ParallelCollector`` splits it into prefix
+shards. Deleting every
+``--delete-every``-th row leaves orphans. Then:
+
+- ``dj_gc``: ``dj.gc.GarbageCollector(schema, store=...).collect()``, a dry run.
+- ``parallel_w{N}``: a full dry run of ``ParallelCollector`` from
+  ``examples/parallel_gc.py`` with N workers, for each ``--workers`` value.
+- ``collect``: ``collect(dry_run=False)`` with a manifest and the largest
+  worker count. It deletes the orphans and saves the manifest.
+- ``incremental``: after deleting ``--incremental-rows`` more rows, the same
+  collector runs again and lists only the shards those rows touched.
+
+Reports seconds and stored objects listed per second, the speedup over
+``dj_gc``, deleted objects per second, and the shards listed by the
+incremental run. ``orphan_mismatches`` counts dry runs whose orphan count
+differs from ``dj_gc``. ``leftover_orphans`` is what ``dj_gc`` still finds
+after both collecting runs, and ``lost_objects`` counts ``<npy@>`` objects of
+remaining rows that are missing from the store.
+
+Usage:
+    python benchmarks/bench_gc.py
+    python benchmarks/bench_gc.py --store s3 --rows 50000 --workers 8 32 128 --incremental-rows 100
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    record,
+    remove_scratch_store,
+    report,
+    schema_name,
+    scratch_store,
+    store_filesystem,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from parallel_gc import ParallelCollector  # noqa: E402
+
+STORE = "bench_gc"
+
+schema = dj.Schema()
+
+
+@schema
+class Recording(dj.Manual):
+    definition = f"""
+    session_id   : int32
+    recording_id : int32
+    ---
+    trace        : <blob@{STORE}>
+    waveform     : <npy@{STORE}>
+    """
+
+
+def orphans(stats):
+    return stats["hash_paths_orphaned"] + stats["schema_paths_orphaned"]
+
+
+def stored(stats):
+    return stats["hash_paths_stored"] + stats["schema_paths_stored"]
+
+
+def lost_objects(spec):
+    """``<npy@>`` objects of remaining rows that are missing from the store."""
+    fs, root = store_filesystem(spec)
+    fs.invalidate_cache()
+    present = set(fs.find(root))
+    rows = Recording.to_dicts()  # decodes every <blob@>, so raises if one was deleted
+    return sum(f"{root}/{row['waveform'].path}" not in present for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel, manifest-driven garbage collection")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--store",
+        choices=["file", "s3"],
+        default="file",
+        help="Scratch store protocol: local directory or the compose MinIO (default: file)",
+    )
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=256, help="float64 samples per object")
+    parser.add_argument("--delete-every", type=int, default=10, help="Delete every N-th row before collecting")
+    parser.add_argument("--incremental-rows", type=int, default=20, help="Rows deleted before the incremental run")
+    parser.add_argument("--workers", type=int, nargs="+", default=[8, 32])
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    spec = scratch_store(args.store)
+    dj.config.stores[STORE] = spec
+    metrics = {"orphan_mismatches": 0}
+    rng = np.random.default_rng(0)
+    activate_fresh(schema, schema_name(args, "gc"))
+    try:
+        print(f"Inserting {args.rows} rows into a {args.store} store...", flush=True)
+        for ids in chunked(range(args.rows), 500):
+            Recording.insert(
+                {
+                    "session_id": i % args.sessions,
+                    "recording_id": i,
+                    "trace": rng.standard_normal(args.samples),
+                    "waveform": rng.standard_normal(args.samples),
+                }
+                for i in ids
+            )
+        (Recording & f"recording_id % {args.delete_every} = 0").delete_quick()
+
+        print("dj_gc...", flush=True)
+        with timer(metrics, "dj_gc_s"):
+            expected = dj.gc.GarbageCollector(schema, store=STORE).collect()
+        metrics["dj_gc_objects_per_s"] = stored(expected) / metrics["dj_gc_s"]
+
+        for workers in args.workers:
+            prefix = f"parallel_w{workers}"
+            print(f"{prefix}...", flush=True)
+            with timer(metrics, f"{prefix}_s"):
+                stats = ParallelCollector(schema, store=STORE, workers=workers).collect()
+            metrics[f"{prefix}_objects_per_s"] = stored(stats) / metrics[f"{prefix}_s"]
+            metrics[f"{prefix}_speedup"] = metrics["dj_gc_s"] / metrics[f"{prefix}_s"]
+            metrics["orphan_mismatches"] += orphans(stats) != orphans(expected)
+
+        with tempfile.TemporaryDirectory(prefix="bench_gc_") as tmp:
+            collector = ParallelCollector(
+                schema, store=STORE, workers=max(args.workers), manifest=Path(tmp) / "manifest.json"
+            )
+            print("collect...", flush=True)
+            with timer(metrics, "collect_s"):
+                stats = collector.collect(dry_run=False)
+            metrics["collect_deleted_per_s"] = stats["deleted"] / metrics["collect_s"]
+
+            (Recording & Recording.keys(order_by="KEY", limit=args.incremental_rows)).delete_quick()
+            print("incremental...", flush=True)
+            with timer(metrics, "incremental_s"):
+                stats = collector.collect(dry_run=False)
+            metrics["incremental_shards_listed"] = stats["shards_listed"]
+            metrics["incremental_speedup"] = metrics["collect_s"] / metrics["incremental_s"]
+            metrics["incremental_vs_dj_gc_speedup"] = metrics["dj_gc_s"] / metrics["incremental_s"]
+
+        metrics["leftover_orphans"] = orphans(dj.gc.GarbageCollector(schema, store=STORE).collect())
+        metrics["lost_objects"] = lost_objects(spec)
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+            remove_scratch_store(spec)
+
+    params = {
+        "store": args.store,
+        "rows": args.rows,
+        "sessions": args.sessions,
+        "samples": args.samples,
+        "delete_every": args.delete_every,
+        "incremental_rows": args.incremental_rows,
+        "workers": args.workers,
+    }
+    result = record("gc", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
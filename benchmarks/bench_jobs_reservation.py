@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Job reservation benchmark: N local worker processes populating one table.
+
+Uses the distributed tutorial's ``Experiment`` → ``Analysis`` pipeline with
+``--keys`` experiments. ``Analysis.make`` sleeps ``--make-ms`` milliseconds in
+place of the tutorial's 100 ms. For each worker count and reservation
+strategy, it starts that many worker processes, releases them together and
+times how long they take to populate every key. Strategies:
+
+- ``direct``: ``populate()`` without reservation. Every worker walks the same
+  ``key_source - self``, so most keys are computed more than once.
+- ``partitioned``: direct mode, but each worker is restricted to
+  ``exp_id % N = i``. This is the contention-free baseline.
+- ``jobs``: ``populate(reserve_jobs=True)``, where every worker refreshes the
+  jobs table on start (``jobs.auto_refresh``).
+- ``jobs_prerefreshed``: the jobs table is refreshed once before the workers
+  start, and they run with ``jobs.auto_refresh`` off.
+- ``jobs_batched``: as ``jobs_prerefreshed``, but each worker loops over
+  ``populate(reserve_jobs=True, max_calls=--batch)``, as in the tutorial's
+  ``worker.py``.
+
+For each combination it reports:
+
+- ``keys_per_s``: total throughput, and per worker.
+- ``gap``: p50/p99 of the time between one ``make()`` ending and the next one
+  starting in the same worker. This covers reservation, commit and job
+  bookkeeping.
+- ``duplicate_calls``: ``make()`` calls beyond one per key. These are attempts
+  on keys that another worker had already computed.
+- ``lost_reservations``: ``jobs.reserve()`` calls that failed because another
+  worker had reserved the key first. ``populate()`` skips these keys before
+  ``make()``, so they do not show up in ``duplicate_calls``.
+- ``lock_waits``: the change in InnoDB row lock waits on MySQL. On PostgreSQL
+  it is the total number of waiting locks seen in ``pg_locks`` samples taken
+  every 100 ms.
+
+Usage:
+    python benchmarks/bench_jobs_reservation.py
+    python benchmarks/bench_jobs_reservation.py --keys 100000 --workers 8 32 64 --strategies jobs jobs_batched
+"""
+
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+
+import datajoint as dj
+import numpy as np
+from datajoint.jobs import Job
+
+from harness import (
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    record,
+    report,
+    schema_name,
+    summarize,
+    timer,
+)
+
+STRATEGIES = ["direct", "partitioned", "jobs", "jobs_prerefreshed", "jobs_batched"]
+
+schema = dj.Schema()
+
+
+@schema
+class Experiment(dj.Manual):
+    definition = """
+    exp_id : int
+    ---
+    n_samples : int
+    """
+
+
+@schema
+class Analysis(dj.Computed):
+    definition = """
+    -> Experiment
+    ---
+    result : float64
+    compute_time : float32
+    """
+
+    make_s = 0.01
+    calls = []  # (exp_id, start, end) for each make() call in this process
+
+    def make(self, key):
+        start = time.time()
+        n = (Experiment & key).fetch1('n_samples')
+        result = float(np.mean(np.random.randn(n) ** 2))
+        time.sleep(self.make_s)
+        self.calls.append((key['exp_id'], start, time.time()))
+        self.insert1({**key, 'result': result, 'compute_time': time.time() - start})
+
+
+def count_lost_reservations():
+    """Wrap ``Job.reserve`` in this process; returns the list of keys it failed to reserve."""
+    lost = []
+    reserve = Job.reserve
+
+    def counting_reserve(self, key):
+        reserved = reserve(self, key)
+        if not reserved:
+            lost.append(key["exp_id"])
+        return reserved
+
+    Job.reserve = counting_reserve
+    return lost
+
+
+def worker(args, strategy, index, n_workers, ready, go, results):
+    """Run one worker process: connect, wait for the start signal, populate."""
+    configure(args)
+    lost = count_lost_reservations()
+    schema.activate(schema_name(args, "jobs_reservation"))
+    Analysis.make_s = args.make_ms / 1000
+    if strategy in ("jobs_prerefreshed", "jobs_batched"):
+        dj.config["jobs.auto_refresh"] = False
+    dj.conn()  # connect before the clock starts
+    ready.put(index)
+    go.wait()
+
+    start = time.time()
+    if strategy == "direct":
+        Analysis.populate(suppress_errors=True)
+    elif strategy == "partitioned":
+        Analysis.populate(f'exp_id % {n_workers} = {index}', suppress_errors=True)
+    elif strategy == "jobs_batched":
+        while len(Analysis.jobs.pending):
+            Analysis.populate(reserve_jobs=True, max_calls=args.batch, suppress_errors=True)
+    else:
+        Analysis.populate(reserve_jobs=True, suppress_errors=True)
+    results.put({"start": start, "end": time.time(), "calls": Analysis.calls, "lost": len(lost)})
+
+
+def lock_counter(backend):
+    """Callable returning a lock-wait count, and whether it must be sampled."""
+    conn = dj.conn()
+    if backend == "mysql":
+        def count():
+            return int(conn.query("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_waits'").fetchall()[0][1])
+        return count, False
+
+    def count():
+        return int(conn.query("SELECT count(*) FROM pg_locks WHERE NOT granted").fetchall()[0][0])
+    return count, True
+
+
+def run(args, strategy, n_workers, metrics):
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, go = ctx.Queue(), ctx.Queue(), ctx.Event()
+    if strategy in ("jobs_prerefreshed", "jobs_batched"):
+        with timer(metrics, f"{strategy}_w{n_workers}_refresh_s"):
+            Analysis.jobs.refresh()
+    workers = [
+        ctx.Process(target=worker, args=(args, strategy, i, n_workers, ready, go, results))
+        for i in range(n_workers)
+    ]
+    for process in workers:
+        process.start()
+    for _ in workers:
+        ready.get()
+
+    count, sampled = lock_counter(args.backend)
+    lock_waits = 0 if sampled else -count()
+    done = threading.Event()
+
+    def sample():
+        nonlocal lock_waits
+        while not done.wait(0.1):
+            lock_waits += count()
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    if sampled:
+        sampler.start()
+    go.set()
+    reports = [results.get() for _ in workers]
+    done.set()
+    for process in workers:
+        process.join()
+    if sampled:
+        sampler.join()
+    else:
+        lock_waits += count()
+
+    prefix = f"{strategy}_w{n_workers}"
+    elapsed = max(r["end"] for r in reports) - min(r["start"] for r in reports)
+    computed = len(Analysis())
+    calls = sum(len(r["calls"]) for r in reports)
+    lost = sum(r["lost"] for r in reports)
+    gaps = []
+    for r in reports:
+        ends = [r["start"]] + [end for _, _, end in r["calls"]]
+        gaps += [start - end for (_, start, _), end in zip(r["calls"], ends)]
+    metrics[f"{prefix}_keys_per_s"] = computed / elapsed
+    metrics[f"{prefix}_keys_per_s_per_worker"] = computed / elapsed / n_workers
+    metrics.update(summarize(gaps, f"{prefix}_gap"))
+    metrics[f"{prefix}_duplicate_calls"] = calls - computed
+    metrics[f"{prefix}_lost_reservations"] = lost
+    metrics[f"{prefix}_lock_waits"] = lock_waits
+    metrics[f"{prefix}_missing_keys"] = args.keys - computed
+    print(
+        f"  {strategy:18} {n_workers:3} workers: {computed / elapsed:8.1f} keys/s, "
+        f"{calls - computed} duplicate calls, {lost} lost reservations",
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-worker job reservation")
+    add_common_arguments(parser)
+    parser.add_argument("--keys", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=STRATEGIES)
+    parser.add_argument("--make-ms", type=float, default=10.0, help="Time each make() sleeps")
+    parser.add_argument("--batch", type=int, default=100, help="max_calls per populate() for jobs_batched")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    activate_fresh(schema, schema_name(args, "jobs_reservation"))
+    try:
+        for rows in chunked(range(args.keys), 10_000):
+            Experiment.insert({'exp_id': i, 'n_samples': 10000} for i in rows)
+        for strategy in args.strategies:
+            for n_workers in args.workers:
+                run(args, strategy, n_workers, metrics)
+                Analysis.jobs.delete()
+                Analysis.delete_quick()
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "keys": args.keys,
+        "workers": args.workers,
+        "strategies": args.strategies,
+        "make_ms": args.make_ms,
+        "batch": args.batch,
+    }
+    result = record("jobs_reservation", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
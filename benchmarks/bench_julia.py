@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Julia set kernel benchmark: the fractal tutorial's ``julia()`` vs the tiled engine.
+
+Times both implementations at several image sizes, checks that they produce the
+same image, and runs the tutorial's JuliaSpec → JuliaImage pipeline with
+``JuliaImage.make`` using the tiled engine, reporting pixels/s per ``make()``.
+
+Usage:
+    python benchmarks/bench_julia.py
+    python benchmarks/bench_julia.py --sizes 1024 4096 --reference-max 4096 --processes 16
+"""
+
+import argparse
+import sys
+import time
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from julia_tiled import TILE_SIZE, julia_tiled  # noqa: E402
+
+C = -0.4 + 0.6j
+
+schema = dj.Schema()
+
+
+def julia(c, size=256, center=(0.0, 0.0), zoom=1.0, iters=256):
+    """Generate a Julia set image (reference implementation from the tutorial)."""
+    x, y = np.meshgrid(
+        np.linspace(-1, 1, size) / zoom + center[0],
+        np.linspace(-1, 1, size) / zoom + center[1]
+    )
+    z = x + 1j * y
+    img = np.zeros(z.shape)
+    mask = np.ones(z.shape, dtype=bool)
+    for _ in range(iters):
+        z[mask] = z[mask] ** 2 + c
+        mask = np.abs(z) < 2
+        img += mask
+    return img
+
+
+@schema
+class JuliaSpec(dj.Manual):
+    """Parameters for generating Julia fractals."""
+    definition = """
+    spec_id : int16
+    ---
+    c_real : float64          # Real part of c
+    c_imag : float64          # Imaginary part of c
+    noise_level = 50 : float64
+    """
+
+
+@schema
+class JuliaImage(dj.Computed):
+    """Generated fractal images with noise, computed with the tiled engine."""
+    definition = """
+    -> JuliaSpec
+    ---
+    image : <blob>            # Generated fractal image
+    """
+
+    size = 2048
+    processes = None
+    pixels_per_s = []
+
+    def make(self, key):
+        spec = (JuliaSpec & key).fetch1()
+        start = time.perf_counter()
+        img = julia_tiled(
+            spec['c_real'] + 1j * spec['c_imag'], size=self.size, processes=self.processes
+        )
+        rate = img.size / (time.perf_counter() - start)
+        self.pixels_per_s.append(rate)
+        print(f"  JuliaImage {key}: {rate:,.0f} pixels/s", flush=True)
+        img += np.random.randn(*img.shape) * spec['noise_level']
+        self.insert1({**key, 'image': img.astype(np.float32)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tiled Julia set engine")
+    add_common_arguments(parser)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[256, 1024, 4096])
+    parser.add_argument("--iters", type=int, default=256)
+    parser.add_argument("--tile", type=int, default=TILE_SIZE)
+    parser.add_argument("--processes", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument(
+        "--reference-max",
+        type=int,
+        default=2048,
+        help="Largest size to run the reference julia() at (default: 2048)",
+    )
+    parser.add_argument(
+        "--pipeline-size", type=int, default=2048, help="Image size for the pipeline run"
+    )
+    parser.add_argument("--specs", type=int, default=4, help="JuliaSpec rows to populate")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    for size in args.sizes:
+        print(f"Size {size}x{size}...", flush=True)
+        with timer(metrics, f"tiled_{size}_s"):
+            tiled = julia_tiled(
+                C, size=size, iters=args.iters, tile=args.tile, processes=args.processes
+            )
+        tiled_s = metrics[f"tiled_{size}_s"]
+        metrics[f"tiled_{size}_pixels_per_s"] = size * size / tiled_s
+        if size <= args.reference_max:
+            with timer(metrics, f"reference_{size}_s"):
+                reference = julia(C, size=size, iters=args.iters)
+            reference_s = metrics[f"reference_{size}_s"]
+            metrics[f"reference_{size}_pixels_per_s"] = size * size / reference_s
+            metrics[f"tiled_{size}_speedup"] = reference_s / tiled_s
+            # |z|^2 < 4 vs |z| < 2 may differ by rounding on the boundary only
+            metrics[f"mismatch_{size}_fraction"] = float(np.mean(tiled != reference))
+
+    print(f"Populating JuliaImage at {args.pipeline_size}x{args.pipeline_size}...", flush=True)
+    activate_fresh(schema, schema_name(args, "fractal"))
+    try:
+        JuliaImage.size = args.pipeline_size
+        JuliaImage.processes = args.processes
+        JuliaSpec.insert(
+            [{'spec_id': i, 'c_real': -0.8 + 0.1 * i, 'c_imag': 0.156} for i in range(args.specs)]
+        )
+        with timer(metrics, "populate_s"):
+            JuliaImage.populate()
+        metrics["make_pixels_per_s"] = float(np.mean(JuliaImage.pixels_per_s))
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "sizes": args.sizes,
+        "iters": args.iters,
+        "tile": args.tile,
+        "processes": args.processes,
+        "pipeline_size": args.pipeline_size,
+        "specs": args.specs,
+    }
+    result = record("julia", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Neuron ingest benchmark: the electrophysiology tutorials' per-row loop vs batched ingest.
+
+Writes synthetic ``(n_neurons, n_timepoints)`` session files and populates two
+versions of the tutorials' ``Neuron`` table: one with ``<blob>`` activity, as in
+``electrophysiology.ipynb``, and one with store-backed ``.npy`` activity, as in
+``ephys-with-npy.ipynb``. Each is populated twice:
+
+- ``loop``: ``np.load(filepath)`` and one ``insert1`` per neuron (the tutorial).
+- ``batched``: ``np.load(filepath, mmap_mode='r')`` and one ``insert`` for all
+  neurons, with concurrent uploads for the ``.npy`` table
+  (``examples/ephys_ingest.py``).
+
+Reports rows/s, MB/s and peak traced memory for each.
+
+Usage:
+    python benchmarks/bench_neuron_ingest.py
+    python benchmarks/bench_neuron_ingest.py --neurons 5000 --timepoints 30000
+"""
+
+import argparse
+import datetime
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    peak_memory,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from ephys_ingest import UPLOAD_THREADS, concurrent_uploads, neuron_rows  # noqa: E402
+
+DATA_DIR = Path(tempfile.gettempdir()) / "bench_neuron_ingest"
+STORE = "bench_ephys"
+
+schema = dj.Schema()
+
+
+def data_file(key):
+    return DATA_DIR / f"data_{key['mouse_id']}_{key['session_date']}.npy"
+
+
+@schema
+class Session(dj.Manual):
+    definition = """
+    mouse_id : int32
+    session_date : date
+    """
+
+
+class _Ingest:
+    """Shared ``make()``: the tutorial's per-row loop or the batched ingest."""
+
+    batched = False
+    upload_threads = UPLOAD_THREADS
+
+    def make(self, key):
+        if not self.batched:
+            data = np.load(data_file(key))
+            for neuron_id, activity in enumerate(data):
+                self.insert1({**key, 'neuron_id': neuron_id, 'activity': activity})
+            return
+
+        data = np.load(data_file(key), mmap_mode='r')
+        with concurrent_uploads(threads=self.upload_threads):
+            self.insert(neuron_rows(key, data))
+
+
+@schema
+class Neuron(_Ingest, dj.Imported):
+    definition = """
+    -> Session
+    neuron_id : int16
+    ---
+    activity : <blob>    # neural activity trace
+    """
+
+
+@schema
+class NeuronNpy(_Ingest, dj.Imported):
+    definition = f"""
+    -> Session
+    neuron_id : int16
+    ---
+    activity : <npy_async@{STORE}>    # neural activity trace (lazy loading)
+    """
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched Neuron ingest")
+    add_common_arguments(parser)
+    parser.add_argument("--sessions", type=int, default=2)
+    parser.add_argument("--neurons", type=int, default=1000, help="Neurons per session")
+    parser.add_argument("--timepoints", type=int, default=10_000)
+    parser.add_argument("--upload-threads", type=int, default=UPLOAD_THREADS)
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    store_path = Path(tempfile.mkdtemp(prefix="bench_ephys_store_"))
+    dj.config.stores[STORE] = {
+        'protocol': 'file',
+        'location': str(store_path),
+        'partition_pattern': '{mouse_id}/{session_date}/{neuron_id}',
+    }
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(0)
+    sessions = [
+        {'mouse_id': k, 'session_date': datetime.date(2017, 5, 15) + datetime.timedelta(days=k)}
+        for k in range(args.sessions)
+    ]
+    for key in sessions:
+        np.save(data_file(key), rng.standard_normal((args.neurons, args.timepoints)).astype(np.float32))
+    data_bytes = args.sessions * args.neurons * args.timepoints * 4
+    rows = args.sessions * args.neurons
+
+    metrics = {"data_bytes": data_bytes}
+    activate_fresh(schema, schema_name(args, "ephys_ingest"))
+    try:
+        Session.insert(sessions)
+        for table, name in ((Neuron, "blob"), (NeuronNpy, "npy")):
+            table.upload_threads = args.upload_threads
+            for mode in ("loop", "batched"):
+                print(f"{table.__name__} ({mode})...", flush=True)
+                table.batched = mode == "batched"
+                prefix = f"{name}_{mode}"
+                with peak_memory(metrics, f"{prefix}_peak_bytes"), timer(metrics, f"{prefix}_s"):
+                    table.populate()
+                assert len(table()) == rows
+                metrics[f"{prefix}_rows_per_s"] = rows / metrics[f"{prefix}_s"]
+                metrics[f"{prefix}_mb_per_s"] = data_bytes / 1e6 / metrics[f"{prefix}_s"]
+                table.delete_quick()
+            metrics[f"{name}_batched_speedup"] = metrics[f"{name}_loop_s"] / metrics[f"{name}_batched_s"]
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+        shutil.rmtree(store_path, ignore_errors=True)
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+    params = {
+        "sessions": args.sessions,
+        "neurons": args.neurons,
+        "timepoints": args.timepoints,
+        "upload_threads": args.upload_threads,
+    }
+    result = record("neuron_ingest", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
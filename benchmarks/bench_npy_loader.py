@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+NpyRef loading benchmark: sequential ``__array__`` loads vs the cached read-ahead loader.
+
+Stores synthetic neuron traces as ``<npy@>`` objects in a scratch file store or,
+with ``--store s3``, in a bucket on the compose MinIO. It then reads them back
+in three ways:
+
+- ``sequential``: ``np.asarray(ref)`` for each fetched ``NpyRef``, as in
+  ``ephys-with-npy.ipynb``.
+- ``read_ahead``: ``NpyLoader.iter_arrays`` from ``examples/npy_loader.py``,
+  first cold and then warm (served from its LRU cache).
+- ``slice``: reading a window of each array, with ``ref.load()[window]`` and
+  with ``ref.load(mmap_mode='r')[window]`` (a memory-mapped partial read).
+
+Reports objects/s, MB/s and per-object slice latency.
+
+Usage:
+    python benchmarks/bench_npy_loader.py
+    python benchmarks/bench_npy_loader.py --store s3 --objects 5000 --read-ahead 64
+"""
+
+import argparse
+import sys
+import time
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    record,
+    remove_scratch_store,
+    report,
+    schema_name,
+    scratch_store,
+    summarize,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from npy_loader import READ_AHEAD, NpyLoader  # noqa: E402
+
+STORE = "bench_npy"
+
+schema = dj.Schema()
+
+
+@schema
+class Trace(dj.Manual):
+    definition = f"""
+    trace_id : int32
+    ---
+    activity : <npy@{STORE}>    # neural activity trace (lazy loading)
+    """
+
+
+def refs():
+    """Freshly fetched NpyRefs (nothing loaded yet)."""
+    return [d['activity'] for d in Trace.to_dicts(order_by='KEY')]
+
+
+def latencies(fn, sample):
+    """Seconds taken by ``fn(ref)`` for each ref in ``sample``."""
+    samples = []
+    for ref in sample:
+        start = time.perf_counter()
+        fn(ref)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def measure(metrics, prefix, n, nbytes, fn):
+    with timer(metrics, f"{prefix}_s"):
+        fn()
+    metrics[f"{prefix}_objects_per_s"] = n / metrics[f"{prefix}_s"]
+    metrics[f"{prefix}_mb_per_s"] = nbytes / 1e6 / metrics[f"{prefix}_s"]
+
+
+def run(metrics, args):
+    n = args.objects
+    nbytes = n * args.timepoints * 4
+    loader = NpyLoader(max_bytes=2 * nbytes, read_ahead=args.read_ahead)
+
+    print("sequential...", flush=True)
+    measure(metrics, "sequential", n, nbytes, lambda: [np.asarray(ref) for ref in refs()])
+
+    print("read-ahead...", flush=True)
+    for phase in ("cold", "warm"):
+        measure(
+            metrics, f"read_ahead_{phase}", n, nbytes,
+            lambda: list(loader.iter_arrays(refs())),
+        )
+    metrics["read_ahead_speedup"] = metrics["sequential_s"] / metrics["read_ahead_cold_s"]
+
+    print("slices...", flush=True)
+    window = np.s_[args.timepoints // 2:args.timepoints // 2 + args.window]
+    sample = refs()[:args.slice_samples]
+    metrics.update(summarize(latencies(lambda ref: ref.load()[window], sample), "slice_full_load"))
+    sample = refs()[:args.slice_samples]  # load() caches the array; start unloaded
+    metrics.update(
+        summarize(latencies(lambda ref: np.array(ref.load(mmap_mode='r')[window]), sample), "slice_mmap")
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached read-ahead NpyRef loading")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--store",
+        choices=["file", "s3"],
+        default="file",
+        help="Scratch store protocol: local directory or the compose MinIO (default: file)",
+    )
+    parser.add_argument("--objects", type=int, default=2000)
+    parser.add_argument("--timepoints", type=int, default=100_000)
+    parser.add_argument("--read-ahead", type=int, default=READ_AHEAD)
+    parser.add_argument("--window", type=int, default=1000, help="Samples per slice read")
+    parser.add_argument("--slice-samples", type=int, default=200)
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    rng = np.random.default_rng(0)
+    spec = scratch_store(args.store)
+    dj.config.stores[STORE] = spec
+    activate_fresh(schema, schema_name(args, "npy_loader"))
+    try:
+        print(f"Inserting {args.objects} traces into a {args.store} store...", flush=True)
+        for ids in chunked(range(args.objects), 500):
+            Trace.insert(
+                {'trace_id': i, 'activity': rng.standard_normal(args.timepoints).astype(np.float32)}
+                for i in ids
+            )
+        run(metrics, args)
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+            remove_scratch_store(spec)
+
+    params = {
+        "store": args.store,
+        "objects": args.objects,
+        "timepoints": args.timepoints,
+        "read_ahead": args.read_ahead,
+        "window": args.window,
+    }
+    result = record("npy_loader", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
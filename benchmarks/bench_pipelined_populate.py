@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Three-part make() benchmark: sequential populate() vs pipelined_populate().
+
+Fills the three-part-make tutorial's ``Recording`` with long synthetic
+waveforms, then populates ``RecordingStats`` with ``populate()`` and with
+``pipelined_populate()`` from ``examples/pipelined_populate.py``. The benchmark
+version of ``make_compute`` also finds each window's dominant frequency, so the
+compute phase has measurable cost. It reports the mean cost of each phase,
+keys/s for both modes and checks that they insert the same values.
+
+With sequential phases, the time per key is the sum of the phase costs. With
+pipelining, it should approach the larger of the database time and the compute
+time per process.
+
+Usage:
+    python benchmarks/bench_pipelined_populate.py
+    python benchmarks/bench_pipelined_populate.py --recordings 500 --samples 2000000 --processes 8
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from pipelined_populate import pipelined_populate  # noqa: E402
+
+N_WINDOWS = 16
+
+schema = dj.Schema()
+
+
+@schema
+class Recording(dj.Manual):
+    definition = """
+    recording_id     : int32
+    ---
+    sampling_rate_hz : float64
+    signal           : <blob>      # 1-D waveform, float64 samples
+    """
+
+
+@schema
+class RecordingStats(dj.Computed):
+    definition = """
+    -> Recording
+    ---
+    n_samples : int32
+    mean_amp  : float64
+    rms_amp   : float64
+    peak_amp  : float64
+    """
+
+    class Window(dj.Part):
+        definition = """
+        -> master
+        window_id  : int32
+        ---
+        window_rms : float64
+        window_peak_hz : float64   # dominant frequency
+        """
+
+    def make_fetch(self, key, **kwargs):
+        return (Recording & key).fetch1("sampling_rate_hz", "signal")
+
+    def make_compute(self, key, rate, signal):
+        master_row = {
+            **key,
+            "n_samples": int(signal.size),
+            "mean_amp": float(signal.mean()),
+            "rms_amp": float(np.sqrt(np.mean(signal ** 2))),
+            "peak_amp": float(np.max(np.abs(signal))),
+        }
+        window_rows = []
+        for i, w in enumerate(np.array_split(signal, N_WINDOWS)):
+            power = np.abs(np.fft.rfft(w - w.mean())) ** 2
+            window_rows.append({
+                **key,
+                "window_id": i,
+                "window_rms": float(np.sqrt(np.mean(w ** 2))),
+                "window_peak_hz": float(np.fft.rfftfreq(w.size, 1 / rate)[np.argmax(power)]),
+            })
+        return (master_row, window_rows)
+
+    def make_insert(self, key, master_row, window_rows):
+        self.insert1(master_row)
+        self.Window.insert(window_rows)
+
+
+def results():
+    return (
+        RecordingStats.to_pandas(order_by='KEY').to_numpy(dtype=float),
+        RecordingStats.Window.to_pandas(order_by='KEY').to_numpy(dtype=float),
+    )
+
+
+def clear():
+    RecordingStats.Window.delete_quick()
+    RecordingStats.delete_quick()
+
+
+def phase_costs(metrics, sample):
+    """Mean cost of make_fetch and make_compute, measured directly."""
+    table = RecordingStats()
+    fetch_s, compute_s = [], []
+    for key in sample:
+        start = time.perf_counter()
+        fetched = table.make_fetch(key)
+        fetch_s.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        table.make_compute(key, *fetched)
+        compute_s.append(time.perf_counter() - start)
+    metrics["fetch_mean_s"] = float(np.mean(fetch_s))
+    metrics["compute_mean_s"] = float(np.mean(compute_s))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipelined three-part populate")
+    add_common_arguments(parser)
+    parser.add_argument("--recordings", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=1_000_000, help="Samples per recording")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--depth", type=int, default=None, help="Keys in flight (default: 2 * processes + 2)")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    rng = np.random.default_rng(0)
+    activate_fresh(schema, schema_name(args, "pipelined_populate"))
+    try:
+        print(f"Inserting {args.recordings} recordings...", flush=True)
+        for ids in chunked(range(args.recordings), 10):
+            Recording.insert(
+                {
+                    "recording_id": i,
+                    "sampling_rate_hz": 30000.0,
+                    "signal": rng.standard_normal(args.samples) * (i + 1),
+                }
+                for i in ids
+            )
+        phase_costs(metrics, Recording.keys(order_by='KEY')[:5])
+
+        print("populate()...", flush=True)
+        with timer(metrics, "populate_s"):
+            RecordingStats.populate()
+        metrics["populate_keys_per_s"] = args.recordings / metrics["populate_s"]
+        expected = results()
+        clear()
+
+        print(f"pipelined_populate(processes={args.processes})...", flush=True)
+        with timer(metrics, "pipelined_s"):
+            pipelined_populate(RecordingStats, processes=args.processes, depth=args.depth)
+        metrics["pipelined_keys_per_s"] = args.recordings / metrics["pipelined_s"]
+        metrics["pipelined_speedup"] = metrics["populate_s"] / metrics["pipelined_s"]
+        metrics["max_abs_diff"] = max(
+            float(np.abs(a - b).max()) for a, b in zip(expected, results())
+        )
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "recordings": args.recordings,
+        "samples": args.samples,
+        "processes": args.processes,
+        "depth": args.depth,
+    }
+    result = record("pipelined_populate", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Populate-scoped read cache benchmark on the fractal and Allen CCF tutorial pipelines.
+
+Runs each pipeline's downstream ``populate()`` twice — without and with
+``examples/populate_cache.py`` — and reports run time and cache hit/miss counts:
+
+- Fractal: ``Denoised.make`` fetches the same ``JuliaImage`` blob for each of
+  the three ``DenoiseMethod`` rows.
+- Allen CCF: ``RegionParent.make`` loads the ontology CSV for every region.
+  Here ``make()`` inserts only its own region's row, as the one-entity-per-call
+  rule requires, so every key reads the file.
+
+Usage:
+    python benchmarks/bench_populate_cache.py
+    python benchmarks/bench_populate_cache.py --image-size 2048 --specs 8
+"""
+
+import argparse
+import sys
+
+import datajoint as dj
+import numpy as np
+import pandas as pd
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from julia_tiled import julia_tiled  # noqa: E402
+from populate_cache import cached_fetch1, cached_load, populate_cache  # noqa: E402
+
+ONTOLOGY_FILE = ROOT / "src" / "tutorials" / "domain" / "allen-ccf" / "data" / "allen_structure_graph.csv"
+
+fractal = dj.Schema()
+allen = dj.Schema()
+
+
+# --- Fractal tutorial tables ---
+
+@fractal
+class JuliaSpec(dj.Manual):
+    definition = """
+    spec_id : int16
+    ---
+    c_real : float64
+    c_imag : float64
+    noise_level = 50 : float64
+    """
+
+
+@fractal
+class JuliaImage(dj.Computed):
+    definition = """
+    -> JuliaSpec
+    ---
+    image : <blob>
+    """
+
+    size = 1024
+
+    def make(self, key):
+        spec = (JuliaSpec & key).fetch1()
+        img = julia_tiled(spec['c_real'] + 1j * spec['c_imag'], size=self.size)
+        img += np.random.randn(*img.shape) * spec['noise_level']
+        self.insert1({**key, 'image': img.astype(np.float32)})
+
+
+@fractal
+class DenoiseMethod(dj.Lookup):
+    definition = """
+    method_id : int16
+    ---
+    method_name : varchar(20)
+    params : <blob>
+    """
+    contents = [
+        [0, 'gaussian', {'sigma': 1.8}],
+        [1, 'median', {'radius': 3}],
+        [2, 'tv', {'weight': 20.0}],
+    ]
+
+
+@fractal
+class Denoised(dj.Computed):
+    definition = """
+    -> JuliaImage
+    -> DenoiseMethod
+    ---
+    denoised : <blob>
+    """
+
+    def make(self, key):
+        from skimage import filters, restoration
+        from skimage.morphology import disk
+
+        img = cached_fetch1(JuliaImage & key, 'image')
+        method, params = (DenoiseMethod & key).fetch1('method_name', 'params')
+
+        if method == 'gaussian':
+            result = filters.gaussian(img, **params)
+        elif method == 'median':
+            result = filters.median(img, disk(params['radius']))
+        elif method == 'tv':
+            result = restoration.denoise_tv_chambolle(img, **params)
+        else:
+            raise ValueError(f"Unknown method: {method}")
+
+        self.insert1({**key, 'denoised': result.astype(np.float32)})
+
+
+# --- Allen CCF tutorial tables ---
+
+@allen
+class CCF(dj.Manual):
+    definition = """
+    ccf_id : int32
+    ---
+    ccf_version : varchar(64)
+    ccf_resolution : float32
+    ccf_description : varchar(255)
+    """
+
+
+@allen
+class BrainRegion(dj.Imported):
+    definition = """
+    -> CCF
+    region_id : int32
+    ---
+    acronym : varchar(32)
+    region_name : varchar(255)
+    color_hex : varchar(6)
+    structure_order : int32
+    """
+
+    def make(self, key):
+        ontology = cached_load(ONTOLOGY_FILE, pd.read_csv)
+        self.insert(
+            {
+                **key,
+                'region_id': row['id'],
+                'acronym': row['acronym'],
+                'region_name': row['safe_name'],
+                'color_hex': row['color_hex_triplet'],
+                'structure_order': row['graph_order'],
+            }
+            for _, row in ontology.iterrows()
+        )
+
+
+@allen
+class RegionParent(dj.Imported):
+    definition = """
+    -> BrainRegion
+    ---
+    -> BrainRegion.proj(parent_id='region_id')
+    depth : int16
+    """
+
+    def make(self, key):
+        ontology = cached_load(ONTOLOGY_FILE, pd.read_csv)
+        row = ontology.loc[ontology['id'] == key['region_id']].iloc[0]
+        parent_id = row['parent_structure_id']
+        if pd.isna(parent_id):
+            parent_id = row['id']  # root points to itself
+        self.insert1({**key, 'parent_id': int(parent_id), 'depth': row['depth']})
+
+
+def compare(metrics, name, table, max_bytes):
+    """Populate ``table`` without, then with, the cache and record both runs."""
+    with timer(metrics, f"{name}_uncached_s"):
+        table.populate()
+    rows = len(table())
+    table.delete_quick()
+
+    with populate_cache(max_bytes) as cache:
+        with timer(metrics, f"{name}_cached_s"):
+            table.populate()
+    assert len(table()) == rows
+
+    metrics[f"{name}_rows"] = rows
+    metrics[f"{name}_speedup"] = metrics[f"{name}_uncached_s"] / metrics[f"{name}_cached_s"]
+    for stat, value in cache.stats.items():
+        metrics[f"{name}_cache_{stat}"] = value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the populate-scoped read cache")
+    add_common_arguments(parser)
+    parser.add_argument("--image-size", type=int, default=1024)
+    parser.add_argument("--specs", type=int, default=4)
+    parser.add_argument(
+        "--max-bytes", type=int, default=1 << 30, help="Cache size bound (default: 1 GiB)"
+    )
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    try:
+        activate_fresh(allen, schema_name(args, "allen_cache"))
+        CCF.insert1({'ccf_id': 1, 'ccf_version': 'CCFv3', 'ccf_resolution': 25.0,
+                     'ccf_description': 'Allen Mouse CCF v3 (25µm resolution)'})
+        BrainRegion.populate()
+        print("RegionParent.populate()...", flush=True)
+        compare(metrics, "region_parent", RegionParent, args.max_bytes)
+
+        try:
+            import skimage  # noqa: F401
+        except ImportError as e:
+            print(f"  skipping fractal pipeline (scikit-image not installed): {e}", file=sys.stderr)
+        else:
+            activate_fresh(fractal, schema_name(args, "fractal_cache"))
+            JuliaImage.size = args.image_size
+            JuliaSpec.insert(
+                [{'spec_id': i, 'c_real': -0.8 + 0.1 * i, 'c_imag': 0.156}
+                 for i in range(args.specs)]
+            )
+            JuliaImage.populate()
+            print("Denoised.populate()...", flush=True)
+            compare(metrics, "denoised", Denoised, args.max_bytes)
+    finally:
+        if not args.keep:
+            for schema in (fractal, allen):
+                if schema.is_activated():
+                    schema.drop(prompt=False)
+
+    params = {"image_size": args.image_size, "specs": args.specs, "max_bytes": args.max_bytes}
+    result = record("populate_cache", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
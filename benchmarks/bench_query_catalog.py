@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Query algebra benchmark on Faker-scaled university and hotel databases.
+
+Declares the schemas of ``university.ipynb`` and ``hotel-reservations.ipynb``,
+then fills them at scale:
+
+- University: ``--students`` students (about 12 enrollments each) across
+  ``--years`` years of terms and an extended course catalog.
+- Hotel: ``--rooms`` rooms over ``--days`` nights, with about 70% of
+  room-nights reserved.
+
+Names, cities and card numbers come from pools generated with Faker, which
+keeps data generation fast at millions of rows.
+
+It then runs a fixed catalog of query expressions taken from the notebooks and
+``04-queries.ipynb``: restrictions, semijoins and antijoins, projections,
+``dj.U``, joins, left joins, aggregations and ``dj.Top``. For each query it
+records the fetch latency (``to_arrays()``), the row count and the backend's
+EXPLAIN plan for the SQL DataJoint generates. Plans are stored as compact
+signatures. When a run is compared with a previous DataJoint version, any
+query whose plan shape differs is listed as changed.
+
+Only backend-portable SQL functions are used, so every query runs on both
+MySQL and PostgreSQL.
+
+Usage:
+    python benchmarks/bench_query_catalog.py --backend both
+    python benchmarks/bench_query_catalog.py --students 500000 --rooms 1000 --queries student_gpa top_gpa
+"""
+
+import argparse
+import datetime
+import random
+import sys
+
+import datajoint as dj
+import faker
+
+from harness import (
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    query_plan,
+    record,
+    repeat,
+    report,
+    schema_name,
+    summarize,
+    timer,
+)
+
+FIRST_TERM_YEAR = 2000
+HOTEL_START = datetime.date(2020, 1, 1)
+CHUNK = 50_000
+
+university = dj.Schema()
+hotel = dj.Schema()
+
+
+# University (university.ipynb)
+
+@university
+class Student(dj.Manual):
+    definition = """
+    student_id : int64           # university-wide ID
+    ---
+    first_name : varchar(40)
+    last_name : varchar(40)
+    sex : enum('F', 'M', 'U')
+    date_of_birth : date
+    home_city : varchar(60)
+    home_state : char(2)          # US state code
+    """
+
+
+@university
+class Department(dj.Manual):
+    definition = """
+    dept : varchar(6)   # e.g. BIOL, CS, MATH
+    ---
+    dept_name : varchar(200)
+    """
+
+
+@university
+class StudentMajor(dj.Manual):
+    definition = """
+    -> Student
+    ---
+    -> Department
+    declare_date : date
+    """
+
+
+@university
+class Course(dj.Manual):
+    definition = """
+    -> Department
+    course : int16               # course number, e.g. 1010
+    ---
+    course_name : varchar(200)
+    credits : decimal(3,1)
+    """
+
+
+@university
+class Term(dj.Manual):
+    definition = """
+    term_year : int16
+    term : enum('Spring', 'Summer', 'Fall')
+    """
+
+
+@university
+class Section(dj.Manual):
+    definition = """
+    -> Course
+    -> Term
+    section : char(1)
+    ---
+    auditorium : varchar(12)
+    """
+
+
+@university
+class Enroll(dj.Manual):
+    definition = """
+    -> Student
+    -> Section
+    """
+
+
+@university
+class LetterGrade(dj.Lookup):
+    definition = """
+    grade : char(2)
+    ---
+    points : decimal(3,2)
+    """
+    contents = [
+        ['A',  4.00], ['A-', 3.67],
+        ['B+', 3.33], ['B',  3.00], ['B-', 2.67],
+        ['C+', 2.33], ['C',  2.00], ['C-', 1.67],
+        ['D+', 1.33], ['D',  1.00],
+        ['F',  0.00]
+    ]
+
+
+@university
+class Grade(dj.Manual):
+    definition = """
+    -> Enroll
+    ---
+    -> LetterGrade
+    """
+
+
+# Hotel (hotel-reservations.ipynb)
+
+@hotel
+class Room(dj.Lookup):
+    definition = """
+    # Hotel rooms
+    room : int16                    # room number
+    ---
+    room_type : enum('Deluxe', 'Suite')
+    """
+
+
+@hotel
+class RoomAvailable(dj.Manual):
+    definition = """
+    # Room availability and pricing by date
+    -> Room
+    date : date
+    ---
+    price : decimal(6, 2)           # price per night
+    """
+
+
+@hotel
+class Guest(dj.Manual):
+    definition = """
+    # Hotel guests
+    guest_id : int64               # auto-assigned guest ID
+    ---
+    guest_name : varchar(60)
+    index(guest_name)
+    """
+
+
+@hotel
+class Reservation(dj.Manual):
+    definition = """
+    # Room reservations (one per room per night)
+    -> RoomAvailable
+    ---
+    -> Guest
+    credit_card : varchar(80)       # encrypted card info
+    """
+
+
+@hotel
+class CheckIn(dj.Manual):
+    definition = """
+    # Check-in records (requires reservation)
+    -> Reservation
+    """
+
+
+@hotel
+class CheckOut(dj.Manual):
+    definition = """
+    # Check-out records (requires check-in)
+    -> CheckIn
+    """
+
+
+DEPARTMENTS = {
+    'CS': 'Computer Science', 'BIOL': 'Life Sciences', 'PHYS': 'Physics', 'MATH': 'Mathematics',
+    'CHEM': 'Chemistry', 'ECON': 'Economics', 'HIST': 'History', 'PSYC': 'Psychology',
+    'ENGL': 'English', 'PHIL': 'Philosophy', 'ART': 'Art', 'MUS': 'Music',
+}
+GRADE_WEIGHTS = [5, 8, 10, 15, 12, 10, 15, 10, 5, 5, 5]
+
+
+def fill_university(args, fake):
+    first = {
+        'F': [fake.first_name_female() for _ in range(1000)],
+        'M': [fake.first_name_male() for _ in range(1000)],
+    }
+    last = [fake.last_name() for _ in range(2000)]
+    cities = [fake.city() for _ in range(2000)]
+    states = [fake.state_abbr() for _ in range(200)]
+
+    def students():
+        for student_id in range(1000, 1000 + args.students):
+            sex = random.choice('FM')
+            yield {
+                'student_id': student_id,
+                'first_name': random.choice(first[sex]),
+                'last_name': random.choice(last),
+                'sex': sex,
+                'date_of_birth': datetime.date(1991, 1, 1) + datetime.timedelta(days=random.randrange(6575)),
+                'home_city': random.choice(cities),
+                'home_state': random.choice(states),
+            }
+
+    for rows in chunked(students(), CHUNK):
+        Student.insert(rows)
+    Department.insert({'dept': dept, 'dept_name': name} for dept, name in DEPARTMENTS.items())
+    StudentMajor.insert(
+        {
+            'student_id': student_id,
+            'dept': random.choice(list(DEPARTMENTS)),
+            'declare_date': datetime.date(2022, 1, 1) + datetime.timedelta(days=random.randrange(1461)),
+        }
+        for student_id in range(1000, 1000 + args.students)
+        if random.random() < 0.75
+    )
+    Course.insert(
+        {
+            'dept': dept,
+            'course': course,
+            'course_name': fake.catch_phrase()[:200],
+            'credits': random.choice([3, 4]),
+        }
+        for dept in DEPARTMENTS
+        for course in random.sample(range(1000, 6000), args.courses_per_dept)
+    )
+    terms = [
+        {'term_year': year, 'term': term}
+        for year in range(FIRST_TERM_YEAR, FIRST_TERM_YEAR + args.years)
+        for term in ('Spring', 'Summer', 'Fall')
+    ]
+    Term.insert(terms)
+    sections = [
+        {**course, **term, 'section': section,
+         'auditorium': f"{random.choice('ABCDEF')}{random.randint(100, 400)}"}
+        for course in Course.keys()
+        for term in terms
+        if random.random() < 0.7
+        for section in 'abc'[:random.randint(1, 3)]
+    ]
+    for rows in chunked(sections, CHUNK):
+        Section.insert(rows)
+
+    by_term = {}
+    for s in sections:
+        by_term.setdefault((s['term_year'], s['term']), []).append(
+            {k: s[k] for k in ('dept', 'course', 'term_year', 'term', 'section')}
+        )
+    term_keys = list(by_term)
+    grades = LetterGrade.to_arrays('grade').tolist()
+
+    def enrollments():
+        for student_id in range(1000, 1000 + args.students):
+            for term in random.sample(term_keys, k=random.randint(2, 6)):
+                available = by_term[term]
+                for section in random.sample(available, k=min(random.randint(2, 4), len(available))):
+                    yield {'student_id': student_id, **section}
+
+    for rows in chunked(enrollments(), CHUNK):
+        Enroll.insert(rows)
+        Grade.insert(
+            {**row, 'grade': random.choices(grades, weights=GRADE_WEIGHTS)[0]}
+            for row in rows
+            if random.random() < 0.9
+        )
+
+
+def fill_hotel(args, fake):
+    Room.insert({'room': i, 'room_type': 'Suite' if i % 5 == 0 else 'Deluxe'} for i in range(1, args.rooms + 1))
+    names = [f"{fake.first_name()} {fake.last_name()}" for _ in range(5000)]
+    for ids in chunked(range(1, args.guests + 1), CHUNK):
+        Guest.insert({'guest_id': i, 'guest_name': random.choice(names)} for i in ids)
+    cards = [fake.credit_card_number() for _ in range(1000)]
+    checked_until = HOTEL_START + datetime.timedelta(days=int(args.days * 0.8))
+
+    def nights():
+        for day in range(args.days):
+            date = HOTEL_START + datetime.timedelta(days=day)
+            base_price = 200 if date.weekday() >= 5 else 150
+            for room in range(1, args.rooms + 1):
+                yield {'room': room, 'date': date, 'price': base_price + random.randint(-30, 50)}
+
+    for rows in chunked(nights(), CHUNK):
+        RoomAvailable.insert(rows)
+        reserved = [
+            {'room': r['room'], 'date': r['date'],
+             'guest_id': random.randint(1, args.guests), 'credit_card': random.choice(cards)}
+            for r in rows
+            if random.random() < 0.7
+        ]
+        Reservation.insert(reserved)
+        checked_in = [
+            {'room': r['room'], 'date': r['date']}
+            for r in reserved
+            if r['date'] <= checked_until and random.random() < 0.95
+        ]
+        CheckIn.insert(checked_in)
+        CheckOut.insert(
+            r for r in checked_in if r['date'] < checked_until and random.random() < 0.95
+        )
+
+
+def student_gpa():
+    return Student.aggr(
+        Grade * LetterGrade * Course,
+        'first_name', 'last_name',
+        total_credits='SUM(credits)',
+        gpa='SUM(points * credits) / SUM(credits)'
+    )
+
+
+def popular_courses():
+    course_enrollment = Course.aggr(Enroll, ..., n='COUNT(*)')
+    max_per_dept = Department.aggr(course_enrollment, max_n='MAX(n)')
+    return course_enrollment * max_per_dept & 'n = max_n'
+
+
+def catalog(args):
+    """Named query expressions, built lazily after the schemas are filled."""
+    day = HOTEL_START + datetime.timedelta(days=int(args.days * 0.8))
+    return {
+        # university: restriction
+        "restrict_dict": lambda: Student & {'home_state': 'CA'},
+        "restrict_negated": lambda: (Student & {'sex': 'F'}) - {'home_state': 'CA'},
+        "restrict_in": lambda: Student & "home_state IN ('CA', 'TX', 'NY')",
+        "restrict_or_list": lambda: Student & [{'home_state': 'CA'}, {'home_state': 'TX'}],
+        "semijoin_major": lambda: Student & (StudentMajor & {'dept': 'CS'}),
+        "antijoin_math": lambda: Student - (Enroll & {'dept': 'MATH'}),
+        "ungraded": lambda: Student & (Enroll - Grade),
+        "all_a": lambda: (Student & Grade) - (Grade - {'grade': 'A'}),
+        # university: projection and universal sets
+        "proj_computed": lambda: Student.proj(full_name="CONCAT(first_name, ' ', last_name)"),
+        "proj_rename": lambda: Student.proj('first_name', family_name='last_name'),
+        "unique_states": lambda: dj.U('home_state') & (Student & Enroll),
+        # university: joins
+        "join_major": lambda: Student.proj('first_name', 'last_name') * StudentMajor,
+        "left_join_major": lambda: Student.proj('first_name', 'last_name').join(StudentMajor, left=True),
+        "join_grades": lambda: (
+            Student.proj('first_name', 'last_name') * Grade * Course.proj('course_name', 'credits')
+        ),
+        # university: aggregation
+        "aggr_department": lambda: Department.aggr(StudentMajor, n_students='COUNT(*)'),
+        "aggr_enrollment": lambda: Course.aggr(Enroll, ..., n_enrolled='COUNT(*)'),
+        "aggr_course_gpa": lambda: Course.aggr(
+            Grade * LetterGrade, 'course_name', avg_gpa='AVG(points)', n_grades='COUNT(*)'
+        ),
+        "student_gpa": student_gpa,
+        "top_gpa": lambda: student_gpa() & 'total_credits >= 12' & dj.Top(5, order_by='gpa DESC'),
+        "all_departments": lambda: Student - (
+            Student.proj() * Department - Enroll.proj('student_id', 'dept')
+        ),
+        "popular_courses": popular_courses,
+        "grade_distribution": lambda: LetterGrade.aggr(Grade, ..., count='COUNT(*)') & 'count > 0',
+        # hotel
+        "available_rooms": lambda: (RoomAvailable & {'date': day}) - Reservation,
+        "currently_in": lambda: ((CheckIn - CheckOut) * Reservation * Guest).proj('guest_name'),
+        "not_checked_in": lambda: ((Reservation - CheckIn) * Guest).proj('guest_name'),
+        "revenue_by_type": lambda: dj.U('room_type').aggr(
+            Room * RoomAvailable * Reservation, total_revenue='SUM(price)', reservations='COUNT(*)'
+        ),
+        "guest_by_name": lambda: Guest & {'guest_name': (Guest & 'guest_id = 1').fetch1('guest_name')},
+        "frequent_guests": lambda: Guest.aggr(Reservation, nights='COUNT(*)') & 'nights > 10',
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark query algebra on scaled example schemas")
+    add_common_arguments(parser)
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--courses-per-dept", type=int, default=20)
+    parser.add_argument("--years", type=int, default=25, help="Years of terms")
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--guests", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per query, after one warm-up")
+    parser.add_argument("--queries", nargs="+", help="Run only these catalog entries")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    queries = catalog(args)
+    if args.queries:
+        unknown = set(args.queries) - set(queries)
+        if unknown:
+            parser.error(f"unknown queries: {', '.join(sorted(unknown))}")
+        queries = {name: queries[name] for name in args.queries}
+
+    metrics = {}
+    random.seed(42)
+    faker.Faker.seed(42)
+    fake = faker.Faker()
+    activate_fresh(university, schema_name(args, "university"))
+    activate_fresh(hotel, schema_name(args, "hotel"))
+    try:
+        print(f"Generating university data ({args.students} students)...", flush=True)
+        with timer(metrics, "university_load_s"):
+            fill_university(args, fake)
+        print(f"Generating hotel data ({args.rooms} rooms x {args.days} nights)...", flush=True)
+        with timer(metrics, "hotel_load_s"):
+            fill_hotel(args, fake)
+        metrics["enrollments"] = len(Enroll())
+        metrics["reservations"] = len(Reservation())
+
+        for name, build in queries.items():
+            query = build()
+            metrics[f"{name}_rows"] = len(query.to_arrays())  # warm-up
+            metrics.update(summarize(repeat(query.to_arrays, args.repeats), name))
+            metrics[f"{name}_plan"] = query_plan(query.make_sql())
+            print(f"  {name:20} {metrics[f'{name}_p50_s'] * 1e3:10.1f} ms", flush=True)
+    finally:
+        if not args.keep:
+            hotel.drop(prompt=False)
+            university.drop(prompt=False)
+
+    params = {
+        "students": args.students,
+        "courses_per_dept": args.courses_per_dept,
+        "years": args.years,
+        "rooms": args.rooms,
+        "days": args.days,
+        "guests": args.guests,
+        "queries": sorted(queries),
+    }
+    result = record("query_catalog", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Subtree query benchmark: recursive ``RegionParent`` walks vs a closure table.
+
+Loads the Allen ontology into the CCF tutorial's ``BrainRegion`` and
+``RegionParent`` and adds synthetic ``RecordingSite`` rows spread over all
+regions. It then populates ``RegionAncestor`` from ``examples/region_closure.py``
+and finds the recording sites under each of a set of regions in three ways:
+
+- ``self_join``: expand the subtree one level at a time with ``RegionParent``
+  restrictions, as the tutorial does for direct children, then restrict
+  ``RecordingSite`` by the collected IDs.
+- ``client_walk``: fetch the parent map once and walk it in Python.
+- ``closure``: ``RecordingSite & subtree(RegionAncestor, ...)``, a single join.
+
+It also times the full closure populate and the incremental refresh after
+``--new-regions`` regions are added under random parents. ``closure_row_errors``
+and ``refresh_row_errors`` compare the closure size with the depths in
+``RegionParent``. ``refresh_extra_keys`` counts regions other than the new ones
+that the refresh computed.
+
+Usage:
+    python benchmarks/bench_region_closure.py
+    python benchmarks/bench_region_closure.py --sites 1000000 --regions root Isocortex VISp
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+
+import datajoint as dj
+import numpy as np
+import pandas as pd
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    record,
+    repeat,
+    report,
+    schema_name,
+    summarize,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from region_closure import ancestor_rows, subtree  # noqa: E402
+
+ONTOLOGY_FILE = ROOT / "src" / "tutorials" / "domain" / "allen-ccf" / "data" / "allen_structure_graph.csv"
+CCF_ID = 1
+
+schema = dj.Schema()
+ontology = pd.read_csv(ONTOLOGY_FILE).set_index('id', drop=False)
+
+
+@schema
+class CCF(dj.Manual):
+    definition = """
+    # Common Coordinate Framework atlas
+    ccf_id : int32
+    ---
+    ccf_version : varchar(64)       # e.g., 'CCFv3'
+    ccf_resolution : float32        # voxel resolution in microns
+    ccf_description : varchar(255)
+    """
+
+
+@schema
+class BrainRegion(dj.Imported):
+    definition = """
+    # Brain region from Allen ontology
+    -> CCF
+    region_id : int32               # Allen structure ID
+    ---
+    acronym : varchar(32)           # short name (e.g., 'VISp')
+    region_name : varchar(255)      # full name
+    color_hex : varchar(6)          # hex color code for visualization
+    structure_order : int32         # order in hierarchy
+    """
+
+    def make(self, key):
+        self.insert(
+            {
+                **key,
+                'region_id': row['id'],
+                'acronym': row['acronym'],
+                'region_name': row['safe_name'],
+                'color_hex': row['color_hex_triplet'],
+                'structure_order': row['graph_order'],
+            }
+            for _, row in ontology.iterrows()
+        )
+
+
+@schema
+class RegionParent(dj.Imported):
+    definition = """
+    # Hierarchical parent-child relationships
+    -> BrainRegion
+    ---
+    -> BrainRegion.proj(parent_id='region_id')   # parent region
+    depth : int16                                 # depth in hierarchy (root=0)
+    """
+
+    def make(self, key):
+        row = ontology.loc[key['region_id']]
+        parent_id = row['parent_structure_id']
+        self.insert1({
+            **key,
+            'parent_id': key['region_id'] if pd.isna(parent_id) else int(parent_id),  # root points to itself
+            'depth': row['depth'],
+        })
+
+
+@schema
+class RecordingSite(dj.Manual):
+    definition = """
+    # Recording electrode location
+    recording_id : int32
+    ---
+    ap : float32                    # anterior-posterior (µm from bregma)
+    dv : float32                    # dorsal-ventral (µm from brain surface)
+    ml : float32                    # medial-lateral (µm from midline)
+    -> BrainRegion                  # assigned brain region (includes ccf_id)
+    """
+
+
+@schema
+class RegionAncestor(dj.Computed):
+    definition = """
+    # Closure of RegionParent: every ancestor of each region, itself included
+    -> RegionParent
+    -> BrainRegion.proj(ancestor_id='region_id')
+    ---
+    distance : int16                # parent steps from ancestor to region
+    index(ccf_id, ancestor_id)      # for subtree restrictions
+    """
+
+    @property
+    def key_source(self):
+        return RegionParent.proj()  # one make() per region, not per (region, ancestor)
+
+    def make(self, key):
+        self.insert(ancestor_rows(RegionAncestor, RegionParent, key))
+
+
+def region_keys(region_ids):
+    return [{'ccf_id': CCF_ID, 'region_id': int(region_id)} for region_id in region_ids]
+
+
+def sites_self_join(region_id):
+    found = [region_id]
+    frontier = [region_id]
+    while frontier:
+        children = (
+            RegionParent
+            & {'ccf_id': CCF_ID}
+            & [{'parent_id': int(parent_id)} for parent_id in frontier]
+            & 'region_id != parent_id'
+        ).to_arrays('region_id')
+        frontier = children.tolist()
+        found += frontier
+    return (RecordingSite & region_keys(found)).to_arrays('recording_id')
+
+
+def sites_client_walk(region_id):
+    region_ids, parent_ids = (RegionParent & {'ccf_id': CCF_ID}).to_arrays('region_id', 'parent_id')
+    children = defaultdict(list)
+    for child, parent in zip(region_ids.tolist(), parent_ids.tolist()):
+        if child != parent:
+            children[parent].append(child)
+    found = []
+    stack = [region_id]
+    while stack:
+        node = stack.pop()
+        found.append(node)
+        stack.extend(children[node])
+    return (RecordingSite & region_keys(found)).to_arrays('recording_id')
+
+
+def sites_closure(region_id):
+    return (RecordingSite & subtree(RegionAncestor, CCF_ID, region_id)).to_arrays('recording_id')
+
+
+def expected_rows():
+    """Closure size implied by ``RegionParent``: a region at depth d has d + 1 ancestors, itself included."""
+    depths = (RegionParent & {'ccf_id': CCF_ID}).to_arrays('depth')
+    return int(depths.sum()) + len(depths)
+
+
+def add_regions(n, rng):
+    """Insert ``n`` synthetic regions under random existing regions."""
+    region_ids, depths = (RegionParent & {'ccf_id': CCF_ID}).to_arrays('region_id', 'depth')
+    region_ids, depths = region_ids.tolist(), depths.tolist()
+    regions, parents = [], []
+    for k in range(n):
+        i = int(rng.integers(len(region_ids)))
+        region_id = 10**8 + k
+        regions.append({
+            'ccf_id': CCF_ID, 'region_id': region_id, 'acronym': f'SYN{k}',
+            'region_name': f'Synthetic region {k}', 'color_hex': '808080', 'structure_order': 0,
+        })
+        parents.append({
+            'ccf_id': CCF_ID, 'region_id': region_id, 'parent_id': region_ids[i], 'depth': depths[i] + 1,
+        })
+        region_ids.append(region_id)
+        depths.append(depths[i] + 1)
+    BrainRegion.insert(regions, allow_direct_insert=True)
+    RegionParent.insert(parents, allow_direct_insert=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark closure-table subtree queries")
+    add_common_arguments(parser)
+    parser.add_argument("--sites", type=int, default=100_000, help="Synthetic recording sites")
+    parser.add_argument(
+        "--regions", nargs="+", default=["root", "Isocortex", "VISp", "CA1", "TH"],
+        help="Acronyms of the subtrees to query",
+    )
+    parser.add_argument("--repeats", type=int, default=5, help="Timed queries per region and method")
+    parser.add_argument("--new-regions", type=int, default=100, help="Regions added for the refresh")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    rng = np.random.default_rng(0)
+    activate_fresh(schema, schema_name(args, "allen_closure"))
+    try:
+        CCF.insert1({'ccf_id': CCF_ID, 'ccf_version': 'CCFv3', 'ccf_resolution': 10,
+                     'ccf_description': 'Allen ontology'})
+        BrainRegion.populate()
+        RegionParent.populate()
+        all_ids = BrainRegion.to_arrays('region_id')
+        print(f"Inserting {args.sites} recording sites...", flush=True)
+        for ids in chunked(range(args.sites), 10_000):
+            RecordingSite.insert(
+                {'recording_id': i, 'ccf_id': CCF_ID, 'ap': rng.uniform(-5000, 3000),
+                 'dv': rng.uniform(0, 6000), 'ml': rng.uniform(0, 5000),
+                 'region_id': int(rng.choice(all_ids))}
+                for i in ids
+            )
+
+        print("Populating RegionAncestor...", flush=True)
+        with timer(metrics, "populate_s"):
+            RegionAncestor.populate()
+        metrics["populate_regions_per_s"] = len(all_ids) / metrics["populate_s"]
+        metrics["closure_rows"] = len(RegionAncestor())
+        metrics["closure_row_errors"] = abs(expected_rows() - metrics["closure_rows"])
+
+        print("Subtree queries...", flush=True)
+        methods = {"self_join": sites_self_join, "client_walk": sites_client_walk, "closure": sites_closure}
+        samples = {name: [] for name in methods}
+        mismatches = 0
+        for acronym in args.regions:
+            region_id = (BrainRegion & {'ccf_id': CCF_ID, 'acronym': acronym}).fetch1('region_id')
+            results = {name: np.sort(fn(region_id)) for name, fn in methods.items()}
+            mismatches += sum(
+                not np.array_equal(results["closure"], found) for found in results.values()
+            )
+            print(f"  {acronym}: {len(results['closure'])} sites", flush=True)
+            for name, fn in methods.items():
+                samples[name] += repeat(lambda: fn(region_id), args.repeats)
+        for name, values in samples.items():
+            metrics.update(summarize(values, name))
+        metrics["closure_speedup"] = metrics["self_join_mean_s"] / metrics["closure_mean_s"]
+        metrics["mismatches"] = mismatches
+
+        print(f"Adding {args.new_regions} regions...", flush=True)
+        add_regions(args.new_regions, rng)
+        with timer(metrics, "refresh_s"):
+            refreshed = RegionAncestor.populate()["success_count"]
+        metrics["refresh_regions_per_s"] = args.new_regions / metrics["refresh_s"]
+        metrics["refresh_extra_keys"] = refreshed - args.new_regions  # 0: only the new regions
+        metrics["refresh_row_errors"] = abs(expected_rows() - len(RegionAncestor()))
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "sites": args.sites,
+        "regions": args.regions,
+        "repeats": args.repeats,
+        "new_regions": args.new_regions,
+    }
+    result = record("region_closure", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
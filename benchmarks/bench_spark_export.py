@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Silver-layer export benchmark: per-row SparkAdapter rendering vs streaming Arrow batches.
+
+Fills a ``Recording`` table whose ``signal`` column uses the ``<array>`` codec
+from ``examples/array_codec.py``, which implements ``dj.SparkAdapter``. It
+then writes the table to a local Parquet file in three ways:
+
+- ``row_by_row``: the consumer pattern from the SparkAdapter specification.
+  It runs ``fetch1`` for each key and calls ``to_spark`` on each codec value,
+  then writes everything with ``pa.Table.from_pylist``. This is slow, so it
+  only runs on the first ``--row-by-row-rows`` keys.
+- ``iterate``: ``for row in table`` (one cursor) with per-value ``to_spark``,
+  written ``--batch-sizes[0]`` rows at a time.
+- ``streaming``: ``write_parquet`` from ``examples/spark_export.py``, once per
+  ``--batch-sizes`` value.
+
+Reports rows/s, MB/s of array payload and peak traced memory for each method.
+Speedups are against ``iterate`` and, by rows/s, against ``row_by_row``.
+Every streaming file is read back and compared with the ``iterate`` output;
+differences are counted in ``mismatches``. No cluster is needed, only the
+database and a temporary directory.
+
+Usage:
+    python benchmarks/bench_spark_export.py
+    python benchmarks/bench_spark_export.py --rows 200000 --samples 5000 --batch-sizes 1000 10000 50000
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    peak_memory,
+    record,
+    report,
+    schema_name,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+import array_codec  # noqa: E402,F401  registers <array>
+from spark_export import write_parquet  # noqa: E402
+
+schema = dj.Schema()
+
+
+@schema
+class Recording(dj.Manual):
+    definition = """
+    recording_id : int32
+    ---
+    session_id   : int32
+    rate_hz      : float64
+    label        : varchar(32)
+    signal       : <array>      # 1-D float32 trace
+    """
+
+
+def render(table, row, key):
+    """The specification's per-row rendering: ``to_spark`` for codec columns, primitives as-is."""
+    rendered = {}
+    for name, value in row.items():
+        codec = table.heading[name].codec
+        rendered[name] = value if codec is None else codec.to_spark(value, key=key)
+    return rendered
+
+
+def row_by_row(path, keys):
+    rows = [render(Recording, (Recording & key).fetch1(), key) for key in keys]
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+
+def iterate(path, batch_size):
+    writer = None
+    batch = []
+    for row in Recording:
+        batch.append(render(Recording, row, {"recording_id": row["recording_id"]}))
+        if len(batch) == batch_size:
+            writer = write_rows(writer, path, batch)
+            batch = []
+    write_rows(writer, path, batch).close()
+
+
+def write_rows(writer, path, rows):
+    """Append ``rows`` through ``writer``, opening it on the first call."""
+    table = pa.Table.from_pylist(rows)
+    if writer is None:
+        writer = pq.ParquetWriter(path, table.schema)
+    if rows:
+        writer.write_table(table.cast(writer.schema_arrow))
+    return writer
+
+
+def same_file(expected, path):
+    """Whether ``path`` holds the same rows as the ``expected`` table."""
+    actual = pq.read_table(path).sort_by("recording_id")
+    return actual.num_rows == expected.num_rows and actual.cast(expected.schema).equals(expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming Arrow/Parquet export")
+    add_common_arguments(parser)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--samples", type=int, default=1000, help="float32 samples per signal")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--row-by-row-rows", type=int, default=2000, help="Keys exported row by row")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    payload_mb = args.rows * args.samples * 4 / 1e6
+    metrics = {"mismatches": 0}
+    rng = np.random.default_rng(0)
+    activate_fresh(schema, schema_name(args, "spark_export"))
+    try:
+        print(f"Inserting {args.rows} recordings...", flush=True)
+        for ids in chunked(range(args.rows), 1000):
+            Recording.insert(
+                {
+                    "recording_id": i,
+                    "session_id": i // 100,
+                    "rate_hz": 30000.0,
+                    "label": f"rec{i}",
+                    "signal": rng.standard_normal(args.samples).astype(np.float32),
+                }
+                for i in ids
+            )
+
+        with tempfile.TemporaryDirectory(prefix="bench_spark_") as out:
+            out = Path(out)
+            keys = Recording.keys(order_by="KEY", limit=args.row_by_row_rows)
+            print(f"row_by_row ({len(keys)} rows)...", flush=True)
+            with peak_memory(metrics, "row_by_row_peak_bytes"), timer(metrics, "row_by_row_s"):
+                row_by_row(out / "row_by_row.parquet", keys)
+            metrics["row_by_row_rows_per_s"] = len(keys) / metrics["row_by_row_s"]
+
+            print("iterate...", flush=True)
+            with peak_memory(metrics, "iterate_peak_bytes"), timer(metrics, "iterate_s"):
+                iterate(out / "iterate.parquet", args.batch_sizes[0])
+            metrics["iterate_rows_per_s"] = args.rows / metrics["iterate_s"]
+            metrics["iterate_mb_per_s"] = payload_mb / metrics["iterate_s"]
+            expected = pq.read_table(out / "iterate.parquet").sort_by("recording_id")
+
+            for batch_size in args.batch_sizes:
+                prefix = f"streaming_b{batch_size}"
+                print(f"streaming (batch_size={batch_size})...", flush=True)
+                path = out / f"{prefix}.parquet"
+                with peak_memory(metrics, f"{prefix}_peak_bytes"), timer(metrics, f"{prefix}_s"):
+                    write_parquet(Recording, path, batch_size=batch_size)
+                metrics[f"{prefix}_rows_per_s"] = args.rows / metrics[f"{prefix}_s"]
+                metrics[f"{prefix}_mb_per_s"] = payload_mb / metrics[f"{prefix}_s"]
+                metrics[f"{prefix}_speedup"] = metrics["iterate_s"] / metrics[f"{prefix}_s"]
+                metrics[f"{prefix}_vs_row_by_row_speedup"] = (
+                    metrics[f"{prefix}_rows_per_s"] / metrics["row_by_row_rows_per_s"]
+                )
+                metrics["mismatches"] += not same_file(expected, path)
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "rows": args.rows,
+        "samples": args.samples,
+        "batch_sizes": args.batch_sizes,
+        "row_by_row_rows": args.row_by_row_rows,
+    }
+    result = record("spark_export", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+DataJoint expressions vs hand-written SQL, from ``sql-comparison.ipynb``.
+
+Scales the tutorial's ``Researcher``/``Subject``/``Session`` schema to
+``--subjects`` subjects with about ten sessions each. It then runs every query
+pair from the notebook: a DataJoint expression and the SQL written next to it
+in the notebook's comments. For each pair it:
+
+- executes the SQL DataJoint generates (``make_sql()``) and the hand-written
+  SQL the same way, through the connection's ``query()``, so only the
+  server-side work and row transfer are compared;
+- times one cold run of each: on a fresh connection after ``FLUSH TABLES``
+  (MySQL) or ``DISCARD ALL`` (PostgreSQL). These leave the server's buffer
+  cache warm. To clear it too, pass ``--restart-cmd``, for example
+  ``"docker compose restart mysql"``. It is run before each cold measurement.
+  The ``cold_runs`` metric states which kind of cold run was measured.
+- times ``--repeats`` warm runs of each, interleaved, plus the full DataJoint
+  fetch (``to_arrays()``) to show client-side decoding cost;
+- checks that both return the same number of rows;
+- records the generated SQL and both EXPLAIN plan signatures.
+
+The report lists the pairs whose generated SQL is more than ``--slow-ratio``
+times slower than the hand-written SQL. For each it shows the extra subqueries,
+full scans that the hand-written plan avoids, and a diff of the two SQL
+statements. Those are the queries worth hand-writing in production. The
+generated SQL is also stored as a text metric, so changes to it between
+DataJoint versions are flagged.
+
+Usage:
+    python benchmarks/bench_sql_comparison.py --backend both
+    python benchmarks/bench_sql_comparison.py --subjects 500000 --repeats 20 --restart-cmd "docker compose restart mysql"
+"""
+
+import argparse
+import datetime
+import difflib
+import random
+import re
+import subprocess
+import sys
+import time
+
+import datajoint as dj
+
+from harness import (
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    print_table,
+    query_plan,
+    record,
+    report,
+    schema_name,
+    summarize,
+)
+
+SPECIES = {'mouse': 0.7, 'rat': 0.2, 'zebrafish': 0.1}
+SQL_CLAUSES = r"\b(SELECT|FROM|WHERE|(?:NATURAL |LEFT |INNER )?JOIN|GROUP BY|HAVING|ORDER BY|LIMIT|AND|OR)\b"
+
+schema = dj.Schema()
+
+
+@schema
+class Researcher(dj.Manual):
+    definition = """
+    researcher_id : int32
+    ---
+    name : varchar(100)
+    email : varchar(100)
+    """
+
+
+@schema
+class Subject(dj.Manual):
+    definition = """
+    subject_id : int32
+    ---
+    species : varchar(32)
+    sex : enum('M', 'F', 'unknown')
+    """
+
+
+@schema
+class Session(dj.Manual):
+    definition = """
+    -> Subject
+    session_date : date
+    ---
+    -> Researcher
+    notes : varchar(255)
+    """
+
+
+# (name, DataJoint expression, hand-written SQL as in the notebook's comments)
+PAIRS = [
+    ("select_all", lambda: Subject(), "SELECT * FROM {Subject}"),
+    ("where_equal", lambda: Subject & {'sex': 'M'}, "SELECT * FROM {Subject} WHERE sex = 'M'"),
+    (
+        "where_and",
+        lambda: Subject & {'species': 'mouse', 'sex': 'F'},
+        "SELECT * FROM {Subject} WHERE species = 'mouse' AND sex = 'F'",
+    ),
+    (
+        "where_range",
+        lambda: Session & "session_date > '2024-06-10'",
+        "SELECT * FROM {Session} WHERE session_date > '2024-06-10'",
+    ),
+    (
+        "restrict_by_query",
+        lambda: Session & (Subject & {'species': 'mouse'}),
+        "SELECT * FROM {Session} WHERE subject_id IN "
+        "(SELECT subject_id FROM {Subject} WHERE species = 'mouse')",
+    ),
+    (
+        "nested_restrict",
+        lambda: Subject & (Session & (Researcher & {'name': 'Alice Chen'})),
+        "SELECT * FROM {Subject} WHERE subject_id IN "
+        "(SELECT subject_id FROM {Session} WHERE researcher_id IN "
+        "(SELECT researcher_id FROM {Researcher} WHERE name = 'Alice Chen'))",
+    ),
+    (
+        "project",
+        lambda: Researcher.proj('name', 'email'),
+        "SELECT researcher_id, name, email FROM {Researcher}",
+    ),
+    (
+        "rename",
+        lambda: Subject.proj(animal_type='species'),
+        "SELECT subject_id, species AS animal_type FROM {Subject}",
+    ),
+    ("join", lambda: Session * Subject, "SELECT * FROM {Session} JOIN {Subject} USING (subject_id)"),
+    (
+        "join_three_project",
+        lambda: (Session * Subject * Researcher).proj('session_date', 'name', 'species'),
+        "SELECT subject_id, session_date, name, species FROM {Session} "
+        "JOIN {Subject} USING (subject_id) JOIN {Researcher} USING (researcher_id)",
+    ),
+    (
+        "join_restrict",
+        lambda: Session * Subject & {'species': 'mouse'},
+        "SELECT * FROM {Session} JOIN {Subject} USING (subject_id) WHERE species = 'mouse'",
+    ),
+    (
+        "aggregate",
+        lambda: Subject.aggr(Session, num_sessions='count(*)'),
+        "SELECT subject_id, COUNT(*) AS num_sessions FROM {Session} GROUP BY subject_id",
+    ),
+    (
+        "aggregate_join",
+        lambda: Researcher.aggr(Session, num_sessions='count(*)'),
+        "SELECT researcher_id, COUNT(*) AS num_sessions "
+        "FROM {Researcher} JOIN {Session} USING (researcher_id) GROUP BY researcher_id",
+    ),
+    (
+        "aggregate_all",
+        lambda: dj.U().aggr(Session, total_sessions='count(*)'),
+        "SELECT COUNT(*) AS total_sessions FROM {Session}",
+    ),
+    (
+        "not_in",
+        lambda: Subject - Session,
+        "SELECT * FROM {Subject} WHERE subject_id NOT IN (SELECT subject_id FROM {Session})",
+    ),
+    (
+        "combined",
+        lambda: Researcher.aggr(Session * (Subject & {'species': 'mouse'}), mouse_sessions='count(*)'),
+        "SELECT researcher_id, COUNT(*) AS mouse_sessions FROM {Researcher} "
+        "JOIN {Session} USING (researcher_id) JOIN {Subject} USING (subject_id) "
+        "WHERE species = 'mouse' GROUP BY researcher_id",
+    ),
+]
+
+
+def fill(args):
+    Researcher.insert(
+        {'researcher_id': i, 'name': 'Alice Chen' if i == 1 else f'Researcher {i}', 'email': f'r{i}@lab.org'}
+        for i in range(1, args.researchers + 1)
+    )
+    species, weights = zip(*SPECIES.items())
+    for ids in chunked(range(1, args.subjects + 1), 50_000):
+        Subject.insert(
+            {'subject_id': i, 'species': random.choices(species, weights)[0],
+             'sex': random.choice(['M', 'F', 'unknown'])}
+            for i in ids
+        )
+
+    def sessions():
+        for subject_id in range(1, args.subjects + 1):
+            for day in random.sample(range(1500), k=random.randint(0, 2 * args.sessions_per_subject)):
+                yield {
+                    'subject_id': subject_id,
+                    'session_date': datetime.date(2021, 1, 1) + datetime.timedelta(days=day),
+                    'researcher_id': random.randint(1, args.researchers),
+                    'notes': 'Session notes',
+                }
+
+    for rows in chunked(sessions(), 50_000):
+        Session.insert(rows)
+
+
+def cold_start(args):
+    """Reconnect with cleared session and table caches, restarting the server if asked."""
+    conn = schema.connection
+    conn.close()  # connect() replaces the socket without closing it
+    if args.restart_cmd:
+        subprocess.run(args.restart_cmd, shell=True, check=True)
+    deadline = time.monotonic() + 120
+    while True:
+        try:
+            conn.connect()
+            break
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(1)
+    conn.query("FLUSH TABLES" if args.backend == "mysql" else "DISCARD ALL")
+
+
+def run_sql(sql):
+    start = time.perf_counter()
+    rows = schema.connection.query(sql).fetchall()
+    return time.perf_counter() - start, len(rows)
+
+
+def normalize(sql):
+    """One clause per line, for diffing."""
+    sql = re.sub(r"\s+", " ", sql).strip()
+    return re.sub(SQL_CLAUSES, r"\n\1", sql, flags=re.IGNORECASE).strip().splitlines()
+
+
+def full_scans(plan):
+    return set(re.findall(r"(\w+):ALL\b|Seq Scan\[(\w+)\]", plan))
+
+
+def measure(args, name, build, hand_template, metrics):
+    tables = {t.__name__: t.full_table_name for t in (Researcher, Subject, Session)}
+    query = build()
+    sqls = {"generated": query.make_sql(), "hand": hand_template.format(**tables)}
+
+    rows = {}
+    for side, sql in sqls.items():
+        cold_start(args)
+        metrics[f"{name}_{side}_cold_s"], rows[side] = run_sql(sql)
+    warm = {side: [] for side in sqls}
+    for _ in range(args.repeats):
+        for side, sql in sqls.items():
+            warm[side].append(run_sql(sql)[0])
+    for side, samples in warm.items():
+        metrics.update(summarize(samples, f"{name}_{side}_warm"))
+    fetch = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        query.to_arrays()
+        fetch.append(time.perf_counter() - start)
+    metrics.update(summarize(fetch, f"{name}_fetch"))
+
+    metrics[f"{name}_rows"] = rows["generated"]
+    metrics[f"{name}_row_mismatch"] = abs(rows["generated"] - rows["hand"])
+    metrics[f"{name}_slowdown"] = metrics[f"{name}_generated_warm_p50_s"] / metrics[f"{name}_hand_warm_p50_s"]
+    metrics[f"{name}_sql"] = sqls["generated"]
+    plans = {side: query_plan(sql) for side, sql in sqls.items()}
+    metrics[f"{name}_generated_plan"] = plans["generated"]
+    metrics[f"{name}_hand_plan"] = plans["hand"]
+    return sqls, plans
+
+
+def slow_report(args, details, metrics):
+    slow = [name for name in details if metrics[f"{name}_slowdown"] > args.slow_ratio]
+    print(f"\n{len(slow)} of {len(details)} pairs with generated SQL over {args.slow_ratio:g}x slower (warm p50):")
+    if not slow:
+        return
+    rows = []
+    for name in slow:
+        sqls, plans = details[name]
+        subqueries = [sql.upper().count("SELECT") - 1 for sql in (sqls["generated"], sqls["hand"])]
+        scans = full_scans(plans["generated"]) - full_scans(plans["hand"])
+        rows.append({
+            "pair": name,
+            "generated": f"{metrics[f'{name}_generated_warm_p50_s'] * 1e3:.1f} ms",
+            "hand": f"{metrics[f'{name}_hand_warm_p50_s'] * 1e3:.1f} ms",
+            "slowdown": f"{metrics[f'{name}_slowdown']:.2f}x",
+            "extra_subqueries": subqueries[0] - subqueries[1],
+            "extra_full_scans": ", ".join(sorted(a or b for a, b in scans)) or "-",
+        })
+    print_table(rows, ["pair", "generated", "hand", "slowdown", "extra_subqueries", "extra_full_scans"])
+    for name in slow:
+        sqls, plans = details[name]
+        print(f"\n--- {name}: hand-written vs generated SQL")
+        for line in difflib.unified_diff(
+            normalize(sqls["hand"]), normalize(sqls["generated"]), "hand", "generated", lineterm="", n=1
+        ):
+            print(f"  {line}")
+        print(f"  hand plan:      {plans['hand']}")
+        print(f"  generated plan: {plans['generated']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time DataJoint expressions against hand-written SQL")
+    add_common_arguments(parser)
+    parser.add_argument("--subjects", type=int, default=100_000)
+    parser.add_argument("--sessions-per-subject", type=int, default=10, help="Mean sessions per subject")
+    parser.add_argument("--researchers", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=10, help="Warm runs per query")
+    parser.add_argument("--slow-ratio", type=float, default=1.2, help="Generated/hand time that counts as slow")
+    parser.add_argument("--restart-cmd", help="Shell command that restarts the database before cold runs")
+    parser.add_argument("--pairs", nargs="+", help="Run only these pairs")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    pairs = [p for p in PAIRS if not args.pairs or p[0] in args.pairs]
+    metrics = {}
+    details = {}
+    random.seed(0)
+    activate_fresh(schema, schema_name(args, "sql_comparison"))
+    try:
+        print(f"Inserting {args.subjects} subjects...", flush=True)
+        fill(args)
+        metrics["sessions"] = len(Session())
+        metrics["cold_runs"] = (
+            "server restarted (--restart-cmd)" if args.restart_cmd
+            else "warm buffer cache: caches flushed, server not restarted (no --restart-cmd)"
+        )
+        for name, build, hand in pairs:
+            details[name] = measure(args, name, build, hand, metrics)
+            print(f"  {name:20} {metrics[f'{name}_slowdown']:6.2f}x", flush=True)
+        slow_report(args, details, metrics)
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "subjects": args.subjects,
+        "sessions_per_subject": args.sessions_per_subject,
+        "researchers": args.researchers,
+        "repeats": args.repeats,
+        "pairs": [p[0] for p in pairs],
+        "restarted": bool(args.restart_cmd),
+    }
+    result = record("sql_comparison", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Staged insert benchmark: synchronous chunk writes vs ``concurrent_chunks``.
+
+Each run is one ``staged_insert1`` block into an ``<object@>`` field. The block
+writes ``--chunks`` chunk files of ``--chunk-kb`` KB, plus a small metadata
+file, through the ``staged.store()`` mapping, the way a Zarr-style writer does.
+Writes go to a scratch ``file`` store and, with ``--stores file s3``, to the
+compose MinIO. For each store it compares:
+
+- ``sync``: assignments to ``staged.store()`` directly, as in the staged
+  insert how-to.
+- ``t{N}``: ``concurrent_chunks`` from ``examples/staged_concurrent.py`` with
+  N upload threads and ``--max-pending`` queued chunks.
+
+For each mode it reports MB/s for the whole block, including finalization
+and ``insert1``, plus the uploader's own bytes/s, mean and maximum queue depth
+and the time the writer spent blocked on a full queue. It also runs
+``--failures`` blocks that raise halfway through the writes. After each,
+there must be no row and no files left under the staged path. Files found
+there are counted in ``orphaned_files``, and rows in ``orphaned_rows``.
+
+Usage:
+    python benchmarks/bench_staged_insert.py
+    python benchmarks/bench_staged_insert.py --stores file s3 --chunks 2000 --threads 4 16 64
+"""
+
+import argparse
+import itertools
+import sys
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    record,
+    remove_scratch_store,
+    report,
+    schema_name,
+    scratch_store,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from staged_concurrent import MAX_PENDING, concurrent_chunks  # noqa: E402
+
+STORE = "bench_staged"
+
+schema = dj.Schema()
+
+
+@schema
+class Acquisition(dj.Manual):
+    definition = f"""
+    acquisition_id : int32
+    ---
+    n_chunks       : int32
+    frames         : <object@{STORE}>
+    """
+
+
+class Interrupted(Exception):
+    """Raised inside a staged block to exercise cleanup."""
+
+
+def write_chunks(store, chunk, n_chunks, fail_at=None):
+    store[".zarray"] = b'{"zarr_format": 2}'
+    for i in range(n_chunks):
+        if i == fail_at:
+            raise Interrupted
+        store[f"{i}.0.0"] = chunk
+
+
+def staged_run(acquisition_id, chunk, args, threads, fail_at=None, location=None):
+    """One staged insert; returns the uploader's stats, or None for synchronous writes."""
+    location = {} if location is None else location
+    stats = None
+    with Acquisition.staged_insert1 as staged:
+        staged.rec["acquisition_id"] = acquisition_id
+        staged.rec["n_chunks"] = args.chunks
+        if threads:
+            with concurrent_chunks(staged, "frames", ".zarr", threads, args.max_pending) as store:
+                location.update(root=store.mapper.root, fs=store.mapper.fs)
+                write_chunks(store, chunk, args.chunks, fail_at)
+            stats = store.stats
+        else:
+            store = staged.store("frames", ".zarr")
+            location.update(root=store.root, fs=store.fs)
+            write_chunks(store, chunk, args.chunks, fail_at)
+    return stats
+
+
+def run_store(protocol, args, metrics, chunk, next_id):
+    spec = scratch_store(protocol)
+    dj.config.stores[STORE] = spec
+    mb = args.chunks * len(chunk) / 1e6
+    try:
+        for threads in [0] + args.threads:
+            mode = f"t{threads}" if threads else "sync"
+            prefix = f"{protocol}_{mode}"
+            print(f"  {protocol} {mode}...", flush=True)
+            with timer(metrics, f"{prefix}_s"):
+                stats = staged_run(next(next_id), chunk, args, threads)
+            metrics[f"{prefix}_mb_per_s"] = mb / metrics[f"{prefix}_s"]
+            if stats:
+                metrics[f"{prefix}_upload_mb_per_s"] = stats["bytes_per_s"] / 1e6
+                metrics[f"{prefix}_mean_queue_depth"] = stats["mean_queue_depth"]
+                metrics[f"{prefix}_max_queue_depth"] = stats["max_queue_depth"]
+                metrics[f"{prefix}_blocked_s"] = stats["blocked_s"]
+                metrics[f"{prefix}_speedup"] = metrics[f"{protocol}_sync_s"] / metrics[f"{prefix}_s"]
+
+            for _ in range(args.failures):
+                acquisition_id = next(next_id)
+                location = {}
+                try:
+                    staged_run(acquisition_id, chunk, args, threads, args.chunks // 2, location)
+                except Interrupted:
+                    pass
+                fs, root = location["fs"], location["root"]
+                metrics["orphaned_rows"] += len(Acquisition & {"acquisition_id": acquisition_id})
+                metrics["orphaned_files"] += len(fs.find(root)) if fs.exists(root) else 0
+    finally:
+        if not args.keep:
+            remove_scratch_store(spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent staged-insert chunk uploads")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--stores",
+        nargs="+",
+        choices=["file", "s3"],
+        default=["file"],
+        help="Scratch store protocols: local directory and/or the compose MinIO (default: file)",
+    )
+    parser.add_argument("--chunks", type=int, default=500, help="Chunk files per staged object")
+    parser.add_argument("--chunk-kb", type=int, default=512)
+    parser.add_argument("--threads", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING)
+    parser.add_argument("--failures", type=int, default=3, help="Interrupted blocks per mode")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {"orphaned_rows": 0, "orphaned_files": 0}
+    chunk = np.random.default_rng(0).bytes(args.chunk_kb * 1024)
+    next_id = itertools.count()
+    activate_fresh(schema, schema_name(args, "staged_insert"))
+    try:
+        for protocol in args.stores:
+            run_store(protocol, args, metrics, chunk, next_id)
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "stores": args.stores,
+        "chunks": args.chunks,
+        "chunk_kb": args.chunk_kb,
+        "threads": args.threads,
+        "max_pending": args.max_pending,
+        "failures": args.failures,
+    }
+    result = record("staged_insert", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Object store throughput benchmark across protocols, partition depths, object sizes and concurrency.
+
+A synthetic ``Neuron`` table, keyed by ``mouse_id``, ``session_date`` and
+``neuron_id`` as in the ephys-with-npy tutorial, stores one ``<npy@>`` array
+per row. For each ``--stores`` protocol (a local directory, or the compose
+MinIO for ``s3``), each ``--depths`` partition depth and each ``--sizes-kb``
+object size, the benchmark points the store at a fresh location and:
+
+- inserts ``--objects`` rows through DataJoint (``insert``);
+- at each ``--concurrency`` level, reads every object back through
+  ``NpyRef.load()`` (``load``), reads the raw files through the store's
+  ``fsspec`` filesystem (``get``), and writes a copy of each next to the
+  original (``put``);
+- lists everything under the location (``list``).
+
+Partition depths map to these ``partition_pattern`` values:
+
+- ``d0``: no partitioning
+- ``d1``: ``{mouse_id}``
+- ``d2``: ``{mouse_id}/{session_date}``
+- ``d3``: ``{mouse_id}/{session_date}/{neuron_id}``
+
+Metrics are named ``{protocol}_{depth}_{size}kb[_c{N}]_{op}_...`` and report
+ops/s, MB/s and p50/p99 per-object latency. ``get`` and ``put`` isolate the
+store and path layout; ``insert`` and ``load`` add DataJoint's own work.
+
+Usage:
+    python benchmarks/bench_store_layout.py
+    python benchmarks/bench_store_layout.py --stores file s3 --sizes-kb 16 1024 16384 --concurrency 1 8 32 64
+"""
+
+import argparse
+import datetime
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import datajoint as dj
+import numpy as np
+
+from harness import (
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    record,
+    remove_scratch_store,
+    report,
+    schema_name,
+    scratch_store,
+    store_filesystem,
+    summarize,
+    timer,
+)
+
+STORE = "bench_layout"
+PATTERNS = ["", "{mouse_id}", "{mouse_id}/{session_date}", "{mouse_id}/{session_date}/{neuron_id}"]
+FIRST_SESSION = datetime.date(2024, 1, 15)
+
+schema = dj.Schema()
+
+
+@schema
+class Neuron(dj.Manual):
+    definition = f"""
+    mouse_id     : int32
+    session_date : date
+    neuron_id    : int32
+    ---
+    activity     : <npy@{STORE}>
+    """
+
+
+def rows(args, activity):
+    for i in range(args.objects):
+        yield {
+            "mouse_id": i % args.mice,
+            "session_date": FIRST_SESSION + datetime.timedelta(days=i // args.mice % args.sessions),
+            "neuron_id": i,
+            "activity": activity,
+        }
+
+
+def concurrently(fn, items, threads):
+    """Run ``fn`` on every item from ``threads`` threads; returns (elapsed seconds, latencies, bytes)."""
+
+    def one(item):
+        start = time.perf_counter()
+        n_bytes = fn(item)
+        return time.perf_counter() - start, n_bytes
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, items))
+    elapsed = time.perf_counter() - start
+    return elapsed, [latency for latency, _ in results], sum(n for _, n in results)
+
+
+def add_throughput(metrics, prefix, elapsed, latencies, n_bytes):
+    metrics[f"{prefix}_s"] = elapsed
+    metrics[f"{prefix}_ops_per_s"] = len(latencies) / elapsed
+    metrics[f"{prefix}_mb_per_s"] = n_bytes / 1e6 / elapsed
+    if latencies:
+        metrics.update(summarize(latencies, prefix))
+
+
+def run_layout(args, metrics, spec, depth, size_kb, activity):
+    prefix = f"{spec['protocol']}_d{depth}_{size_kb}kb"
+    layout = {**spec, "location": f"{spec['location']}/d{depth}_{size_kb}kb"}
+    if PATTERNS[depth]:
+        layout["partition_pattern"] = PATTERNS[depth]
+    dj.config.stores[STORE] = layout
+    fs, root = store_filesystem(layout)
+
+    print(f"  {prefix}: insert {args.objects} objects...", flush=True)
+    with timer(metrics, f"{prefix}_insert_s"):
+        for batch in chunked(rows(args, activity), args.batch_size):
+            Neuron.insert(batch)
+    metrics[f"{prefix}_insert_ops_per_s"] = args.objects / metrics[f"{prefix}_insert_s"]
+    metrics[f"{prefix}_insert_mb_per_s"] = args.objects * activity.nbytes / 1e6 / metrics[f"{prefix}_insert_s"]
+
+    paths = [f"{root}/{row['activity'].path}" for row in Neuron.to_dicts(order_by="KEY")]
+    payload = fs.cat_file(paths[0])
+    for threads in args.concurrency:
+        print(f"  {prefix}: {threads} threads...", flush=True)
+        refs = [row["activity"] for row in Neuron.to_dicts(order_by="KEY")]  # fresh, unloaded
+        add_throughput(
+            metrics, f"{prefix}_c{threads}_load",
+            *concurrently(lambda ref: ref.load().nbytes, refs, threads),
+        )
+        add_throughput(
+            metrics, f"{prefix}_c{threads}_get",
+            *concurrently(lambda path: len(fs.cat_file(path)), paths, threads),
+        )
+
+        def put(path):
+            fs.pipe_file(f"{path}.c{threads}", payload)
+            return len(payload)
+
+        add_throughput(metrics, f"{prefix}_c{threads}_put", *concurrently(put, paths, threads))
+        fs.rm([f"{path}.c{threads}" for path in paths])
+
+    with timer(metrics, f"{prefix}_list_s"):
+        listed = fs.find(root)
+    metrics[f"{prefix}_list_objects_per_s"] = len(listed) / metrics[f"{prefix}_list_s"]
+    Neuron.delete_quick()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark object store layouts and concurrency")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--stores",
+        nargs="+",
+        choices=["file", "s3"],
+        default=["file"],
+        help="Scratch store protocols: local directory and/or the compose MinIO (default: file)",
+    )
+    parser.add_argument(
+        "--depths",
+        type=int,
+        nargs="+",
+        choices=range(len(PATTERNS)),
+        default=list(range(len(PATTERNS))),
+        help="Partition depths: 0 none, 1 mouse_id, 2 +session_date, 3 +neuron_id (default: all)",
+    )
+    parser.add_argument("--sizes-kb", type=int, nargs="+", default=[16, 1024], help="Object sizes in KB")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--objects", type=int, default=256, help="Objects per layout and size")
+    parser.add_argument("--mice", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=8, help="Sessions per mouse")
+    parser.add_argument("--batch-size", type=int, default=32, help="Rows per insert call")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    metrics = {}
+    rng = np.random.default_rng(0)
+    activate_fresh(schema, schema_name(args, "store_layout"))
+    try:
+        for protocol in args.stores:
+            spec = scratch_store(protocol)
+            try:
+                for size_kb in args.sizes_kb:
+                    activity = rng.standard_normal(size_kb * 1024 // 8)
+                    for depth in args.depths:
+                        run_layout(args, metrics, spec, depth, size_kb, activity)
+            finally:
+                if not args.keep:
+                    remove_scratch_store(spec)
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+
+    params = {
+        "stores": args.stores,
+        "depths": args.depths,
+        "sizes_kb": args.sizes_kb,
+        "concurrency": args.concurrency,
+        "objects": args.objects,
+        "mice": args.mice,
+        "sessions": args.sessions,
+        "batch_size": args.batch_size,
+    }
+    result = record("store_layout", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+I/O-bound populate benchmark: serial vs threads with dj.Instance vs processes.
+
+``Analysis.make`` reads a ``<blob@>`` trace from a scratch object store (a
+local directory, or the compose MinIO with ``--store s3``). It then waits
+``--io-ms`` milliseconds to model a remote read, and computes a few
+statistics. The benchmark populates ``--keys`` rows in these ways:
+
+- ``serial``: ``Analysis.populate()``.
+- ``threads_{N}``: ``threaded_populate`` from ``examples/threaded_populate.py``
+  with N threads, each with its own ``dj.Instance`` connection.
+- ``threads_{N}_jobs``: as ``threads_{N}``, with ``reserve_jobs=True``, so
+  every key is also reserved and completed in the jobs table.
+- ``processes_{N}``: N spawned worker processes, each populating its share of
+  the keys (``recording_id % N``). Timing starts once all workers have
+  connected.
+
+For each mode it reports keys/s, the speedup over ``serial`` and the peak
+resident memory of the benchmark process plus its children, sampled every
+50 ms. Missing rows after a run are counted in ``missing_keys``.
+
+Usage:
+    python benchmarks/bench_threaded_populate.py
+    python benchmarks/bench_threaded_populate.py --store s3 --keys 2000 --workers 4 16 64 --io-ms 50
+"""
+
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+
+import datajoint as dj
+import numpy as np
+import psutil
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    chunked,
+    configure,
+    record,
+    remove_scratch_store,
+    report,
+    schema_name,
+    scratch_store,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from threaded_populate import threaded_populate  # noqa: E402
+
+STORE = "bench_threads"
+io_s = 0.02
+
+
+def pipeline(schema):
+    """Declare the benchmark tables on ``schema``; returns ``(Recording, Analysis)``."""
+
+    @schema
+    class Recording(dj.Manual):
+        definition = f"""
+        recording_id : int32
+        ---
+        trace        : <blob@{STORE}>
+        """
+
+    @schema
+    class Analysis(dj.Computed):
+        definition = """
+        -> Recording
+        ---
+        mean_amp : float64
+        rms_amp  : float64
+        """
+
+        def make(self, key):
+            trace = (Recording & key).fetch1("trace")
+            time.sleep(io_s)
+            self.insert1({
+                **key,
+                "mean_amp": float(trace.mean()),
+                "rms_amp": float(np.sqrt(np.mean(trace ** 2))),
+            })
+
+    return Recording, Analysis
+
+
+schema = dj.Schema()
+Recording, Analysis = pipeline(schema)
+
+
+class TreeMemory:
+    """Peak resident memory of this process and its children, sampled in a thread."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        me = psutil.Process()
+        while True:
+            total = 0
+            for process in [me, *me.children(recursive=True)]:
+                try:
+                    total += process.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            self.peak = max(self.peak, total)
+            if self.done.wait(self.interval):
+                return
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.done.set()
+        self.thread.join()
+
+
+def worker(args, spec, index, n_workers, ready, go):
+    """One worker process: connect, wait for the start signal, populate its share."""
+    global io_s
+    configure(args)
+    dj.config.stores[STORE] = spec
+    schema.activate(schema_name(args, "threaded_populate"))
+    io_s = args.io_ms / 1000
+    dj.conn()
+    ready.put(index)
+    go.wait()
+    Analysis.populate(f"recording_id % {n_workers} = {index}")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_processes(args, spec, n_workers):
+    """Populate from ``n_workers`` spawned processes; returns seconds from the start signal."""
+    ctx = multiprocessing.get_context("spawn")
+    ready, go = ctx.Queue(), ctx.Event()
+    workers = [
+        ctx.Process(target=worker, args=(args, spec, i, n_workers, ready, go))
+        for i in range(n_workers)
+    ]
+    for process in workers:
+        process.start()
+    for _ in workers:
+        ready.get()
+    start = time.perf_counter()
+    go.set()
+    for process in workers:
+        process.join()
+    return time.perf_counter() - start
+
+
+def main():
+    global io_s
+    parser = argparse.ArgumentParser(description="Benchmark thread-pool populate with dj.Instance")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--store",
+        choices=["file", "s3"],
+        default="file",
+        help="Scratch store protocol: local directory or the compose MinIO (default: file)",
+    )
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--samples", type=int, default=100_000, help="float64 samples per trace")
+    parser.add_argument("--io-ms", type=float, default=20.0, help="Extra wait per make(), modeling remote I/O")
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 16])
+    parser.add_argument("--skip-processes", action="store_true", help="Only compare serial and threads")
+    parser.add_argument("--skip-jobs", action="store_true", help="Skip the threads with reserve_jobs=True")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    io_s = args.io_ms / 1000
+    name = schema_name(args, "threaded_populate")
+    spec = scratch_store(args.store)
+    dj.config.stores[STORE] = spec
+    metrics = {"missing_keys": 0}
+    rng = np.random.default_rng(0)
+
+    def analysis(instance):
+        instance.config.stores[STORE] = spec
+        return pipeline(instance.Schema(name))[1]
+
+    def measure(mode, run):
+        with TreeMemory() as memory:
+            metrics[f"{mode}_s"] = run()
+        metrics[f"{mode}_keys_per_s"] = args.keys / metrics[f"{mode}_s"]
+        metrics[f"{mode}_peak_rss_bytes"] = memory.peak
+        if mode != "serial":
+            metrics[f"{mode}_speedup"] = metrics["serial_s"] / metrics[f"{mode}_s"]
+        metrics["missing_keys"] += args.keys - len(Analysis())
+        print(f"  {mode:16} {metrics[f'{mode}_keys_per_s']:8.1f} keys/s", flush=True)
+        Analysis.jobs.delete()
+        Analysis.delete_quick()
+
+    activate_fresh(schema, name)
+    try:
+        print(f"Inserting {args.keys} traces into a {args.store} store...", flush=True)
+        for ids in chunked(range(args.keys), 100):
+            Recording.insert({"recording_id": i, "trace": rng.standard_normal(args.samples)} for i in ids)
+
+        measure("serial", lambda: timed(Analysis.populate))
+        for n in args.workers:
+            measure(f"threads_{n}", lambda: timed(lambda: threaded_populate(analysis, threads=n)))
+            if not args.skip_jobs:
+                measure(
+                    f"threads_{n}_jobs",
+                    lambda: timed(lambda: threaded_populate(analysis, threads=n, reserve_jobs=True)),
+                )
+            if not args.skip_processes:
+                measure(f"processes_{n}", lambda: run_processes(args, spec, n))
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+            remove_scratch_store(spec)
+
+    params = {
+        "store": args.store,
+        "keys": args.keys,
+        "samples": args.samples,
+        "io_ms": args.io_ms,
+        "workers": args.workers,
+    }
+    result = record("threaded_populate", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Voxel bulk-load benchmark on a synthesized Allen CCF annotation volume.
+
+Synthesizes an annotation volume (an ellipsoidal brain partitioned into
+regions from the real Allen ontology) as an NRRD file, then loads it into the
+tutorial's ``Voxel`` table in two ways:
+
+- ``bulk``: ``examples/voxel_bulk_load.py``, which streams blocks into the
+  backend's native bulk loader and rebuilds ``index(y, z)`` at the end.
+- ``insert``: ``Voxel.make`` with chunked DataJoint inserts, capped at
+  ``--insert-planes`` planes so it finishes in reasonable time.
+
+Reports rows/s for both, the index build time, and the latency of slice
+queries at fixed ``y`` served by ``index(y, z)``.
+
+Usage:
+    python benchmarks/bench_voxel_load.py
+    python benchmarks/bench_voxel_load.py --shape 456 320 528 --resolution 25 --encoding gzip
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from harness import (
+    ROOT,
+    activate_fresh,
+    add_common_arguments,
+    configure,
+    record,
+    report,
+    schema_name,
+    summarize,
+    timer,
+)
+
+sys.path.insert(0, str(ROOT / "examples"))
+
+from voxel_bulk_load import BLOCK_PLANES, iter_blocks, load_voxels, voxel_frame  # noqa: E402
+
+ONTOLOGY_FILE = ROOT / "src" / "tutorials" / "domain" / "allen-ccf" / "data" / "allen_structure_graph.csv"
+
+schema = dj.Schema()
+
+
+def write_atlas(path, shape, region_ids, encoding="raw", seeds=2000, seed=0):
+    """
+    Write a ``(planes, rows, cols)`` uint32 annotation volume as NRRD.
+
+    The brain is the ellipsoid inscribed in the volume, split into Voronoi
+    cells around ``seeds`` random points, each labeled with a region ID.
+    Planes are generated and written one at a time.
+    """
+    rng = np.random.default_rng(seed)
+    planes, rows, cols = shape
+    centers = rng.uniform(0, 1, (seeds, 3)) * shape
+    labels = rng.choice(region_ids, seeds).astype(np.uint32)
+    tree = cKDTree(centers)
+    iy, ix = np.mgrid[0:rows, 0:cols]
+
+    header = (
+        "NRRD0004\n"
+        "type: uint32\n"
+        "dimension: 3\n"
+        f"sizes: {cols} {rows} {planes}\n"
+        "endian: little\n"
+        f"encoding: {encoding}\n"
+        "\n"
+    )
+    compressor = zlib.compressobj(wbits=31) if encoding == "gzip" else None
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        for k in range(planes):
+            inside = (
+                ((k - planes / 2) / (planes / 2)) ** 2
+                + ((iy - rows / 2) / (rows / 2)) ** 2
+                + ((ix - cols / 2) / (cols / 2)) ** 2
+            ) < 1
+            plane = np.zeros((rows, cols), dtype="<u4")
+            points = np.column_stack([np.full(inside.sum(), k), iy[inside], ix[inside]])
+            if len(points):
+                plane[inside] = labels[tree.query(points)[1]]
+            data = plane.tobytes()
+            f.write(compressor.compress(data) if compressor else data)
+        if compressor:
+            f.write(compressor.flush())
+
+
+@schema
+class CCF(dj.Manual):
+    definition = """
+    # Common Coordinate Framework atlas
+    ccf_id : int32
+    ---
+    ccf_version : varchar(64)       # e.g., 'CCFv3'
+    ccf_resolution : float32        # voxel resolution in microns
+    ccf_description : varchar(255)
+    """
+
+
+@schema
+class BrainRegion(dj.Imported):
+    definition = """
+    # Brain region from Allen ontology
+    -> CCF
+    region_id : int32               # Allen structure ID
+    ---
+    acronym : varchar(32)           # short name (e.g., 'VISp')
+    region_name : varchar(255)      # full name
+    color_hex : varchar(6)          # hex color code for visualization
+    structure_order : int32         # order in hierarchy
+    """
+
+    def make(self, key):
+        ontology = pd.read_csv(ONTOLOGY_FILE)
+        self.insert(
+            {
+                **key,
+                'region_id': row['id'],
+                'acronym': row['acronym'],
+                'region_name': row['safe_name'],
+                'color_hex': row['color_hex_triplet'],
+                'structure_order': row['graph_order'],
+            }
+            for _, row in ontology.iterrows()
+        )
+
+
+@schema
+class Voxel(dj.Imported):
+    definition = """
+    # Brain atlas voxels
+    -> CCF
+    x : int32                       # AP axis (µm)
+    y : int32                       # DV axis (µm)
+    z : int32                       # ML axis (µm)
+    ---
+    -> BrainRegion
+    index(y, z)                     # for efficient coronal slice queries
+    """
+
+    nrrd_path = None
+    max_planes = None
+
+    def make(self, key):
+        resolution = (CCF & key).fetch1('ccf_resolution')
+        for first_plane, block in iter_blocks(self.nrrd_path, BLOCK_PLANES):
+            if first_plane >= self.max_planes:
+                break
+            self.insert(voxel_frame(key['ccf_id'], first_plane, block, resolution), chunk_size=10_000)
+
+    @property
+    def key_source(self):
+        return CCF & 'ccf_id = 2'  # ccf_id 1 is bulk-loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Voxel bulk loader")
+    add_common_arguments(parser)
+    parser.add_argument(
+        "--shape", type=int, nargs=3, default=[228, 160, 264],
+        help="Volume planes (ML), rows (DV), cols (AP) (default: 50 µm atlas size)",
+    )
+    parser.add_argument("--resolution", type=float, default=50.0)
+    parser.add_argument("--encoding", choices=["raw", "gzip"], default="raw")
+    parser.add_argument("--block-planes", type=int, default=BLOCK_PLANES)
+    parser.add_argument(
+        "--insert-planes", type=int, default=16, help="Planes loaded by the DataJoint insert path"
+    )
+    parser.add_argument("--queries", type=int, default=50, help="Slice queries to time")
+
+    args = parser.parse_args()
+    if configure(args):
+        return
+
+    path = Path(tempfile.gettempdir()) / f"bench_atlas_{args.encoding}.nrrd"
+    ontology = pd.read_csv(ONTOLOGY_FILE)
+    print(f"Synthesizing {'x'.join(map(str, args.shape))} atlas...", flush=True)
+    write_atlas(path, tuple(args.shape), ontology['id'].to_numpy(), args.encoding)
+
+    metrics = {"nrrd_bytes": path.stat().st_size}
+    activate_fresh(schema, schema_name(args, "allen_voxels"))
+    try:
+        CCF.insert(
+            {'ccf_id': ccf_id, 'ccf_version': 'synthetic', 'ccf_resolution': args.resolution,
+             'ccf_description': description}
+            for ccf_id, description in ((1, 'bulk loader'), (2, 'DataJoint insert'))
+        )
+        BrainRegion.populate()
+
+        print("Bulk load...", flush=True)
+        result = load_voxels(Voxel, BrainRegion, 1, path, args.resolution, args.block_planes)
+        metrics["bulk_rows"] = result["rows"]
+        metrics["bulk_load_s"] = result["load_s"]
+        metrics["bulk_index_s"] = result["index_s"]
+        metrics["bulk_rows_per_s"] = result["rows_per_s"]
+
+        print(f"DataJoint insert ({args.insert_planes} planes)...", flush=True)
+        Voxel.nrrd_path, Voxel.max_planes = path, args.insert_planes
+        with timer(metrics, "insert_s"):
+            Voxel.populate()
+        metrics["insert_rows"] = len(Voxel & 'ccf_id = 2')
+        metrics["insert_rows_per_s"] = metrics["insert_rows"] / metrics["insert_s"]
+        metrics["bulk_speedup"] = metrics["bulk_rows_per_s"] / metrics["insert_rows_per_s"]
+
+        print("Slice queries...", flush=True)
+        rng = np.random.default_rng(0)
+        samples = []
+        for row in rng.integers(0, args.shape[1], args.queries):
+            query = Voxel & {'ccf_id': 1, 'y': int(row * args.resolution)}
+            start = time.perf_counter()
+            query.to_arrays('x', 'z', 'region_id')
+            samples.append(time.perf_counter() - start)
+        metrics.update(summarize(samples, "slice"))
+    finally:
+        if not args.keep:
+            schema.drop(prompt=False)
+        path.unlink(missing_ok=True)
+
+    params = {
+        "shape": args.shape,
+        "resolution": args.resolution,
+        "encoding": args.encoding,
+        "block_planes": args.block_planes,
+        "insert_planes": args.insert_planes,
+    }
+    result = record("voxel_load", args, params, metrics)
+    if report(result, args):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
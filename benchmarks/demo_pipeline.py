@@ -0,0 +1,96 @@
+"""
+Synthetic data for the ``demo_modules`` pipeline used by the diagram how-to.
+
+``src/how-to/demo_modules`` declares a three-schema pipeline
+(acquisition → processing → analysis). This module activates it under
+benchmark schema names and fills the acquisition tables with a configurable
+number of labs, subjects and sessions using chunked bulk inserts.
+"""
+
+import datetime
+import sys
+import time
+
+from harness import ROOT, chunked, schema_name
+
+sys.path.insert(0, str(ROOT / "src" / "how-to"))
+
+from demo_modules import acquisition, analysis, batched, processing  # noqa: E402
+
+MODULES = (acquisition, processing, analysis)
+SPECIES = ("mouse", "rat", "zebrafish", "macaque")
+SEXES = ("M", "F", "U")
+FIRST_SESSION = datetime.date(2000, 1, 1)
+
+
+def activate(args, modules=MODULES):
+    """Activate the demo schemas under the benchmark prefix, dropping any previous run."""
+    for module in modules:
+        module.schema.activate(schema_name(args, module.__name__.rsplit(".", 1)[-1]))
+    drop(modules)
+    for module in modules:
+        module.schema.activate(schema_name(args, module.__name__.rsplit(".", 1)[-1]))
+
+
+def drop(modules=MODULES):
+    """Drop the demo schemas, downstream first."""
+    for module in reversed(modules):
+        if module.schema.is_activated():
+            module.schema.drop(prompt=False)
+
+
+def subject_id(lab, subject):
+    """Subject identifiers fit the ``varchar(16)`` key: ``L0042-S000137``."""
+    return f"L{lab:04d}-S{subject:06d}"
+
+
+def generate(n_labs, subjects_per_lab, sessions_per_subject, chunk_size=10_000):
+    """
+    Fill Lab, Subject and Session with synthetic rows.
+
+    Rows are produced lazily and inserted ``chunk_size`` at a time, so memory
+    stays bounded at 10^6 sessions.
+
+    Returns
+    -------
+    dict
+        Row counts and insert rates per table.
+    """
+    labs = ({"lab": f"lab{i:04d}", "institution": f"Institute {i % 97}"} for i in range(n_labs))
+    subjects = (
+        {
+            "subject_id": subject_id(lab, s),
+            "lab": f"lab{lab:04d}",
+            "species": SPECIES[(lab + s) % len(SPECIES)],
+            "sex": SEXES[s % len(SEXES)],
+        }
+        for lab in range(n_labs)
+        for s in range(subjects_per_lab)
+    )
+    sessions = (
+        {
+            "subject_id": subject_id(lab, s),
+            "session_date": FIRST_SESSION + datetime.timedelta(days=d),
+            "session_notes": f"synthetic session {d}",
+        }
+        for lab in range(n_labs)
+        for s in range(subjects_per_lab)
+        for d in range(sessions_per_subject)
+    )
+
+    metrics = {}
+    for name, table, rows in (
+        ("lab", acquisition.Lab, labs),
+        ("subject", acquisition.Subject, subjects),
+        ("session", acquisition.Session, sessions),
+    ):
+        count = 0
+        start = time.perf_counter()
+        for chunk in chunked(rows, chunk_size):
+            table.insert(chunk)
+            count += len(chunk)
+        elapsed = time.perf_counter() - start
+        metrics[f"insert_{name}_rows"] = count
+        metrics[f"insert_{name}_s"] = elapsed
+        metrics[f"insert_{name}_rows_per_s"] = count / elapsed if elapsed else float("inf")
+    return metrics
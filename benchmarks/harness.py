@@ -0,0 +1,470 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Each benchmark is a standalone script that connects to one of the tutorial
+backends from ``docker-compose.yaml``, runs its measurements, prints a summary
+table and appends the results to a JSON-lines history file. Results recorded
+with a different DataJoint version are compared against the current run so that
+regressions show up across releases.
+
+Usage from a benchmark script:
+
+    from harness import add_common_arguments, configure, record, report
+
+    parser = argparse.ArgumentParser(...)
+    add_common_arguments(parser)
+    args = parser.parse_args()
+    if configure(args):
+        return  # --backend both: re-ran this script once per backend
+    ...
+    results = record("populate", args, params, metrics)
+    report(results, args)
+"""
+
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+ROOT = BENCHMARKS_DIR.parent
+HISTORY = BENCHMARKS_DIR / "results" / "history.jsonl"
+
+# MinIO from docker-compose.yaml, as seen from the host
+MINIO = {"endpoint": "127.0.0.1:9002", "access_key": "datajoint", "secret_key": "datajoint"}
+SCRATCH_BUCKET = "datajoint-bench"
+
+# Relative slowdown that counts as a regression against the previous version
+REGRESSION_THRESHOLD = 0.2
+
+BACKENDS = {
+    "mysql": {"DJ_USER": "root", "DJ_PASS": "tutorial", "DJ_PORT": "3306"},
+    "postgresql": {"DJ_USER": "postgres", "DJ_PASS": "tutorial", "DJ_PORT": "5432"},
+}
+
+
+def add_common_arguments(parser):
+    """Add the ``--backend``, ``--history`` and ``--schema-prefix`` options."""
+    parser.add_argument(
+        "--backend",
+        choices=["mysql", "postgresql", "both"],
+        default="mysql",
+        help="Database backend to benchmark (default: mysql)",
+    )
+    parser.add_argument(
+        "--history",
+        type=Path,
+        default=HISTORY,
+        help=f"JSON-lines file results are appended to (default: {HISTORY.relative_to(ROOT)})",
+    )
+    parser.add_argument(
+        "--schema-prefix",
+        default="bench_",
+        help="Prefix for the schemas created by the benchmark (default: bench_)",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the benchmark schemas instead of dropping them at the end",
+    )
+
+
+def configure(args):
+    """
+    Configure DataJoint for ``args.backend``.
+
+    With ``--backend both`` the calling script is re-executed once per backend
+    in a subprocess (module-level schemas cannot be rebound to a second
+    connection in one process), and ``True`` is returned so the caller can exit.
+
+    Returns
+    -------
+    bool
+        True if the benchmark was dispatched to subprocesses.
+    """
+    if args.backend == "both":
+        for backend in BACKENDS:
+            argv = [sys.executable, sys.argv[0]]
+            skip = False
+            for arg in sys.argv[1:]:
+                if skip:
+                    skip = False
+                    continue
+                if arg == "--backend":
+                    skip = True
+                    continue
+                if arg.startswith("--backend="):
+                    continue
+                argv.append(arg)
+            subprocess.run([*argv, "--backend", backend], check=True)
+        return True
+
+    import datajoint as dj
+
+    # Credentials from the environment apply only to the backend they were set for
+    env = dict(BACKENDS[args.backend])
+    if os.environ.get("DJ_BACKEND", "mysql") == args.backend:
+        env.update({k: v for k, v in os.environ.items() if k in env})
+    env["DJ_HOST"] = os.environ.get("DJ_HOST", "127.0.0.1")
+
+    dj.config["database.backend"] = args.backend
+    dj.config["database.host"] = env["DJ_HOST"]
+    dj.config["database.port"] = int(env["DJ_PORT"])
+    dj.config["database.user"] = env["DJ_USER"]
+    dj.config["database.password"] = env["DJ_PASS"]
+    dj.config["safemode"] = False
+    return False
+
+
+def schema_name(args, name):
+    """Benchmark schema name, e.g. ``bench_acquisition``."""
+    return f"{args.schema_prefix}{name}"
+
+
+def activate_fresh(schema, name):
+    """Activate ``schema`` as ``name``, dropping whatever a previous run left behind."""
+    schema.activate(name)
+    schema.drop(prompt=False)
+    schema.activate(name)
+
+
+def scratch_store(protocol):
+    """
+    Spec for an empty scratch object store.
+
+    ``file`` stores live in a new temporary directory; ``s3`` stores under a
+    unique prefix of ``SCRATCH_BUCKET`` on the compose MinIO (override with
+    ``DJ_MINIO_ENDPOINT``, ``DJ_MINIO_ACCESS_KEY``, ``DJ_MINIO_SECRET_KEY``).
+    Remove it with ``remove_scratch_store``.
+    """
+    if protocol == "file":
+        return {"protocol": "file", "location": tempfile.mkdtemp(prefix="bench_store_")}
+    if protocol != "s3":
+        raise ValueError(f"Unsupported scratch store protocol: {protocol}")
+    spec = {
+        "protocol": "s3",
+        "endpoint": os.environ.get("DJ_MINIO_ENDPOINT", MINIO["endpoint"]),
+        "bucket": SCRATCH_BUCKET,
+        "location": f"bench-{uuid.uuid4().hex[:8]}",
+        "access_key": os.environ.get("DJ_MINIO_ACCESS_KEY", MINIO["access_key"]),
+        "secret_key": os.environ.get("DJ_MINIO_SECRET_KEY", MINIO["secret_key"]),
+        "secure": False,
+    }
+    fs = _s3(spec)
+    if not fs.exists(spec["bucket"]):
+        fs.mkdir(spec["bucket"])
+    return spec
+
+
+def remove_scratch_store(spec):
+    """Delete everything under a ``scratch_store`` spec."""
+    if spec["protocol"] == "file":
+        shutil.rmtree(spec["location"], ignore_errors=True)
+        return
+    fs, prefix = store_filesystem(spec)
+    if fs.exists(prefix):
+        fs.rm(prefix, recursive=True)
+
+
+def store_filesystem(spec):
+    """``fsspec`` filesystem and root path of a ``file`` or ``s3`` store spec."""
+    if spec["protocol"] == "file":
+        import fsspec
+
+        return fsspec.filesystem("file"), spec["location"]
+    return _s3(spec), f"{spec['bucket']}/{spec['location']}"
+
+
+def _s3(spec):
+    import s3fs
+
+    return s3fs.S3FileSystem(
+        key=spec["access_key"],
+        secret=spec["secret_key"],
+        client_kwargs={"endpoint_url": f"http://{spec['endpoint']}"},
+    )
+
+
+@contextmanager
+def timer(metrics, name):
+    """Time the enclosed block and store the elapsed seconds in ``metrics[name]``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics[name] = time.perf_counter() - start
+
+
+@contextmanager
+def peak_memory(metrics, name):
+    """
+    Record the peak traced Python/NumPy allocation of the block, in bytes.
+
+    NumPy reports its buffers to ``tracemalloc``, so this captures array
+    allocations as well as Python objects. Memory-mapped pages are not counted.
+    """
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        metrics[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+def repeat(fn, n):
+    """Call ``fn`` ``n`` times and return the list of elapsed seconds."""
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(values, q):
+    """Linear-interpolated percentile ``q`` (0-100) of ``values``."""
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    pos = (len(values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+
+def summarize(samples, prefix):
+    """Reduce a list of latencies to ``{prefix}_p50_s``, ``_p99_s``, ``_mean_s``."""
+    return {
+        f"{prefix}_p50_s": percentile(samples, 50),
+        f"{prefix}_p99_s": percentile(samples, 99),
+        f"{prefix}_mean_s": statistics.fmean(samples) if samples else float("nan"),
+    }
+
+
+# Unit suffixes of metrics compared across versions, and whether higher is better
+COMPARED_UNITS = {"_per_s": True, "_speedup": True, "_s": False, "_bytes": False}
+
+
+def higher_is_better(metric):
+    """
+    Direction of a compared metric, from its unit suffix.
+
+    Returns None for metrics without a compared unit (counts, hit rates,
+    mismatches), which describe the workload rather than its cost.
+    """
+    for suffix, higher in COMPARED_UNITS.items():
+        if metric.endswith(suffix):
+            return higher
+    return None
+
+
+def record(benchmark, args, params, metrics):
+    """
+    Append one result to the history file and return it.
+
+    Parameters
+    ----------
+    benchmark : str
+        Benchmark name; runs are compared only within the same name.
+    args : argparse.Namespace
+        Parsed arguments (``backend`` and ``history`` are used).
+    params : dict
+        Inputs that define the workload (sizes, counts). Runs are compared only
+        when their params match.
+    metrics : dict
+        Measured values. Names ending in ``_s`` are seconds, ``_per_s`` rates,
+        ``_bytes`` sizes.
+    """
+    import datajoint as dj
+
+    result = {
+        "benchmark": benchmark,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "datajoint_version": dj.__version__,
+        "backend": args.backend,
+        "python": platform.python_version(),
+        "host": platform.node(),
+        "params": params,
+        "metrics": metrics,
+    }
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with args.history.open("a") as f:
+        f.write(json.dumps(result, default=str) + "\n")
+    return result
+
+
+def load_history(path):
+    """Read all results from a history file (missing file → empty list)."""
+    if not path.exists():
+        return []
+    with path.open() as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_version(result, history):
+    """Most recent comparable result recorded with a different DataJoint version."""
+    for past in reversed(history):
+        if (
+            past["benchmark"] == result["benchmark"]
+            and past["backend"] == result["backend"]
+            and past["params"] == result["params"]
+            and past["datajoint_version"] != result["datajoint_version"]
+        ):
+            return past
+    return None
+
+
+def regressions(result, baseline, threshold=REGRESSION_THRESHOLD):
+    """List ``(metric, old, new, change)`` for metrics that got worse by more than ``threshold``."""
+    found = []
+    for name, new in result["metrics"].items():
+        old = baseline["metrics"].get(name)
+        if not isinstance(new, (int, float)) or not isinstance(old, (int, float)) or not old:
+            continue
+        higher = higher_is_better(name)
+        if higher is None:
+            continue
+        change = (new - old) / abs(old)
+        if (-change if higher else change) > threshold:
+            found.append((name, old, new, change))
+    return found
+
+
+def changes(result, baseline):
+    """List ``(metric, old, new)`` for non-numeric metrics (e.g. query plans) that differ."""
+    return [
+        (name, baseline["metrics"][name], new)
+        for name, new in result["metrics"].items()
+        if isinstance(new, str)
+        and isinstance(baseline["metrics"].get(name), str)
+        and baseline["metrics"][name] != new
+    ]
+
+
+def query_plan(sql):
+    """
+    Compact signature of the backend's plan for ``sql``.
+
+    Lists the access path of each table (MySQL ``EXPLAIN FORMAT=JSON``) or the
+    plan tree's node types, relations and indexes (PostgreSQL
+    ``EXPLAIN (FORMAT JSON)``). Row estimates and costs are left out, so the
+    signature only changes when the plan shape does.
+    """
+    import datajoint as dj
+
+    conn = dj.conn()
+    if dj.config["database.backend"] == "postgresql":
+        plan = conn.query(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()[0][0]
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+
+        def node(n):
+            label = n["Node Type"]
+            target = ":".join(n[k] for k in ("Relation Name", "Index Name") if k in n)
+            if target:
+                label += f"[{target}]"
+            children = ", ".join(node(child) for child in n.get("Plans", []))
+            return f"{label}({children})" if children else label
+
+        return node(plan[0]["Plan"])
+
+    plan = json.loads(conn.query(f"EXPLAIN FORMAT=JSON {sql}").fetchall()[0][0])
+    steps = []
+
+    def walk(value):
+        if isinstance(value, dict):
+            table = value.get("table")
+            if isinstance(table, dict) and "table_name" in table:
+                key = f"({table['key']})" if table.get("key") else ""
+                steps.append(f"{table['table_name']}:{table.get('access_type', '?')}{key}")
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(plan)
+    return " > ".join(steps)
+
+
+def format_value(name, value):
+    """Human-readable rendering of a metric value based on its suffix."""
+    if not isinstance(value, (int, float)):
+        return str(value)
+    if name.endswith("_per_s"):
+        return f"{value:,.0f}/s"
+    if name.endswith("_s"):
+        return f"{value * 1e3:,.1f} ms" if value < 1 else f"{value:,.2f} s"
+    if name.endswith("_bytes"):
+        return f"{value / 2**20:,.1f} MiB"
+    if isinstance(value, float):
+        return f"{value:,.3g}"
+    return f"{value:,}"
+
+
+def print_table(rows, columns):
+    """Print ``rows`` (list of dicts) as an aligned text table."""
+    if not rows:
+        print("  (no rows)")
+        return
+    widths = [max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
+
+
+def report(result, args):
+    """
+    Print a run's metrics and any regressions against the previous DataJoint version.
+
+    Returns
+    -------
+    list
+        Regressions found (empty if none or no comparable history).
+    """
+    print(f"\n{'=' * 60}")
+    print(f"{result['benchmark']} — DataJoint {result['datajoint_version']} on {result['backend']}")
+    print(f"{'=' * 60}")
+    for name, value in result["metrics"].items():
+        print(f"  {name:<40} {format_value(name, value)}")
+
+    history = load_history(args.history)[:-1]  # exclude the run just recorded
+    baseline = previous_version(result, history)
+    if baseline is None:
+        print("\nNo comparable result from another DataJoint version in the history.")
+        return []
+
+    found = regressions(result, baseline)
+    print(f"\nCompared with DataJoint {baseline['datajoint_version']} ({baseline['timestamp']}):")
+    if not found:
+        print(f"  no regressions beyond {REGRESSION_THRESHOLD:.0%}")
+    for name, old, new in changes(result, baseline):
+        print(f"  CHANGED {name}:\n    was: {old}\n    now: {new}")
+    for name, old, new, change in found:
+        print(
+            f"  REGRESSION {name}: {format_value(name, old)} → {format_value(name, new)} "
+            f"({change:+.0%})"
+        )
+    return found
+
+
+def chunked(iterable, size):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,71 @@
+"""
+Generated copies of the ``demo_modules`` schema structure.
+
+The demo pipeline has three schemas and nine tables. To exercise diagram and
+dependency-graph code at the scale of production pipelines, this module declares
+``n`` independent copies of it — ``acquisition_000``, ``processing_000``,
+``analysis_000``, ``acquisition_001``, ... — with the table definitions taken
+from the demo modules and their foreign keys rewritten to point within each copy.
+34 copies give 306 tables in 102 schemas.
+"""
+
+import re
+
+import datajoint as dj
+
+from demo_pipeline import MODULES
+from harness import schema_name
+
+FOREIGN_KEY = re.compile(r"->\s*(?:\w+\.)?(\w+)")
+
+
+def module_tables(module):
+    """Table classes declared in a demo module, in declaration order."""
+    return [
+        cls
+        for cls in vars(module).values()
+        if isinstance(cls, type)
+        and issubclass(cls, dj.Table)
+        and cls.__module__ == module.__name__
+    ]
+
+
+def declare(args, copies):
+    """
+    Declare ``copies`` copies of the demo pipeline and return their schemas.
+
+    Returns
+    -------
+    tuple[list[dj.Schema], list[list]]
+        Schemas in dependency order (acquisition, processing, analysis per copy)
+        and, for each schema, its declared table classes.
+    """
+    context = {}
+    schemas = []
+    tables = []
+    for k in range(copies):
+
+        def rename(match, k=k):
+            name = match.group(1)
+            return "-> master" if name == "master" else f"-> {name}{k:03d}"
+
+        for module in MODULES:
+            short = module.__name__.rsplit(".", 1)[-1]
+            schema = dj.Schema(schema_name(args, f"{short}_{k:03d}"), context=context)
+            tables.append([])
+            for cls in module_tables(module):
+                attrs = {"definition": FOREIGN_KEY.sub(rename, cls.definition)}
+                if hasattr(cls, "contents"):
+                    attrs["contents"] = cls.contents
+                base = next(b for b in cls.__mro__[1:] if b.__module__.startswith("datajoint"))
+                table = type(f"{cls.__name__}{k:03d}", (base,), attrs)
+                context[table.__name__] = schema(table)
+                tables[-1].append(context[table.__name__])
+            schemas.append(schema)
+    return schemas, tables
+
+
+def drop(schemas):
+    """Drop generated schemas, downstream first."""
+    for schema in reversed(schemas):
+        schema.drop(prompt=False)
@@ -0,0 +1,108 @@
+"""
+Example: session-batched, vectorized ActivityStats for the electrophysiology tutorials.
+
+The tutorials' ``ActivityStats`` is keyed by neuron. Each ``make()`` fetches one
+trace with ``fetch1`` and computes three scalars. A session with thousands of
+units therefore costs thousands of round trips, transactions and tiny NumPy
+calls.
+
+The batched variant makes the session the unit of work. A master table keyed by
+``Session`` has one Part row per neuron. Its ``make()`` fetches the session's
+traces in blocks, stacks each block into a 2-D array, computes mean, std and
+max along the time axis in one pass, and inserts all Part rows in one
+statement. This follows the ``make()`` contract: the session is a single entity,
+and all of its neurons' statistics are written in the transaction
+``populate()`` opens for it.
+
+Usage:
+    from activity_stats_batched import session_activity_stats
+
+    @schema
+    class SessionActivityStats(dj.Computed):
+        definition = '''
+        -> Session
+        ---
+        n_neurons : int32
+        '''
+
+        class Unit(dj.Part):
+            definition = '''
+            -> master
+            -> Neuron
+            ---
+            mean_activity : float32
+            std_activity : float32
+            max_activity : float32
+            '''
+
+        def make(self, key):
+            stats = session_activity_stats(Neuron & key)
+            self.insert1({**key, 'n_neurons': len(stats)})
+            self.Unit.insert(stats)
+
+``SessionActivityStats.populate()`` then runs one ``make()`` per session. Query
+``SessionActivityStats.Unit`` wherever the tutorial queries ``ActivityStats``.
+"""
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 1000  # neurons fetched and stacked at a time
+
+
+def activity_stats(traces):
+    """
+    Mean, std and max of each trace.
+
+    Parameters
+    ----------
+    traces : sequence of array-like
+        One 1-D trace per neuron (arrays or ``NpyRef``). Equal-length traces
+        are stacked and reduced in one vectorized pass; ragged traces are
+        reduced one by one.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        ``(mean, std, max)``, one float32 value per trace.
+    """
+    traces = [np.asarray(trace) for trace in traces]
+    if not traces:
+        empty = np.empty(0, dtype=np.float32)
+        return empty, empty, empty
+    if len({trace.shape for trace in traces}) == 1:
+        stacked = np.stack(traces)
+        return (
+            stacked.mean(axis=1).astype(np.float32),
+            stacked.std(axis=1).astype(np.float32),
+            stacked.max(axis=1).astype(np.float32),
+        )
+    return tuple(
+        np.fromiter((reduce(trace) for trace in traces), dtype=np.float32, count=len(traces))
+        for reduce in (np.mean, np.std, np.max)
+    )
+
+
+def session_activity_stats(neurons, block_size=BLOCK_SIZE):
+    """
+    Per-neuron activity statistics for a restricted ``Neuron`` query.
+
+    Traces are fetched ``block_size`` neurons at a time, so memory is bounded
+    by one block regardless of the session size.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per neuron: the primary key of ``Neuron`` plus
+        ``mean_activity``, ``std_activity`` and ``max_activity``. Ready to pass
+        to ``Part.insert``.
+    """
+    traces = neurons.proj('activity')
+    blocks = []
+    for offset in range(0, len(traces), block_size):
+        rows = traces.to_pandas(order_by='KEY', limit=block_size, offset=offset).reset_index()
+        mean, std, peak = activity_stats(rows.pop('activity'))
+        blocks.append(rows.assign(mean_activity=mean, std_activity=std, max_activity=peak))
+    if not blocks:
+        return pd.DataFrame(columns=[*neurons.primary_key, 'mean_activity', 'std_activity', 'max_activity'])
+    return pd.concat(blocks, ignore_index=True)
@@ -0,0 +1,100 @@
+"""
+Example: a zero-copy codec for large contiguous NumPy arrays.
+
+``<blob>`` can serialize arbitrary Python structures, and it pays for that
+generality on every array. It builds the serialized value from several
+intermediate byte strings, may compress it, and on fetch it copies the payload
+into a new array. For large numeric attributes, those copies cost more than the
+database round trip.
+
+``<array>`` handles only one NumPy array with a fixed-size dtype, and it makes
+at most one copy in each direction:
+
+- **Encode**: a short header (dtype descriptor, shape, memory order) and a
+  buffer-protocol view of the array's memory are joined into one ``bytes``
+  value. That is the only copy, and the database driver needs it anyway
+  because it sends a single contiguous value. C- and Fortran-contiguous arrays
+  are not reordered. Other layouts are made contiguous first.
+- **Decode**: ``np.frombuffer`` views the fetched bytes at the header's offset.
+  No data is copied. The array is read-only because it shares memory with the
+  driver's buffer. Call ``.copy()`` if you need to modify it.
+
+With ``@``, the codec chains to ``<hash>``, so values are stored
+hash-addressed in an object store as with ``<blob@>``.
+
+``<array>`` also implements ``dj.SparkAdapter``. Numeric arrays render as
+nested lists (Spark ``ARRAY<...>``), so ``spark_export.py`` can publish them.
+
+Usage:
+    import array_codec  # registers <array>
+
+    @schema
+    class Recording(dj.Imported):
+        definition = '''
+        -> Session
+        ---
+        samples : <array>           # in-table
+        movie : <array@>            # in the default store
+        '''
+
+``benchmarks/bench_codec_throughput.py`` compares it with ``<blob>`` and ``<npy@>``.
+"""
+
+import json
+import struct
+
+import datajoint as dj
+import numpy as np
+from datajoint.errors import DataJointError
+from numpy.lib.format import descr_to_dtype, dtype_to_descr
+
+MAGIC = b"DJA\x01"
+ALIGN = 64  # payload offset alignment, so decoded views are aligned for any dtype
+
+
+def _header(array, order):
+    meta = json.dumps(
+        {"descr": dtype_to_descr(array.dtype), "shape": array.shape, "order": order}
+    ).encode()
+    offset = -(-(len(MAGIC) + 4 + len(meta)) // ALIGN) * ALIGN
+    return MAGIC + struct.pack("<I", offset) + meta.ljust(offset - len(MAGIC) - 4)
+
+
+class ArrayCodec(dj.Codec):
+    """Contiguous NumPy arrays, encoded with one copy and decoded as zero-copy views."""
+
+    name = "array"
+
+    def get_dtype(self, is_store):
+        return "<hash>" if is_store else "bytes"
+
+    def validate(self, value):
+        if not isinstance(value, np.ndarray):
+            raise DataJointError(f"<array> requires numpy.ndarray, got {type(value).__name__}")
+        if value.dtype.hasobject:
+            raise DataJointError("<array> does not support object dtype arrays")
+        if value.dtype.kind in "Mm":
+            raise DataJointError("<array> does not support datetime64 or timedelta64 arrays")
+
+    def encode(self, value, *, key=None, store_name=None):
+        if value.flags.c_contiguous:
+            order, data = "C", value
+        elif value.flags.f_contiguous:
+            order, data = "F", value.T  # C-contiguous view of the same memory
+        else:
+            order, data = "C", np.ascontiguousarray(value)
+        return b"".join([_header(value, order), data.reshape(-1).view(np.uint8)])
+
+    def decode(self, stored, *, key=None):
+        view = memoryview(stored)
+        if view[:len(MAGIC)] != MAGIC:
+            raise DataJointError("<array>: value was not written by this codec")
+        (offset,) = struct.unpack_from("<I", view, len(MAGIC))
+        meta = json.loads(bytes(view[len(MAGIC) + 4:offset]))
+        dtype = descr_to_dtype(meta["descr"])
+        count = int(np.prod(meta["shape"], dtype=np.int64))
+        array = np.frombuffer(view, dtype=dtype, count=count, offset=offset)
+        return array.reshape(meta["shape"], order=meta["order"])
+
+    def to_spark(self, decoded, *, key=None):
+        return decoded.tolist()
@@ -0,0 +1,205 @@
+"""
+Example: cascade delete through materialized temporary key sets.
+
+``Table.delete()`` plans the cascade with ``dj.Diagram.cascade()``. Each
+descendant's restriction is an expression built from its parent's restriction,
+so a table N foreign keys below the seed is restricted by a subquery nested N
+levels deep. Every per-table ``DELETE`` evaluates its whole chain again, and on
+a deep master-part graph the cost grows with the square of the depth.
+
+``batched_delete(table_expr)`` uses the same cascade plan but executes it
+differently:
+
+- Tables are visited parents first. Each table's restriction is
+  materialized once, into a temporary table holding only its primary key. A
+  table's keys are its rows that match, through each foreign key, the key set
+  already materialized for a parent. This is one indexed join per foreign key,
+  and it never reaches further up the graph.
+- The seed, and masters pulled in by ``part_integrity="cascade"``, are filled
+  from their own restriction. The cascade plan has already materialized
+  masters to literal key lists.
+- Tables are then deleted leaves first, each with one ``DELETE`` joined to its
+  key set. All of this runs on the table's connection in one transaction.
+- ``part_integrity="enforce"`` is checked from the key sets before anything is
+  deleted, with the table-level semantics of the cascade specification.
+
+Usage:
+    from batched_cascade import batched_delete
+
+    stats = batched_delete(Session & {'subject_id': 'M001', 'session_id': 3})
+    for table, s in stats.items():
+        print(table, s['rows'], s['materialize_s'], s['delete_s'])
+
+    batched_delete(Session.Recording & key, part_integrity='cascade')
+    batched_delete(Subject & 'species = "mouse"', dry_run=True)  # counts only
+
+There is no confirmation prompt. Use ``dry_run=True`` or
+``dj.Diagram.cascade(...).counts()`` to preview a delete. Objects in stores
+are left for garbage collection, as with ``delete()``.
+"""
+
+import logging
+import time
+
+import datajoint as dj
+from datajoint.dependencies import extract_master
+from datajoint.errors import DataJointError
+
+logger = logging.getLogger(__name__)
+
+TEMP_PREFIX = "_dj_cascade_"
+
+
+def foreign_keys(dependencies, child):
+    """``(parent, attr_map)`` for each foreign key of ``child``, through alias nodes of renamed keys."""
+    for parent, _, props in dependencies.in_edges(child, data=True):
+        if parent.isdigit():  # alias node of a renamed foreign key
+            for source, _, _ in dependencies.in_edges(parent, data=True):
+                yield source, props["attr_map"]
+        else:
+            yield parent, props["attr_map"]
+
+
+class KeySets:
+    """Temporary primary-key tables on one connection, one per table of a cascade."""
+
+    def __init__(self, connection, database):
+        self.connection = connection
+        self.postgres = dj.config["database.backend"] == "postgresql"
+        self.q = '"' if self.postgres else "`"
+        # MySQL temporary tables live in a database; PostgreSQL ones in pg_temp
+        self.prefix = "" if self.postgres else f"`{database}`."
+        self.tables = {}  # full table name -> (temporary table, primary key)
+
+    def columns(self, names, alias=None):
+        head = f"{alias}." if alias else ""
+        return ", ".join(f"{head}{self.q}{name}{self.q}" for name in names)
+
+    def create(self, name, primary_key):
+        temp = f"{self.prefix}{self.q}{TEMP_PREFIX}{len(self.tables)}{self.q}"
+        pk = self.columns(primary_key)
+        if self.postgres:
+            self.connection.query(f"CREATE TEMPORARY TABLE {temp} AS SELECT {pk} FROM {name} WHERE 1 = 0")
+            self.connection.query(f"ALTER TABLE {temp} ADD PRIMARY KEY ({pk})")
+        else:  # ALTER TABLE would commit the transaction
+            self.connection.query(
+                f"CREATE TEMPORARY TABLE {temp} (PRIMARY KEY ({pk})) SELECT {pk} FROM {name} WHERE 1 = 0"
+            )
+        self.tables[name] = (temp, primary_key)
+
+    def _insert(self, name, select):
+        temp, _ = self.tables[name]
+        if self.postgres:
+            self.connection.query(f"INSERT INTO {temp} {select} ON CONFLICT DO NOTHING")
+        else:
+            self.connection.query(f"INSERT IGNORE INTO {temp} {select}")
+
+    def add_query(self, name, query):
+        """Add the keys of ``query``, a restriction of table ``name``."""
+        pk = self.columns(self.tables[name][1])
+        self._insert(name, f"SELECT DISTINCT {pk} FROM ({query.proj().make_sql()}) AS src")
+
+    def add_children(self, name, parent, attr_map):
+        """Add the rows of ``name`` whose foreign key ``attr_map`` matches a key of ``parent``."""
+        parent_temp, _ = self.tables[parent]
+        on = " AND ".join(
+            f"c.{self.q}{fk}{self.q} = p.{self.q}{pk}{self.q}" for fk, pk in attr_map.items()
+        )
+        pk = self.columns(self.tables[name][1], alias="c")
+        self._insert(name, f"SELECT DISTINCT {pk} FROM {parent_temp} AS p JOIN {name} AS c ON {on}")
+
+    def count(self, name):
+        return self.connection.query(f"SELECT COUNT(*) FROM {self.tables[name][0]}").fetchone()[0]
+
+    def delete(self, name):
+        """Delete the rows of ``name`` in its key set; returns the number deleted."""
+        temp, primary_key = self.tables[name]
+        on = " AND ".join(f"t.{self.q}{k}{self.q} = k.{self.q}{k}{self.q}" for k in primary_key)
+        if self.postgres:
+            sql = f"DELETE FROM {name} AS t USING {temp} AS k WHERE {on}"
+        else:
+            sql = f"DELETE t FROM {name} AS t JOIN {temp} AS k ON {on}"
+        return self.connection.query(sql).rowcount
+
+    def drop(self):
+        keyword = "TABLE" if self.postgres else "TEMPORARY TABLE"
+        for temp, _ in self.tables.values():
+            self.connection.query(f"DROP {keyword} IF EXISTS {temp}")
+        self.tables.clear()
+
+
+def batched_delete(table_expr, part_integrity="enforce", dry_run=False):
+    """
+    Cascade-delete ``table_expr`` through one materialized key set per table.
+
+    Parameters
+    ----------
+    table_expr : QueryExpression
+        Restricted table to delete from, as for ``Table.delete()``.
+    part_integrity : str
+        ``"enforce"``, ``"ignore"`` or ``"cascade"``, as for ``Table.delete()``.
+    dry_run : bool
+        Materialize and count the key sets without deleting.
+
+    Returns
+    -------
+    dict
+        For each table visited, parents first: ``rows`` to delete,
+        ``materialize_s`` and ``delete_s``.
+
+    Raises
+    ------
+    DataJointError
+        With ``part_integrity="enforce"``, if part rows would be deleted
+        without any row of their master. Nothing is deleted.
+    """
+    start = time.perf_counter()
+    diagram = dj.Diagram.cascade(table_expr, part_integrity=part_integrity)
+    tables = {ft.full_table_name: ft for ft in diagram}
+    connection = table_expr.connection
+    dependencies = connection.dependencies
+    logger.info(f"Cascade plan: {len(tables)} tables in {time.perf_counter() - start:.2f} s")
+
+    masters = {extract_master(name) for name in tables} if part_integrity == "cascade" else set()
+    seed = table_expr.full_table_name
+    stats = {}
+    key_sets = KeySets(connection, table_expr.database)
+    try:
+        with connection.transaction:
+            for name, ft in tables.items():
+                start = time.perf_counter()
+                key_sets.create(name, ft.primary_key)
+                parents = [(p, m) for p, m in foreign_keys(dependencies, name) if p in tables and p != name]
+                if name == seed:
+                    key_sets.add_query(name, table_expr)
+                elif not parents or name in masters:
+                    key_sets.add_query(name, ft)
+                for parent, attr_map in parents:
+                    key_sets.add_children(name, parent, attr_map)
+                stats[name] = {
+                    "rows": key_sets.count(name),
+                    "materialize_s": time.perf_counter() - start,
+                    "delete_s": 0.0,
+                }
+
+            if part_integrity == "enforce":
+                for name, s in stats.items():
+                    master = extract_master(name)
+                    if s["rows"] and master and not stats.get(master, {}).get("rows"):
+                        raise DataJointError(
+                            f"Attempt to delete part table {name} before deleting from its master "
+                            f"{master} first. Use part_integrity='ignore' or 'cascade'."
+                        )
+
+            if not dry_run:
+                for name in reversed(list(stats)):
+                    if stats[name]["rows"]:
+                        start = time.perf_counter()
+                        key_sets.delete(name)
+                        stats[name]["delete_s"] = time.perf_counter() - start
+    finally:
+        key_sets.drop()
+
+    total = sum(s["rows"] for s in stats.values())
+    logger.info(f"{'Would delete' if dry_run else 'Deleted'} {total:,} rows from {len(stats)} tables")
+    return stats
@@ -0,0 +1,172 @@
+"""
+Example: cached layout and collapsible rendering for large multi-schema diagrams.
+
+Graphviz layout dominates the cost of rendering ``dj.Diagram`` for pipelines with
+hundreds of tables. This module computes the layout once, stores it on disk keyed
+by a hash of the rendered graph structure, and renders later requests from the
+stored node positions with ``neato -n2``, which skips layout entirely.
+
+Whole modules (schemas) can be collapsed into single nodes and expanded again one
+at a time; each collapse state has its own cached layout, so switching back and
+forth is instant after the first render. Zoomed-in views of a subset of tables
+reuse the positions of the full layout, which keeps them fast and visually stable.
+
+Usage:
+    from diagram_layout_cache import CachedDiagram
+    from demo_modules import acquisition, processing, analysis
+
+    diagram = CachedDiagram(acquisition, processing, analysis)
+    diagram.collapse(processing, analysis).save("overview.svg")
+    diagram.expand(processing).save("processing.svg")
+    diagram.save("session.svg", zoom=[acquisition.Session, processing.ProcessedSession])
+
+Requires pydot and the Graphviz executables (``dot``, ``neato``).
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import datajoint as dj
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("DJ_DIAGRAM_CACHE", Path.home() / ".cache" / "datajoint-diagrams")
+)
+
+
+class CachedDiagram:
+    """
+    Multi-schema diagram with a persistent layout cache.
+
+    Parameters
+    ----------
+    *modules : module or dj.Schema
+        Sources to draw, one per schema, in the order they should be combined.
+    cache_dir : Path, optional
+        Directory holding cached layouts and renders.
+    """
+
+    def __init__(self, *modules, cache_dir=DEFAULT_CACHE_DIR):
+        self.modules = list(modules)
+        self.collapsed = set()
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def collapse(self, *modules):
+        """Collapse the given modules (default: all) into single nodes."""
+        self.collapsed.update(id(m) for m in (modules or self.modules))
+        return self
+
+    def expand(self, *modules):
+        """Expand the given modules (default: all) back to their tables."""
+        self.collapsed.difference_update(id(m) for m in (modules or self.modules))
+        return self
+
+    def diagram(self):
+        """The ``dj.Diagram`` for the current collapse state."""
+        parts = [
+            dj.Diagram(m).collapse() if id(m) in self.collapsed else dj.Diagram(m)
+            for m in self.modules
+        ]
+        diagram = parts[0]
+        for part in parts[1:]:
+            diagram = diagram + part
+        return diagram
+
+    def structure_key(self, dot):
+        """
+        Hash of the graph to be laid out: nodes, edges, labels, styles and direction.
+
+        The DOT source captures every input to the layout, so any schema change
+        that affects the drawing (a new table, a new foreign key, a collapsed
+        module) produces a new key, and unchanged structure reuses the cache.
+        """
+        source = dot.to_string() + dj.config.display.diagram_direction
+        return hashlib.sha256(source.encode()).hexdigest()[:32]
+
+    def layout(self):
+        """
+        Laid-out DOT source (with ``pos`` attributes) for the current state.
+
+        Returns
+        -------
+        tuple[str, str]
+            (structure key, laid-out DOT source).
+        """
+        dot = self.diagram().make_dot()
+        key = self.structure_key(dot)
+        path = self.cache_dir / f"{key}.dot"
+        if path.exists():
+            self.hits += 1
+            return key, path.read_text()
+        self.misses += 1
+        laid_out = dot.create(prog="dot", format="dot").decode()
+        path.write_text(laid_out)
+        return key, laid_out
+
+    def make_svg(self, zoom=None):
+        """
+        Render the diagram as SVG bytes.
+
+        Full renders are cached per structure key. With ``zoom``, only the listed
+        tables (and edges among them) are drawn, at their positions in the full
+        layout; schema cluster outlines are not drawn in zoomed views.
+
+        Parameters
+        ----------
+        zoom : iterable of tables, optional
+            Tables to show.
+        """
+        import pydot
+
+        key, laid_out = self.layout()
+        if zoom is None:
+            path = self.cache_dir / f"{key}.svg"
+            if path.exists():
+                return path.read_bytes()
+            (graph,) = pydot.graph_from_dot_data(laid_out)
+            svg = graph.create(prog=["neato", "-n2"], format="svg")
+            path.write_bytes(svg)
+            return svg
+
+        # Node names in the DOT source depend on how DataJoint labels tables, so
+        # take them from a diagram of just the zoomed tables rather than guessing
+        zoom = list(zoom)
+        subset = dj.Diagram(zoom[0])
+        for table in zoom[1:]:
+            subset = subset + dj.Diagram(table)
+        keep = _node_names(subset.make_dot())
+        (graph,) = pydot.graph_from_dot_data(laid_out)
+        _restrict(graph, keep)
+        return graph.create(prog=["neato", "-n2"], format="svg")
+
+    def save(self, filename, zoom=None):
+        """Write the SVG rendering to ``filename``."""
+        Path(filename).write_bytes(self.make_svg(zoom=zoom))
+        return self
+
+    def _repr_svg_(self):
+        return self.make_svg().decode()
+
+
+def _node_names(graph):
+    """Names of all nodes in a pydot graph, including nodes inside clusters."""
+    names = {node.get_name() for node in graph.get_nodes()}
+    for subgraph in graph.get_subgraphs():
+        names |= _node_names(subgraph)
+    return names
+
+
+def _restrict(graph, keep):
+    """Remove nodes not in ``keep`` (and their edges) from a pydot graph, in place."""
+    for node in graph.get_nodes():
+        name = node.get_name()
+        if name not in keep and name not in ("node", "edge", "graph"):
+            graph.del_node(name)
+    for edge in graph.get_edges():
+        if edge.get_source() not in keep or edge.get_destination() not in keep:
+            graph.del_edge(edge.get_source(), edge.get_destination())
+    for subgraph in graph.get_subgraphs():
+        _restrict(subgraph, keep)
@@ -0,0 +1,154 @@
+"""
+Example: memory-mapped, batched ingest for the electrophysiology tutorials' ``Neuron`` table.
+
+The tutorials' ``Neuron.make`` loads the whole session array with
+``np.load(filepath)`` and then calls ``insert1`` once per neuron. That costs one
+INSERT round trip per neuron and holds the full array in memory. With
+``<npy@ephys>`` it also means one synchronous store upload per neuron.
+
+This module replaces that pattern with three pieces:
+
+- ``np.load(filepath, mmap_mode='r')`` maps the session file, and each neuron's
+  trace is a zero-copy view of its row.
+- ``neuron_rows`` builds all rows of the session, and a single ``insert`` sends
+  them in one statement. Pass ``chunk_size`` to ``insert`` to bound the size of
+  a statement.
+- ``<npy_async@store>`` is a drop-in alternative to ``<npy@store>`` that uploads
+  on a thread pool inside a ``concurrent_uploads()`` block. It writes the same
+  ``.npy`` files and JSON metadata and returns the same ``NpyRef`` on fetch.
+
+Usage:
+    import ephys_ingest  # registers <npy_async>
+    from ephys_ingest import concurrent_uploads, neuron_rows
+
+    @schema
+    class Neuron(dj.Imported):
+        definition = '''
+        -> Session
+        neuron_id : int16
+        ---
+        activity : <npy_async@ephys>    # neural activity trace (lazy loading)
+        '''
+
+        def make(self, key):
+            filepath = DATA_DIR / f"data_{key['mouse_id']}_{key['session_date']}.npy"
+            data = np.load(filepath, mmap_mode='r')
+            with concurrent_uploads():
+                self.insert(neuron_rows(key, data))
+
+``concurrent_uploads()`` waits for every upload to finish before the block
+exits, and re-raises the first upload error. ``make()`` therefore fails and
+its transaction rolls back unless every object has reached the store. Files
+left behind by a failed run are not referenced by any row, and
+``dj.gc.GarbageCollector(schema, store='ephys').collect(dry_run=False)``
+removes them. Outside a ``concurrent_uploads()`` block
+``<npy_async>`` uploads synchronously, exactly like ``<npy>``.
+"""
+
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import datajoint as dj
+import numpy as np
+from datajoint.errors import DataJointError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_THREADS = 16
+MAX_PENDING = 64  # uploads held in memory at once
+
+_uploads = ContextVar("npy_async_uploads", default=None)
+
+
+class _Uploads:
+    """Thread pool plus a bound on buffers waiting to be uploaded."""
+
+    def __init__(self, threads, max_pending):
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="npy-upload")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.futures = []
+        self.count = 0
+        self.bytes = 0
+
+    def submit(self, backend, data, path):
+        self.slots.acquire()  # backpressure: encode blocks while too many uploads are pending
+        future = self.pool.submit(backend.put_buffer, data, path)
+        future.add_done_callback(lambda _: self.slots.release())
+        self.futures.append(future)
+        self.count += 1
+        self.bytes += len(data)
+
+    def wait(self):
+        """Wait for all uploads; raise the first error."""
+        self.pool.shutdown(wait=True)
+        for future in self.futures:
+            future.result()
+
+
+@contextmanager
+def concurrent_uploads(threads=UPLOAD_THREADS, max_pending=MAX_PENDING):
+    """
+    Upload ``<npy_async>`` values on a thread pool within this block.
+
+    Yields
+    ------
+    _Uploads
+        Has ``count`` and ``bytes`` of the uploads started in the block.
+    """
+    uploads = _Uploads(threads, max_pending)
+    token = _uploads.set(uploads)
+    try:
+        yield uploads
+    except BaseException:
+        _uploads.reset(token)
+        try:
+            uploads.wait()
+        except Exception:  # keep the block's own exception
+            logger.warning("Upload failed after an error in the concurrent_uploads() block", exc_info=True)
+        raise
+    _uploads.reset(token)
+    uploads.wait()
+
+
+class NpyAsyncCodec(dj.SchemaCodec):
+    """``<npy@>``-compatible codec that can upload concurrently."""
+
+    name = "npy_async"
+
+    def validate(self, value):
+        if not isinstance(value, np.ndarray):
+            raise DataJointError(f"<npy_async> requires numpy.ndarray, got {type(value).__name__}")
+        if value.dtype == object:
+            raise DataJointError("<npy_async> does not support object dtype arrays")
+
+    def encode(self, value, *, key=None, store_name=None):
+        schema, table, field, pk = self._extract_context(key)
+        path, _ = self._build_path(schema, table, field, pk, ext=".npy", store_name=store_name)
+        backend = self._get_backend(store_name)
+
+        buffer = io.BytesIO()
+        np.save(buffer, value, allow_pickle=False)  # reads memory-mapped rows directly
+        uploads = _uploads.get()
+        if uploads is None:
+            backend.put_buffer(buffer.getvalue(), path)
+        else:
+            uploads.submit(backend, buffer.getvalue(), path)
+
+        return {"path": path, "store": store_name, "dtype": str(value.dtype), "shape": list(value.shape)}
+
+    def decode(self, stored, *, key=None):
+        return dj.get_codec("npy").decode(stored, key=key)
+
+
+def neuron_rows(key, data):
+    """
+    One row per neuron of a ``(n_neurons, n_timepoints)`` session array.
+
+    Rows hold views of ``data``; with a memory-mapped array no trace is
+    copied until it is serialized for the insert.
+    """
+    return [{**key, 'neuron_id': neuron_id, 'activity': data[neuron_id]} for neuron_id in range(len(data))]
@@ -0,0 +1,120 @@
+"""
+Example: tiled, multi-core escape-time engine for the fractal tutorial's Julia sets.
+
+The tutorial's ``julia()`` iterates over full-frame arrays: every iteration does
+masked fancy indexing and recomputes ``np.abs(z)`` over the whole image, even
+after most points have escaped. That is fine at 256×256 but not at 4k×4k.
+
+This engine splits the image into tiles and processes them on a process pool.
+Within a tile, only points that are still bounded are kept, in compact arrays
+that shrink as points escape, and the update ``z = z**2 + c`` is done in place.
+The result is identical to ``julia()``: each pixel counts the iterations during
+which its orbit stayed inside the radius-2 disk.
+
+Usage:
+    from julia_tiled import julia_tiled
+
+    img = julia_tiled(-0.4 + 0.6j, size=4096, processes=8)
+
+In a pipeline, drop it into the tutorial's ``JuliaImage.make``:
+
+    def make(self, key):
+        spec = (JuliaSpec & key).fetch1()
+        start = time.perf_counter()
+        img = julia_tiled(spec['c_real'] + 1j * spec['c_imag'], size=4096)
+        logger.info(f"{img.size / (time.perf_counter() - start):,.0f} pixels/s")
+        ...
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import numpy as np
+
+TILE_SIZE = 512
+
+
+def escape_counts(c, x, y, iters):
+    """
+    Escape-time counts for the grid ``x`` × ``y`` (one tile).
+
+    Parameters
+    ----------
+    c : complex
+        Julia set constant.
+    x, y : np.ndarray
+        1-D coordinates of the tile's columns and rows.
+    iters : int
+        Maximum number of iterations.
+
+    Returns
+    -------
+    np.ndarray
+        ``(len(y), len(x))`` float64 array of iteration counts.
+    """
+    z = (x[None, :] + 1j * y[:, None]).ravel()
+    counts = np.empty(z.size)
+    active = np.arange(z.size)
+    for k in range(1, iters + 1):
+        np.multiply(z, z, out=z)
+        z += c
+        bounded = z.real * z.real + z.imag * z.imag < 4.0
+        if not bounded.all():
+            # Escaped points stop counting; drop them from the working set
+            counts[active[~bounded]] = k - 1
+            active = active[bounded]
+            z = z[bounded]
+            if not active.size:
+                break
+    counts[active] = iters
+    return counts.reshape(len(y), len(x))
+
+
+def _tile(args):
+    return escape_counts(*args)
+
+
+def julia_tiled(
+    c, size=256, center=(0.0, 0.0), zoom=1.0, iters=256, tile=TILE_SIZE, processes=None
+):
+    """
+    Generate a Julia set image; drop-in replacement for the tutorial's ``julia()``.
+
+    Parameters
+    ----------
+    c : complex
+        Julia set constant.
+    size : int
+        Image width and height in pixels.
+    center : tuple[float, float]
+        Center of the view in the complex plane.
+    zoom : float
+        Magnification; the view spans ``[-1, 1] / zoom`` around ``center``.
+    iters : int
+        Maximum number of iterations.
+    tile : int
+        Tile width and height in pixels.
+    processes : int, optional
+        Worker processes (default: number of CPUs). ``1`` runs in-process.
+
+    Returns
+    -------
+    np.ndarray
+        ``(size, size)`` float64 image of iteration counts.
+    """
+    x = np.linspace(-1, 1, size) / zoom + center[0]
+    y = np.linspace(-1, 1, size) / zoom + center[1]
+    bounds = [
+        (r, min(r + tile, size), q, min(q + tile, size))
+        for r in range(0, size, tile)
+        for q in range(0, size, tile)
+    ]
+    jobs = [(c, x[q0:q1], y[r0:r1], iters) for r0, r1, q0, q1 in bounds]
+
+    img = np.empty((size, size))
+    serial = processes == 1 or len(jobs) == 1
+    with nullcontext() if serial else ProcessPoolExecutor(max_workers=processes) as pool:
+        results = map(_tile, jobs) if serial else pool.map(_tile, jobs)
+        for (r0, r1, q0, q1), counts in zip(bounds, results):
+            img[r0:r1, q0:q1] = counts
+    return img
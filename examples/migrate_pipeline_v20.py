@@ -10,11 +10,16 @@ Usage:
     python migrate_pipeline_v20.py --phase 3  # Migrate test data
     python migrate_pipeline_v20.py --phase 4  # Validate
     python migrate_pipeline_v20.py --phase 5  # Production cutover
+
+    python migrate_pipeline_v20.py --plan --parallel 4  # Dry-run cost estimate
 """
 
 import argparse
+import heapq
+import json
 import logging
 import sys
+import time
 from pathlib import Path
 
 import datajoint as dj
@@ -32,6 +37,10 @@ PROD_SCHEMA = "my_pipeline"
 TEST_SCHEMA = "my_pipeline_v20"
 BACKUP_SCHEMA = "my_pipeline_backup"
 
+# Planner configuration
+PLAN_SAMPLE_ROWS = 1000  # Rows copied per table to measure throughput
+BLOB_TYPES = ("tinyblob", "blob", "mediumblob", "longblob")
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -88,6 +97,9 @@ def phase_2_code_update():
     logger.info("   OLD: int unsigned → NEW: uint32")
     logger.info("   OLD: external-store → NEW: <blob@store>")
     logger.info("")
+    logger.info("   Blob payloads are re-encoded after phase 3 copies the other columns:")
+    logger.info("   python reencode_blobs_v20.py --table <table> --attribute <attr> ...")
+    logger.info("")
     logger.info("See: https://docs.datajoint.com/how-to/migrate-to-v20")
     logger.info("")
     logger.info("After updating code, run: python migrate_pipeline_v20.py --phase 3")
@@ -276,19 +288,311 @@ def phase_5_cutover():
     logger.info("  4. After 1-2 weeks, drop old schema and backups")
 
 
+def _format_bytes(n):
+    """Format a byte count for log output."""
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if abs(n) < 1024 or unit == "TB":
+            return f"{n:.1f} {unit}"
+        n /= 1024
+
+
+def _format_seconds(s):
+    """Format a duration in seconds as h:mm:ss."""
+    s = int(round(s))
+    return f"{s // 3600}:{s % 3600 // 60:02d}:{s % 60:02d}"
+
+
+def collect_table_stats(conn, schema):
+    """
+    Collect row counts, data lengths and blob column sizes for each table.
+
+    Row counts come from COUNT(*) rather than information_schema.TABLES.TABLE_ROWS,
+    which is only an estimate for InnoDB. In-table blob sizes are extrapolated
+    from the average blob length over a sample of rows.
+    """
+    rows = conn.query(
+        f"""
+        SELECT TABLE_NAME, DATA_LENGTH, INDEX_LENGTH
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = '{schema}'
+        AND TABLE_NAME NOT LIKE '~%'
+        AND TABLE_NAME NOT LIKE '#%'
+        ORDER BY TABLE_NAME
+    """
+    ).fetchall()
+
+    stats = {}
+    for table, data_length, index_length in rows:
+        blob_columns = [
+            row[0]
+            for row in conn.query(
+                f"""
+                SELECT COLUMN_NAME FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{table}'
+                AND DATA_TYPE IN ({", ".join(f"'{t}'" for t in BLOB_TYPES)})
+            """
+            ).fetchall()
+        ]
+        # Pre-2.0 external attributes are binary(16) UUIDs tagged in the comment
+        external_columns = [
+            row[0]
+            for row in conn.query(
+                f"""
+                SELECT COLUMN_NAME FROM information_schema.COLUMNS
+                WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{table}'
+                AND COLUMN_COMMENT REGEXP '^:(blob|attach|filepath)@'
+            """
+            ).fetchall()
+        ]
+        row_count = conn.query(f"SELECT COUNT(*) FROM `{schema}`.`{table}`").fetchone()[0]
+
+        blob_bytes = 0
+        if blob_columns and row_count:
+            lengths = " + ".join(f"COALESCE(LENGTH(`{c}`), 0)" for c in blob_columns)
+            avg = conn.query(
+                f"SELECT AVG(n) FROM (SELECT {lengths} AS n "
+                f"FROM `{schema}`.`{table}` LIMIT {PLAN_SAMPLE_ROWS}) AS sample"
+            ).fetchone()[0]
+            blob_bytes = int((avg or 0) * row_count)
+
+        stats[table] = {
+            "rows": row_count,
+            "data_bytes": int(data_length or 0),
+            "index_bytes": int(index_length or 0),
+            "blob_columns": blob_columns,
+            "blob_bytes": blob_bytes,
+            "external_columns": external_columns,
+        }
+    return stats
+
+
+def collect_external_stats(conn, schema):
+    """Sum the tracked object sizes in each pre-2.0 ``~external_<store>`` table."""
+    stores = [
+        row[0]
+        for row in conn.query(
+            f"""
+            SELECT TABLE_NAME FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME LIKE '~external\\_%'
+        """
+        ).fetchall()
+    ]
+    external = {}
+    for table in stores:
+        count, size = conn.query(
+            f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM `{schema}`.`{table}`"
+        ).fetchone()
+        external[table[len("~external_"):]] = {"objects": int(count), "bytes": int(size)}
+    return external
+
+
+def time_sample_copy(conn, table, sample_rows):
+    """
+    Copy a sample of rows into the parallel schema and time it.
+
+    The sample is removed again afterwards, so the plan leaves the parallel
+    schema as it found it. Tables that already hold data are not touched.
+    Foreign key checks are disabled for the session so that tables can be
+    sampled independently of their parents.
+
+    Returns
+    -------
+    tuple[int, float, float]
+        (rows_copied, copy_seconds, validate_seconds). ``validate_seconds`` is
+        the time ``compare_query_results`` takes on the sample, compared with
+        itself in the parallel schema, as phase 4 compares each table.
+    """
+    existing = conn.query(f"SELECT COUNT(*) FROM `{TEST_SCHEMA}`.`{table}`").fetchone()[0]
+    if existing:
+        logger.warning(f"  ! {TEST_SCHEMA}.{table} is not empty; skipping sample copy")
+        return 0, 0.0, 0.0
+
+    conn.query("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        start = time.perf_counter()
+        result = copy_table_data(
+            source_schema=PROD_SCHEMA,
+            dest_schema=TEST_SCHEMA,
+            table=table,
+            limit=sample_rows,
+        )
+        copy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compare_query_results(
+            prod_schema=TEST_SCHEMA,
+            test_schema=TEST_SCHEMA,
+            table=table,
+            tolerance=1e-6,
+        )
+        validate_seconds = time.perf_counter() - start
+    finally:
+        try:
+            conn.query(f"DELETE FROM `{TEST_SCHEMA}`.`{table}`")
+        finally:
+            conn.query("SET FOREIGN_KEY_CHECKS = 1")
+
+    return result["rows_copied"], copy_seconds, validate_seconds
+
+
+def schedule(durations, parallel):
+    """
+    Estimate the wall time of running tasks on ``parallel`` workers.
+
+    Uses longest-processing-time-first assignment, which is what a work queue
+    feeding idle workers converges to when the largest tables are started first.
+    """
+    workers = [0.0] * max(parallel, 1)
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(workers, workers[0] + duration)
+    return max(workers)
+
+
+def plan_migration(parallel=1, sample_rows=PLAN_SAMPLE_ROWS, output=None):
+    """
+    Dry-run planner: project the time and storage cost of phases 3 and 4.
+
+    Requires the parallel schema from phase 1. For each table the planner
+    collects sizes, copies a small sample to measure throughput and projects
+    per-table copy and validation time. Totals are projected for the
+    requested number of parallel workers.
+    """
+    logger.info("=== Migration Plan (dry run) ===")
+    logger.info(f"Source: {PROD_SCHEMA}  Destination: {TEST_SCHEMA}  Parallelism: {parallel}")
+
+    conn = dj.conn()
+    stats = collect_table_stats(conn, PROD_SCHEMA)
+    external = collect_external_stats(conn, PROD_SCHEMA)
+    logger.info(f"Found {len(stats)} tables and {len(external)} external stores")
+
+    plan = {}
+    for table, s in stats.items():
+        logger.info(f"Sampling {table} ({s['rows']} rows)...")
+        copied, copy_seconds, validate_seconds = (
+            time_sample_copy(conn, table, sample_rows) if s["rows"] else (0, 0.0, 0.0)
+        )
+        if copied:
+            # A sample too fast to time has no rate (null in the JSON plan)
+            copy_rate = copied / copy_seconds if copy_seconds else None
+            read_rate = copied / validate_seconds if validate_seconds else None
+            copy_estimate = s["rows"] / copy_rate if copy_rate else 0.0
+            validate_estimate = s["rows"] / read_rate if read_rate else 0.0
+        else:
+            copy_rate = read_rate = copy_estimate = validate_estimate = None
+        plan[table] = {
+            **s,
+            "sample_rows": copied,
+            "copy_rows_per_s": copy_rate,
+            "validate_rows_per_s": read_rate,
+            "copy_seconds": copy_estimate,
+            "validate_seconds": validate_estimate,
+        }
+
+    # Tables that could not be sampled borrow the median measured rate
+    measured = sorted(p["copy_rows_per_s"] for p in plan.values() if p["copy_rows_per_s"])
+    measured_read = sorted(p["validate_rows_per_s"] for p in plan.values() if p["validate_rows_per_s"])
+    for p in plan.values():
+        if p["copy_seconds"] is None:
+            p["copy_seconds"] = p["rows"] / measured[len(measured) // 2] if measured else 0.0
+            p["validate_seconds"] = (
+                p["rows"] / measured_read[len(measured_read) // 2] if measured_read else 0.0
+            )
+            p["estimated_from_median"] = bool(p["rows"])
+
+    logger.info("")
+    logger.info(
+        f"{'table':<40} {'rows':>12} {'data':>10} {'blobs':>10} {'copy':>9} {'validate':>9}"
+    )
+    for table, p in plan.items():
+        flag = " *" if p.get("estimated_from_median") else ""
+        logger.info(
+            f"{table:<40} {p['rows']:>12} {_format_bytes(p['data_bytes']):>10} "
+            f"{_format_bytes(p['blob_bytes']):>10} {_format_seconds(p['copy_seconds']):>9} "
+            f"{_format_seconds(p['validate_seconds']):>9}{flag}"
+        )
+    if any(p.get("estimated_from_median") for p in plan.values()):
+        logger.info("  * not sampled; projected from the median rate of sampled tables")
+
+    if external:
+        logger.info("")
+        logger.info("External stores to re-encode in phase 3:")
+        for store, e in external.items():
+            logger.info(f"  {store}: {e['objects']} objects, {_format_bytes(e['bytes'])}")
+
+    copy_total = schedule([p["copy_seconds"] for p in plan.values()], parallel)
+    validate_total = schedule([p["validate_seconds"] for p in plan.values()], parallel)
+    storage_total = sum(p["data_bytes"] + p["index_bytes"] for p in plan.values())
+    external_total = sum(e["bytes"] for e in external.values())
+
+    logger.info("")
+    logger.info(f"Projected totals with {parallel} worker(s):")
+    logger.info(f"  Phase 3 copy:       {_format_seconds(copy_total)}")
+    logger.info(f"  Phase 4 validation: {_format_seconds(validate_total)}")
+    logger.info(f"  Database storage:   {_format_bytes(storage_total)} (data + indexes)")
+    logger.info(f"  In-table blobs:     {_format_bytes(sum(p['blob_bytes'] for p in plan.values()))}")
+    logger.info(f"  External objects:   {_format_bytes(external_total)}")
+    logger.info("\nProjections are extrapolated from small samples; add a safety margin.")
+
+    if output:
+        summary = {
+            "source": PROD_SCHEMA,
+            "dest": TEST_SCHEMA,
+            "parallel": parallel,
+            "sample_rows": sample_rows,
+            "tables": plan,
+            "external_stores": external,
+            "totals": {
+                "copy_seconds": copy_total,
+                "validate_seconds": validate_total,
+                "storage_bytes": storage_total,
+                "external_bytes": external_total,
+            },
+        }
+        Path(output).write_text(json.dumps(summary, indent=2))
+        logger.info(f"Plan written to {output}")
+
+    return plan
+
+
 def main():
     """Main entry point."""
     parser = argparse.ArgumentParser(description="Migrate DataJoint pipeline to 2.0")
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
         "--phase",
         type=int,
         choices=[1, 2, 3, 4, 5],
-        required=True,
         help="Migration phase to execute",
     )
+    mode.add_argument(
+        "--plan",
+        action="store_true",
+        help="Estimate time and storage for phases 3 and 4 without migrating (run after phase 1)",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Number of parallel workers to project totals for (with --plan)",
+    )
+    parser.add_argument(
+        "--sample-rows",
+        type=int,
+        default=PLAN_SAMPLE_ROWS,
+        help=f"Rows to sample per table (with --plan, default: {PLAN_SAMPLE_ROWS})",
+    )
+    parser.add_argument(
+        "--plan-output",
+        type=Path,
+        help="Write the plan as JSON to this file (with --plan)",
+    )
 
     args = parser.parse_args()
 
+    if args.plan:
+        plan_migration(args.parallel, args.sample_rows, args.plan_output)
+        return
+
     phases = {
         1: phase_1_setup,
         2: phase_2_code_update,
@@ -0,0 +1,114 @@
+"""
+Example: cached, read-ahead loading of ``<npy@>`` attributes.
+
+``fetch1`` on an ``<npy@store>`` attribute returns an ``NpyRef`` that downloads
+its array on first access. Iterating over many neurons in ``ephys-with-npy.ipynb``
+therefore does one synchronous store read after another, and each loaded array
+stays attached to its ``NpyRef`` for as long as the reference lives.
+
+``NpyLoader`` handles the reads instead:
+
+- ``load(ref)`` serves arrays from a size-bounded LRU cache. The cache is the
+  same structure as in ``populate_cache.py``, with hit and miss counts, and the
+  ``NpyRef`` never holds the data.
+- ``iter_arrays(refs)`` yields arrays in order while a thread pool reads the
+  next ``read_ahead`` objects from the store.
+
+For part of an array, use ``ref.load(mmap_mode='r')`` instead. On ``file``
+stores it maps the file directly and reads only the pages that are indexed.
+
+Usage:
+    from npy_loader import NpyLoader
+
+    loader = NpyLoader(max_bytes=2 * 2**30, read_ahead=32)
+    refs = [d['activity'] for d in Neuron.to_dicts(order_by='KEY')]
+    for activity in loader.iter_arrays(refs):
+        ...
+    print(loader.stats)
+
+    window = refs[0].load(mmap_mode='r')[1000:2000]
+
+Arrays returned from the cache are read-only, as in ``populate_cache.py``.
+"""
+
+import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import datajoint as dj
+import numpy as np
+from datajoint.hash_registry import get_store_backend
+
+from populate_cache import DEFAULT_MAX_BYTES, PopulateCache
+
+READ_AHEAD = 16
+
+
+class NpyLoader:
+    """
+    Load ``NpyRef`` objects through an LRU cache, with read-ahead.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Upper bound on the size of cached arrays.
+    read_ahead : int
+        Objects read concurrently ahead of the one being consumed in ``iter_arrays``.
+    workers : int, optional
+        Reader threads (default: ``read_ahead``).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, read_ahead=READ_AHEAD, workers=None):
+        self.cache = PopulateCache(max_bytes)
+        self.read_ahead = read_ahead
+        self.workers = workers or read_ahead
+        self._specs = {}
+
+    def _spec(self, store):
+        if store not in self._specs:
+            self._specs[store] = (
+                dj.config.get_store_spec(store) if store else dj.config.get_store_spec()
+            )
+        return self._specs[store]
+
+    def _local_path(self, ref):
+        """Filesystem path of ``ref`` for ``file``-protocol stores, else None."""
+        spec = self._spec(ref.store)
+        if spec['protocol'] != 'file':
+            return None
+        return Path(spec['location']) / ref.path
+
+    def _read(self, ref):
+        path = self._local_path(ref)
+        if path is not None:
+            return np.load(path, allow_pickle=False)
+        backend = get_store_backend(ref.store or dj.config['stores']['default'])
+        return np.load(io.BytesIO(backend.get_buffer(ref.path)), allow_pickle=False)
+
+    def load(self, ref):
+        """The array behind ``ref``, from the cache if present."""
+        return self.cache.get(("npy", ref.store, ref.path), lambda: self._read(ref))
+
+    def iter_arrays(self, refs):
+        """
+        Yield the array of each ref in order, reading ahead on a thread pool.
+
+        Only ``read_ahead`` objects are in flight at a time, so an iteration
+        over a large query holds a bounded number of arrays.
+        """
+        refs = iter(refs)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="npy-read") as pool:
+            pending = deque()
+            for ref in refs:
+                pending.append(pool.submit(self.load, ref))
+                if len(pending) > self.read_ahead:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @property
+    def stats(self):
+        """Cache hit/miss counters and size."""
+        return self.cache.stats
+
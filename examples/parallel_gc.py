@@ -0,0 +1,462 @@
+"""
+Example: parallel, manifest-driven garbage collection of an object store.
+
+``dj.gc.GarbageCollector(...).collect()`` lists the store's managed sections in
+one pass and compares the listing with every path referenced from the
+database. On buckets with millions of objects the listing takes hours, and
+every run repeats all of it.
+
+``ParallelCollector`` takes the same schemas and store, and ``collect()``
+returns the same statistics:
+
+- The store is split into shards: each subfolder of ``{hash_prefix}/{schema}/``
+  and each ``{schema}/{table}/`` folder of the schema-addressed section, below
+  any partition folders. ``workers`` threads list the shards concurrently.
+  Only the sections that ``dj.gc`` manages are listed, and in the hash section
+  only hash-named files, so the statistics match.
+- Without ``subfolding`` (the default), a hash section has no subfolders. It
+  is split by the first character of the hash instead, and each shard is
+  listed with that key prefix. Object stores such as S3 list only the matching
+  keys; local directories are listed whole for each shard and filtered, so a
+  large local store benefits from ``subfolding``.
+- The referenced set is read from each table's codec columns through a
+  server-side cursor, ``chunk_size`` rows at a time, without decoding any
+  value. Headings are loaded and queries built on the calling thread; only
+  the cursor reads, each on a connection of its own, run in parallel.
+- With ``manifest=path``, a collecting run saves a digest of each shard's
+  referenced paths. Later runs list only the shards whose digest changed and
+  shards that are new.
+- Orphans are deleted in batches of ``batch_size`` objects on the same thread
+  pool. Progress is logged as shards are listed and batches are deleted.
+
+Usage:
+    from parallel_gc import ParallelCollector
+
+    collector = ParallelCollector(schema1, schema2, store='main', workers=64,
+                                  manifest='gc-main.json')
+    stats = collector.collect()               # report only, as with dj.gc
+    stats = collector.collect(dry_run=False)  # delete and save the manifest
+    stats = collector.collect(dry_run=False)  # later: changed shards only
+
+    python parallel_gc.py --schemas lab_raw lab_processed --store main \\
+        --manifest gc-main.json --delete
+
+Incremental runs reclaim objects whose references were deleted or replaced
+since the last run, including superseded ``<object@>`` tokens. They do not see
+objects of rows inserted and deleted between two runs, or objects written
+without a committed row, such as an interrupted staged insert. A full scan
+reclaims those. It runs with ``collect(full=True)``, and automatically when the
+manifest's last full scan is more than ``full_every_days`` old. The
+concurrency caveats in the garbage-collection how-to apply unchanged.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import datajoint as dj
+from datajoint.hash_registry import get_store_backend
+
+from spark_export import server_cursor
+
+logger = logging.getLogger(__name__)
+
+WORKERS = 32
+CONNECTIONS = 8  # tables scanned at once, one database connection each
+CHUNK_SIZE = 10_000
+BATCH_SIZE = 1000
+FULL_EVERY_DAYS = 7
+SIDECAR = ".manifest.json"
+HASH_ALPHABET = "abcdefghijklmnopqrstuvwxyz234567"  # lowercase base32, as in hash_registry
+HASH_NAME = re.compile(r"^[a-z2-7]{26}$")  # file names that dj.gc considers in the hash section
+
+
+def _metadata(value):
+    """Stored JSON metadata of a codec value, or None for in-table values."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, dict) else None
+
+
+def _fingerprint(item):
+    return int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "big")
+
+
+class ParallelCollector:
+    """
+    Garbage collector for one store that lists shards in parallel.
+
+    Parameters
+    ----------
+    *schemas : dj.Schema
+        Every schema that uses the store, as for ``dj.gc.GarbageCollector``.
+    store : str, optional
+        Store name (default: ``stores.default``).
+    workers : int
+        Threads for listing and deleting.
+    manifest : str or Path, optional
+        JSON file with the previous scan. Without it every run is a full scan.
+    chunk_size : int
+        Rows held per cursor while reading references.
+    batch_size : int
+        Objects per delete request.
+    full_every_days : float
+        Maximum age of the last full scan before an incremental run becomes
+        a full one.
+    """
+
+    def __init__(
+        self,
+        *schemas,
+        store=None,
+        workers=WORKERS,
+        manifest=None,
+        chunk_size=CHUNK_SIZE,
+        batch_size=BATCH_SIZE,
+        full_every_days=FULL_EVERY_DAYS,
+    ):
+        if not schemas:
+            raise ValueError("At least one schema must be provided")
+        self.schemas = schemas
+        self.store = store or dj.config["stores"]["default"]
+        self.workers = workers
+        self.manifest = Path(manifest) if manifest else None
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.full_every = timedelta(days=full_every_days)
+
+        spec = dj.config.get_store_spec(self.store)
+        self.hash_prefix = spec["hash_prefix"]
+        self.schema_prefix = spec["schema_prefix"]
+        self.subfolding = spec.get("subfolding")
+        self.fs = get_store_backend(self.store).fs
+        if spec["protocol"] == "file":
+            self.root = str(Path(spec["location"]).resolve())
+        else:
+            bucket = spec.get("bucket") or spec.get("container")
+            self.root = "/".join(p.strip("/") for p in (bucket, spec.get("location")) if p)
+
+    # --- Database side ---
+
+    @staticmethod
+    def _reference_query(table):
+        """``(database, sql, column indexes)`` of the codec columns of ``table``, or None."""
+        attributes = table.heading.attributes  # loads the heading through the shared connection
+        names = [name for name, attr in attributes.items() if attr.codec is not None]
+        if not names:
+            return None
+        query = table.proj(*names)
+        return table.database, query.make_sql(), [query.heading.names.index(name) for name in names]
+
+    def _read_references(self, database, sql, columns):
+        """``(hashes, paths)`` in this store, read from ``sql`` on a connection of its own."""
+        hashes, paths = set(), set()
+        with server_cursor(sql, self.chunk_size) as cursor:
+            while rows := cursor.fetchmany(self.chunk_size):
+                for row in rows:
+                    for i in columns:
+                        meta = _metadata(row[i])
+                        if meta is None or (meta.get("store") or self.store) != self.store:
+                            continue
+                        if "hash" in meta:
+                            hashes.add((database, meta["hash"]))
+                        if "path" in meta:
+                            paths.add(meta["path"])
+        return hashes, paths
+
+    def references(self):
+        """Referenced ``(schema, hash)`` pairs and paths of every table, read in parallel."""
+        tables = [table for schema in self.schemas for table in schema]
+        # dj.conn() is not thread-safe: headings and SQL are built here, only the reads run in the pool
+        queries = [query for query in map(self._reference_query, tables) if query is not None]
+        hashes, paths = set(), set()
+        with ThreadPoolExecutor(max_workers=CONNECTIONS, thread_name_prefix="gc-refs") as pool:
+            for table_hashes, table_paths in pool.map(lambda query: self._read_references(*query), queries):
+                hashes |= table_hashes
+                paths |= table_paths
+        logger.info(f"gc: {len(hashes):,} hashes and {len(paths):,} paths referenced from {len(tables)} tables")
+        return hashes, paths
+
+    # --- Store side ---
+
+    def _abs(self, rel):
+        return f"{self.root}/{rel}"
+
+    def _rel(self, path):
+        return path[len(self.root) + 1:]
+
+    def _ls(self, rel):
+        """Subfolders and ``{file: size}`` directly under ``rel``."""
+        try:
+            entries = self.fs.ls(self._abs(rel), detail=True)
+        except FileNotFoundError:
+            return [], {}
+        folders, files = [], {}
+        for entry in entries:
+            name = self._rel(entry["name"].rstrip("/"))
+            if entry["type"] == "directory":
+                folders.append(name)
+            else:
+                files[name] = entry["size"]
+        return folders, files
+
+    def _managed(self, path):
+        """Whether ``dj.gc`` considers ``path``: in the hash section, only hash-named files."""
+        return not path.startswith(f"{self.hash_prefix}/") or bool(HASH_NAME.match(path.rsplit("/", 1)[-1]))
+
+    def _find(self, shard):
+        if not shard.endswith("*"):
+            found = self.fs.find(self._abs(shard), detail=True)
+        else:
+            # Prefix shard of a flat hash section; filesystems that ignore prefix list everything
+            section, prefix = shard[:-1].rsplit("/", 1)
+            found = self.fs.find(self._abs(section), detail=True, prefix=prefix)
+        return {
+            rel: info["size"]
+            for rel, info in ((self._rel(path), info) for path, info in found.items())
+            if rel.startswith(shard.rstrip("*")) and self._managed(rel)
+        }
+
+    def shards(self, pool):
+        """
+        Shard prefixes of the managed sections, and files found above shard level.
+
+        Walks one folder level at a time, listing each level in parallel:
+        partition folders (``name=value``) down to the schema folders, then
+        their subfolders. Flat hash sections are not listed here; they become
+        one ``{section}/{c}*`` prefix shard per first hash character.
+        """
+        names = {schema.database for schema in self.schemas}
+        frontier = [(f"{self.hash_prefix}/{name}", "schema") for name in names] if self.subfolding else []
+        frontier += [(self.schema_prefix, "partition")]
+        shards, loose = [], {}
+        if not self.subfolding:
+            shards += [f"{self.hash_prefix}/{name}/{c}*" for name in names for c in HASH_ALPHABET]
+        while frontier:
+            listings = pool.map(lambda item: self._ls(item[0]), frontier)
+            deeper = []
+            for (rel, kind), (folders, files) in zip(frontier, listings):
+                if kind == "schema":
+                    shards.extend(folders)
+                    loose.update((path, size) for path, size in files.items() if self._managed(path))
+                    continue
+                for folder in folders:
+                    name = folder.rsplit("/", 1)[-1]
+                    if "=" in name:
+                        deeper.append((folder, "partition"))
+                    elif name in names:
+                        deeper.append((folder, "schema"))
+            frontier = deeper
+        return shards, loose
+
+    def _shard_of(self, path):
+        """Shard prefix that holds ``path``; None above shard level."""
+        if path.startswith(f"{self.hash_prefix}/"):
+            head, parts = f"{self.hash_prefix}/", path[len(self.hash_prefix) + 1:].split("/")
+            if not self.subfolding:
+                return f"{head}{parts[0]}/{parts[1][0]}*" if len(parts) > 1 and parts[1] else None
+            depth = 2
+        elif path.startswith(f"{self.schema_prefix}/"):
+            head, parts = f"{self.schema_prefix}/", path[len(self.schema_prefix) + 1:].split("/")
+            depth = next((i for i, part in enumerate(parts) if "=" not in part), len(parts)) + 2
+        else:
+            return None
+        return head + "/".join(parts[:depth]) if len(parts) > depth else None
+
+    def digests(self, shards, hashes, paths):
+        """Order-independent digest of the references that fall in each shard."""
+        totals = {shard: [0, 0] for shard in shards}
+        widths = defaultdict(set)  # hash section → (subfolder name length, "*" for prefix shards)
+        for shard in shards:
+            if shard.startswith(f"{self.hash_prefix}/"):
+                section, name = shard.rsplit("/", 1)
+                mark = "*" if name.endswith("*") else ""
+                widths[section].add((len(name) - len(mark), mark))
+
+        def add(shard, item):
+            if shard in totals:
+                totals[shard][0] = (totals[shard][0] + _fingerprint(item)) % 2**64
+                totals[shard][1] += 1
+
+        for schema, digest in hashes:
+            section = f"{self.hash_prefix}/{schema}"
+            for width, mark in widths[section]:
+                add(f"{section}/{digest[:width]}{mark}", f"{schema}/{digest}")
+        for path in paths:
+            add(self._shard_of(path), path)
+        return {shard: f"{total:016x}:{count}" for shard, (total, count) in totals.items()}
+
+    # --- Collection ---
+
+    def _live(self, path, hashes, paths):
+        if path in paths:
+            return True
+        if path.startswith(f"{self.hash_prefix}/"):
+            schema, name = path[len(self.hash_prefix) + 1:].split("/", 1)[0], path.rsplit("/", 1)[-1]
+            return not HASH_NAME.match(name) or (schema, name) in hashes
+        if path.endswith(SIDECAR) and path[: -len(SIDECAR)] in paths:
+            return True
+        parent = path
+        while "/" in parent:  # files inside a referenced folder object
+            parent = parent.rsplit("/", 1)[0]
+            if parent in paths:
+                return True
+        return False
+
+    def _load_manifest(self):
+        if self.manifest is None or not self.manifest.exists():
+            return None
+        manifest = json.loads(self.manifest.read_text())
+        if manifest.get("store") != self.store or manifest.get("root") != self.root:
+            logger.warning(f"gc: {self.manifest} is for another store; running a full scan")
+            return None
+        return manifest
+
+    def _save_manifest(self, manifest):
+        tmp = self.manifest.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+        tmp.replace(self.manifest)
+
+    def _delete(self, pool, orphans, verbose):
+        """Delete ``{path: size}`` in batches; returns (deleted, bytes freed, failed paths)."""
+        paths = sorted(orphans)
+        batches = [paths[i:i + self.batch_size] for i in range(0, len(paths), self.batch_size)]
+        futures = {
+            pool.submit(self.fs.rm, [self._abs(path) for path in batch]): batch for batch in batches
+        }
+        deleted, freed, failed = 0, 0, []
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f"gc: failed to delete a batch of {len(batch)} objects: {e}")
+                failed.extend(batch)
+                continue
+            deleted += len(batch)
+            freed += sum(orphans[path] for path in batch)
+            if verbose:
+                for path in batch:
+                    logger.info(f"gc: deleted {path}")
+            logger.info(f"gc: deleted {deleted:,}/{len(paths):,} objects ({freed / 1e6:,.1f} MB)")
+        return deleted, freed, failed
+
+    def collect(self, dry_run=True, verbose=False, full=False):
+        """
+        Find and, unless ``dry_run``, delete unreferenced objects.
+
+        Parameters
+        ----------
+        dry_run : bool
+            Report without deleting or saving the manifest.
+        verbose : bool
+            Log every deleted path.
+        full : bool
+            List every shard, ignoring the manifest.
+
+        Returns
+        -------
+        dict
+            The statistics of ``dj.gc.GarbageCollector.collect()``, plus
+            ``shards``, ``shards_listed`` and ``elapsed_s``. In incremental
+            runs, ``*_stored`` counts only the listed shards.
+        """
+        start = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        manifest = None if full else self._load_manifest()
+        if manifest and now - datetime.fromisoformat(manifest["full_scan_at"]) > self.full_every:
+            logger.info(f"gc: last full scan is older than {self.full_every.days} days; running one")
+            manifest = None
+        previous = manifest["shards"] if manifest else {}
+
+        self.fs.invalidate_cache()
+        hashes, paths = self.references()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gc") as pool:
+            shards, stored = self.shards(pool)
+            digests = self.digests(shards, hashes, paths)
+            todo = [shard for shard in shards if previous.get(shard) != digests[shard]]
+            logger.info(f"gc: listing {len(todo):,} of {len(shards):,} shards")
+
+            futures = {pool.submit(self._find, shard): shard for shard in todo}
+            for i, future in enumerate(as_completed(futures), 1):
+                stored.update(future.result())
+                if i % 100 == 0 or i == len(futures):
+                    logger.info(f"gc: listed {i:,}/{len(futures):,} shards, {len(stored):,} objects")
+
+            orphans = {path: size for path, size in stored.items() if not self._live(path, hashes, paths)}
+            deleted, freed, failed = (0, 0, []) if dry_run else self._delete(pool, orphans, verbose)
+
+        def is_hash(path):
+            return path.startswith(f"{self.hash_prefix}/")
+
+        stats = {
+            "hash_paths_referenced": len(hashes),
+            "hash_paths_stored": sum(map(is_hash, stored)),
+            "hash_paths_orphaned": sum(map(is_hash, orphans)),
+            "hash_paths_orphaned_bytes": sum(size for path, size in orphans.items() if is_hash(path)),
+            "schema_paths_referenced": sum(not is_hash(path) for path in paths),
+            "schema_paths_stored": sum(not is_hash(path) for path in stored),
+            "schema_paths_orphaned": sum(not is_hash(path) for path in orphans),
+            "schema_paths_orphaned_bytes": sum(size for path, size in orphans.items() if not is_hash(path)),
+            "deleted": deleted,
+            "bytes_freed": freed,
+            "errors": len(failed),
+            "shards": len(shards),
+            "shards_listed": len(todo),
+        }
+
+        if not dry_run and self.manifest is not None:
+            retry = {self._shard_of(path) for path in failed}
+            self._save_manifest({
+                "store": self.store,
+                "root": self.root,
+                "full_scan_at": manifest["full_scan_at"] if manifest else now.isoformat(),
+                "scanned_at": now.isoformat(),
+                "shards": {shard: digest for shard, digest in digests.items() if shard not in retry},
+            })
+        stats["elapsed_s"] = time.perf_counter() - start
+        logger.info(
+            f"gc: {stats['hash_paths_orphaned'] + stats['schema_paths_orphaned']:,} orphaned, "
+            f"{deleted:,} deleted in {stats['elapsed_s']:.1f} s"
+        )
+        return stats
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Parallel garbage collection of a DataJoint store")
+    parser.add_argument("--schemas", nargs="+", required=True, help="Every schema that uses the store")
+    parser.add_argument("--store", help="Store name (default: stores.default)")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--manifest", help="JSON manifest for incremental runs")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--full", action="store_true", help="List every shard, ignoring the manifest")
+    parser.add_argument("--delete", action="store_true", help="Delete orphans (default: report only)")
+    parser.add_argument("--verbose", action="store_true", help="Log every deleted path")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    collector = ParallelCollector(
+        *[dj.Schema(name) for name in args.schemas],
+        store=args.store,
+        workers=args.workers,
+        manifest=args.manifest,
+        batch_size=args.batch_size,
+    )
+    stats = collector.collect(dry_run=not args.delete, verbose=args.verbose, full=args.full)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
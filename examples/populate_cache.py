@@ -0,0 +1,205 @@
+"""
+Example: populate-scoped read cache for upstream fetches and file loads.
+
+Several tutorial ``make()`` methods read the same upstream data for many keys:
+``Denoised.make`` in the fractal tutorial fetches the same ``JuliaImage`` blob
+once for each of the three ``DenoiseMethod`` rows, and ``RegionParent.make`` in
+the Allen CCF tutorial re-reads the whole ontology CSV for every key.
+
+Within a ``with populate_cache():`` block, ``cached_fetch1`` and ``cached_load``
+serve repeated reads from memory. The cache is size-bounded with least-recently
+used eviction, exists only for the duration of the block, and reports hits,
+misses and evictions so you can see how much redundant I/O a pipeline was doing.
+
+Usage:
+    from populate_cache import cached_fetch1, cached_load, populate_cache
+
+    class Denoised(dj.Computed):
+        def make(self, key):
+            img = cached_fetch1(JuliaImage & key, 'image')
+            ...
+
+    with populate_cache(max_bytes=2 * 2**30) as cache:
+        Denoised.populate()
+    print(cache.stats)
+
+Outside a ``populate_cache()`` block both helpers read directly, so ``make()``
+behaves exactly as before. Cached NumPy arrays are returned read-only: a
+``make()`` that modifies its input in place must copy it first, otherwise it
+would corrupt the input of later keys.
+
+Caching only serves the same read twice; it does not change what ``make()``
+reads, so each result still depends only on its key-restricted upstream data.
+The cache is dropped when the block exits, so the next run sees fresh data.
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 1 << 30  # 1 GiB
+
+_current = ContextVar("populate_cache", default=None)
+
+
+def sizeof(value):
+    """Approximate in-memory size of a cached value, in bytes."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if hasattr(value, "memory_usage"):  # pandas DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """Make cached arrays read-only so one make() cannot alter another's input."""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    elif isinstance(value, dict):
+        for v in value.values():
+            _freeze(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _freeze(v)
+    return value
+
+
+class PopulateCache:
+    """
+    Size-bounded LRU cache with hit/miss accounting.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Upper bound on the total size of cached values. Values larger than the
+        bound are returned but not cached.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+        self._entries = OrderedDict()  # key → (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Return the cached value for ``key``, computing and caching it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                value, size = self._entries[key]
+                self.hits += 1
+                self.bytes_saved += size
+                return value
+            self.misses += 1
+
+        value = _freeze(compute())
+        size = sizeof(value)
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self.bytes -= evicted
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        """Drop all entries; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    @property
+    def stats(self):
+        """Hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+@contextmanager
+def populate_cache(max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Activate a read cache for the enclosed ``populate()`` calls.
+
+    Yields
+    ------
+    PopulateCache
+        The active cache; its ``stats`` remain readable after the block exits.
+    """
+    cache = PopulateCache(max_bytes)
+    token = _current.set(cache)
+    try:
+        yield cache
+    finally:
+        _current.reset(token)
+        cache.clear()
+        stats = cache.stats
+        logger.info(
+            f"populate cache: {stats['hits']} hits, {stats['misses']} misses, "
+            f"{stats['evictions']} evictions, {stats['bytes_saved'] / 2**20:.1f} MiB not re-read"
+        )
+
+
+def cached_fetch1(query, *attrs):
+    """
+    ``query.fetch1(*attrs)``, served from the active cache when possible.
+
+    The cache key is the query's SQL and the requested attributes, so the same
+    restriction fetched from two ``make()`` calls is read from the database once.
+    """
+    cache = _current.get()
+    if cache is None:
+        return query.fetch1(*attrs)
+    return cache.get(("fetch1", query.make_sql(), attrs), lambda: query.fetch1(*attrs))
+
+
+def cached_load(path, loader, **kwargs):
+    """
+    ``loader(path, **kwargs)``, served from the active cache when possible.
+
+    The cache key includes the file's modification time and size, so a file
+    rewritten during the run is loaded again.
+
+    Example: ``ontology = cached_load(ONTOLOGY_FILE, pd.read_csv)``
+    """
+    cache = _current.get()
+    if cache is None:
+        return loader(path, **kwargs)
+    stat = Path(path).stat()
+    key = (
+        "load",
+        f"{loader.__module__}.{loader.__qualname__}",
+        str(Path(path).resolve()),
+        stat.st_mtime_ns,
+        stat.st_size,
+        tuple(sorted(kwargs.items())),
+    )
+    return cache.get(key, lambda: loader(path, **kwargs))
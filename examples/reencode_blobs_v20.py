@@ -0,0 +1,318 @@
+"""
+Example re-encoding stage: legacy blob attributes → 2.0 <blob@store>.
+
+Phase 2 of the migration converts `external-store` attributes to `<blob@store>`.
+For data-heavy pipelines the payloads themselves must be decoded and re-encoded,
+which is CPU-bound. This script streams a blob column in batches, decodes and
+re-encodes unique payloads on a process pool, uploads each unique result once to
+the hash-addressed section of the destination store, and writes the new JSON
+metadata to the destination table in bulk.
+
+Payloads are deduplicated by content hash: legacy external attributes already
+reference their payload by a content-derived UUID, and in-table blobs are hashed
+before they are dispatched. Identical payloads are therefore decoded, encoded and
+uploaded only once, no matter how many rows reference them.
+
+Uploaded objects are named and described exactly as ``<blob@store>`` inserts
+them (``datajoint.hash_registry``), so the store's ``hash_prefix`` and
+``subfolding`` apply. When the attribute is done, one re-encoded row is fetched
+back through DataJoint and checked against the encoded payload.
+
+Usage:
+    # Legacy external attribute (payloads read from the pre-2.0 store location)
+    python reencode_blobs_v20.py --table recording --attribute signal \\
+        --source-store raw --legacy-location /data/stores/raw --dest-store raw
+
+    # Legacy in-table longblob being moved to a store
+    python reencode_blobs_v20.py --table recording --attribute signal --dest-store main
+
+Run after phase 3 has copied the table's other columns into the parallel schema.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import datajoint as dj
+from datajoint.errors import DataJointError
+
+# Configuration
+PROD_SCHEMA = "my_pipeline"
+TEST_SCHEMA = "my_pipeline_v20"
+
+BATCH_SIZE = 1000  # Rows fetched per round trip
+UPLOAD_THREADS = 16  # Concurrent store uploads
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def legacy_path(location, schema, uuid_hex):
+    """Path of a pre-2.0 external blob: ``{location}/{schema}/{h[:2]}/{h[2:4]}/{h}``."""
+    return f"{location.rstrip('/')}/{schema}/{uuid_hex[:2]}/{uuid_hex[2:4]}/{uuid_hex}"
+
+
+def reencode(payload):
+    """
+    Decode a legacy blob and re-encode it in the 2.0 format.
+
+    Runs in a worker process. ``payload`` is either the raw blob bytes or the
+    path of a legacy external object, which is then read by the worker so that
+    store reads are parallelized along with the CPU work.
+
+    Returns
+    -------
+    tuple[str, bytes]
+        (content hash, encoded bytes) of the re-encoded blob, with the hash
+        computed as ``<blob@store>`` computes it.
+    """
+    from datajoint import blob
+    from datajoint.hash_registry import compute_hash
+
+    if isinstance(payload, str):
+        import fsspec
+
+        with fsspec.open(payload, "rb") as f:
+            payload = f.read()
+    data = blob.pack(blob.unpack(payload), compress=True)
+    return compute_hash(data), data
+
+
+def primary_key(conn, schema, table):
+    """Primary key column names in declaration order."""
+    return [
+        row[0]
+        for row in conn.query(
+            f"""
+            SELECT COLUMN_NAME FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{table}'
+            AND COLUMN_KEY = 'PRI'
+            ORDER BY ORDINAL_POSITION
+        """
+        ).fetchall()
+    ]
+
+
+def stream_batches(conn, table, attribute, pk, source_store, batch_size):
+    """
+    Yield batches of ``(pk_values, payload_id)`` from the production table.
+
+    Uses keyset pagination on the primary key so each batch is an index range
+    scan, regardless of how far into the table the scan has progressed.
+    ``payload_id`` is the legacy UUID hex for external attributes, or the
+    raw bytes for in-table blobs. Rows with a NULL attribute are skipped.
+    """
+    columns = ", ".join(f"`{c}`" for c in pk)
+    value = f"HEX(`{attribute}`)" if source_store else f"`{attribute}`"
+    last = None
+    while True:
+        where = f"`{attribute}` IS NOT NULL"
+        args = ()
+        if last is not None:
+            where += f" AND ({columns}) > ({', '.join(['%s'] * len(pk))})"
+            args = last
+        rows = conn.query(
+            f"SELECT {columns}, {value} FROM `{PROD_SCHEMA}`.`{table}` "
+            f"WHERE {where} ORDER BY {columns} LIMIT {batch_size}",
+            args=args,
+        ).fetchall()
+        if not rows:
+            return
+        yield [(tuple(row[:-1]), row[-1]) for row in rows]
+        last = tuple(rows[-1][:-1])
+
+
+def bulk_update(conn, table, attribute, pk, rows):
+    """
+    Write ``(pk_values, metadata)`` pairs to the destination table in one statement.
+
+    The values are loaded into a temporary table with a single multi-row INSERT
+    and applied with one UPDATE ... JOIN, instead of one UPDATE per row.
+    """
+    tmp = f"`{TEST_SCHEMA}`.`#reencode_{table}`"
+    conn.query(
+        f"CREATE TEMPORARY TABLE IF NOT EXISTS {tmp} AS "
+        f"SELECT {', '.join(f'`{c}`' for c in pk)}, `{attribute}` "
+        f"FROM `{TEST_SCHEMA}`.`{table}` LIMIT 0"
+    )
+    conn.query(f"DELETE FROM {tmp}")
+    placeholders = "(" + ", ".join(["%s"] * (len(pk) + 1)) + ")"
+    args = [v for key, meta in rows for v in (*key, json.dumps(meta))]
+    conn.query(
+        f"INSERT INTO {tmp} VALUES {', '.join([placeholders] * len(rows))}",
+        args=args,
+    )
+    on = " AND ".join(f"d.`{c}` = t.`{c}`" for c in pk)
+    conn.query(
+        f"UPDATE `{TEST_SCHEMA}`.`{table}` AS d JOIN {tmp} AS t ON {on} "
+        f"SET d.`{attribute}` = t.`{attribute}`"
+    )
+
+
+def verify_round_trip(conn, table, attribute, pk, key, data):
+    """
+    Fetch one re-encoded row through DataJoint and compare it with ``data``.
+
+    Raises
+    ------
+    DataJointError
+        If the fetched value does not re-pack to the uploaded bytes.
+    """
+    from datajoint import blob
+
+    dest = dj.FreeTable(conn, f"`{TEST_SCHEMA}`.`{table}`")
+    value = (dest & dict(zip(pk, key))).fetch1(attribute)
+    if blob.pack(value, compress=True) != data:
+        raise DataJointError(f"Round trip failed for {TEST_SCHEMA}.{table} {dict(zip(pk, key))}")
+    logger.info(f"  ✓ round trip of {dict(zip(pk, key))} matches")
+
+
+def reencode_attribute(
+    table,
+    attribute,
+    dest_store,
+    source_store=None,
+    legacy_location=None,
+    workers=None,
+    batch_size=BATCH_SIZE,
+):
+    """
+    Re-encode one blob attribute from the production schema into the parallel schema.
+
+    Parameters
+    ----------
+    table : str
+        Table name (as in information_schema, e.g. ``recording`` or ``_neuron``).
+    attribute : str
+        Blob attribute to re-encode.
+    dest_store : str
+        2.0 store name (from ``datajoint.json``) to upload the re-encoded blobs to.
+    source_store : str, optional
+        Legacy store name if the attribute was ``blob@store``; omit for in-table blobs.
+    legacy_location : str, optional
+        Location (path or fsspec URL) of the legacy store; required with ``source_store``.
+    workers : int, optional
+        Number of encoder processes (default: number of CPUs).
+    batch_size : int
+        Rows per fetch and per bulk write.
+
+    Returns
+    -------
+    dict
+        Counts of rows written, unique payloads encoded, and bytes uploaded.
+    """
+    from datajoint.hash_registry import build_hash_path, get_store_backend, get_store_subfolding
+
+    if source_store and not legacy_location:
+        raise ValueError("legacy_location is required when source_store is given")
+
+    conn = dj.conn()
+    pk = primary_key(conn, PROD_SCHEMA, table)
+    backend = get_store_backend(dest_store)
+    hash_prefix = dj.config.get_store_spec(dest_store)["hash_prefix"]
+    subfolding = get_store_subfolding(dest_store)
+
+    encoded = {}  # payload identity → 2.0 metadata
+    stats = {"rows": 0, "unique": 0, "uploaded": 0, "bytes": 0}
+    check = None  # (pk_values, encoded bytes) of the first row, for the round trip
+    start = time.perf_counter()
+
+    def upload(item):
+        """Upload as ``put_hash`` does, but report the bytes actually written."""
+        path, data = item
+        if backend.exists(path):
+            return 0
+        backend.put_buffer(data, path)
+        return len(data)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(UPLOAD_THREADS) as io:
+        for batch in stream_batches(conn, table, attribute, pk, source_store, batch_size):
+            # Deduplicate within the batch and against everything already encoded
+            pending = {}
+            for _, value in batch:
+                ident = value if source_store else hashlib.md5(value).hexdigest()
+                if ident not in encoded and ident not in pending:
+                    pending[ident] = (
+                        legacy_path(legacy_location, PROD_SCHEMA, value.lower())
+                        if source_store
+                        else value
+                    )
+
+            results = list(pool.map(reencode, pending.values(), chunksize=16))
+            unique = {}  # distinct legacy payloads may re-encode to identical bytes
+            for ident, (digest, data) in zip(pending, results):
+                path = build_hash_path(digest, TEST_SCHEMA, subfolding, hash_prefix=hash_prefix)
+                # The metadata put_hash() returns, which get_hash() reads back
+                encoded[ident] = {
+                    "hash": digest,
+                    "path": path,
+                    "schema": TEST_SCHEMA,
+                    "store": dest_store,
+                    "size": len(data),
+                }
+                unique[path] = data
+            uploaded = list(io.map(upload, unique.items()))
+
+            rows = [
+                (key, encoded[value if source_store else hashlib.md5(value).hexdigest()])
+                for key, value in batch
+            ]
+            bulk_update(conn, table, attribute, pk, rows)
+            if check is None:  # everything in the first batch was just uploaded
+                check = rows[0][0], unique[rows[0][1]["path"]]
+
+            stats["rows"] += len(rows)
+            stats["unique"] += len(pending)
+            stats["uploaded"] += sum(1 for n in uploaded if n)
+            stats["bytes"] += sum(uploaded)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                f"  {stats['rows']} rows, {stats['unique']} unique payloads, "
+                f"{stats['bytes'] / 1e6:.1f} MB uploaded ({stats['rows'] / elapsed:.0f} rows/s)"
+            )
+
+    if check:
+        verify_round_trip(conn, table, attribute, pk, *check)
+    stats["time_taken"] = time.perf_counter() - start
+    return stats
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Re-encode a blob attribute for DataJoint 2.0")
+    parser.add_argument("--table", required=True, help="Table name in the production schema")
+    parser.add_argument("--attribute", required=True, help="Blob attribute to re-encode")
+    parser.add_argument("--dest-store", required=True, help="2.0 store to upload to")
+    parser.add_argument("--source-store", help="Legacy store name for external attributes")
+    parser.add_argument("--legacy-location", help="Path or URL of the legacy store")
+    parser.add_argument("--workers", type=int, help="Encoder processes (default: CPU count)")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help=f"Rows per batch (default: {BATCH_SIZE})",
+    )
+
+    args = parser.parse_args()
+
+    logger.info(f"=== Re-encoding {PROD_SCHEMA}.{args.table}.{args.attribute} ===")
+    result = reencode_attribute(
+        table=args.table,
+        attribute=args.attribute,
+        dest_store=args.dest_store,
+        source_store=args.source_store,
+        legacy_location=args.legacy_location,
+        workers=args.workers,
+        batch_size=args.batch_size,
+    )
+    logger.info(
+        f"✓ Re-encoded {result['rows']} rows ({result['unique']} unique payloads, "
+        f"{result['uploaded']} uploaded) in {result['time_taken']:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
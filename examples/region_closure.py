@@ -0,0 +1,119 @@
+"""
+Example: a closure table for Allen CCF ancestor/descendant queries.
+
+The Allen CCF tutorial stores the ontology as ``RegionParent``: one parent per
+region, plus its depth. To find every recording site under ``VISp`` you have to
+expand the tree one level at a time, with one self-join on ``RegionParent`` per
+level. The alternative is to fetch the parent map and walk it on the client.
+Either way, the number of queries or the amount of data transferred grows with
+the size of the subtree.
+
+A closure table stores every (region, ancestor) pair with its distance,
+including each region paired with itself at distance 0. A subtree restriction
+then becomes a single indexed join:
+
+    RecordingSite & subtree(RegionAncestor, ccf_id=1, region_id=visp_id)
+
+``RegionAncestor`` is a computed stage keyed by ``RegionParent``. Its primary
+key also holds ``ancestor_id``, so its ``key_source`` must be declared as
+``RegionParent.proj()``: one ``make()`` per region, which inserts all of that
+region's rows. The default key source would pair every region with every
+region. ``make()`` walks up the parents of one region only until it reaches a
+region whose closure rows already exist, then extends those rows. When regions
+are added, ``populate()`` computes rows only for the new regions, and each new
+region usually needs a single query to find its parent's closure.
+
+Usage:
+    from region_closure import ancestor_rows, stale_closure, subtree
+
+    @schema
+    class RegionAncestor(dj.Computed):
+        definition = '''
+        # Closure of RegionParent: every ancestor of each region, itself included
+        -> RegionParent
+        -> BrainRegion.proj(ancestor_id='region_id')
+        ---
+        distance : int16                # parent steps from ancestor to region
+        index(ccf_id, ancestor_id)      # for subtree restrictions
+        '''
+
+        @property
+        def key_source(self):
+            return RegionParent.proj()
+
+        def make(self, key):
+            self.insert(ancestor_rows(RegionAncestor, RegionParent, key))
+
+    RegionAncestor.populate()
+
+    # Recording sites anywhere under VISp
+    RecordingSite & subtree(RegionAncestor, 1, visp_id)
+
+    # Ancestors of VISp1, root first
+    (RegionAncestor & {'ccf_id': 1, 'region_id': visp1_id}).to_pandas(order_by='distance DESC')
+
+Adding regions only requires ``populate()``. Moving a region to a different
+parent changes the ancestors of its whole subtree. Before updating
+``RegionParent``, delete ``stale_closure(RegionAncestor, ccf_id, region_id)``.
+Then repopulate: the moved region and its descendants are the only regions
+left without closure rows, so only they are computed again.
+"""
+
+import datajoint as dj
+
+
+def ancestor_rows(closure, parents, key):
+    """
+    Closure rows for one region: the region itself and each of its ancestors.
+
+    Parameters
+    ----------
+    closure : Table
+        The closure table being populated.
+    parents : Table
+        ``RegionParent``, where the root is its own parent.
+    key : dict
+        ``ccf_id`` and ``region_id`` of the region.
+
+    Returns
+    -------
+    list of dict
+        One row per ancestor, with ``ancestor_id`` and ``distance``.
+    """
+    ccf = {'ccf_id': key['ccf_id']}
+    chain = [key['region_id']]  # the region and the ancestors walked so far
+    inherited = []
+    while True:
+        parent_id = (parents & {**ccf, 'region_id': chain[-1]}).fetch1('parent_id')
+        if parent_id == chain[-1]:  # reached the root
+            break
+        ancestor_ids, distances = (closure & {**ccf, 'region_id': parent_id}).to_arrays(
+            'ancestor_id', 'distance'
+        )
+        if len(ancestor_ids):  # the parent's closure already exists
+            inherited = [
+                (int(ancestor_id), len(chain) + int(distance))
+                for ancestor_id, distance in zip(ancestor_ids, distances)
+            ]
+            break
+        chain.append(parent_id)
+
+    pairs = [(int(region_id), distance) for distance, region_id in enumerate(chain)]
+    return [
+        {**key, 'ancestor_id': ancestor_id, 'distance': distance}
+        for ancestor_id, distance in pairs + inherited
+    ]
+
+
+def subtree(closure, ccf_id, region_id):
+    """
+    Keys (``ccf_id``, ``region_id``) of a region and all of its descendants.
+
+    Use it to restrict any table that references ``BrainRegion``.
+    """
+    return dj.U('ccf_id', 'region_id') & (closure & {'ccf_id': ccf_id, 'ancestor_id': region_id})
+
+
+def stale_closure(closure, ccf_id, region_id):
+    """Closure rows that become invalid when ``region_id`` is moved to a new parent."""
+    return closure & subtree(closure, ccf_id, region_id)
@@ -0,0 +1,276 @@
+"""
+Example: streaming export of a query to Arrow record batches and Parquet.
+
+The consumer pattern in the SparkAdapter specification publishes one row at a
+time: ``fetch1``, then ``to_spark`` for every codec column. For a large
+computed table, that means a database round trip per row. Every array is also
+converted to nested Python lists before Arrow sees it.
+
+``record_batches(query)`` streams the whole query instead:
+
+- The query's SQL (``make_sql()``) is read through a server-side cursor on a
+  dedicated connection: ``SSCursor`` on MySQL, a named cursor on PostgreSQL.
+  Only ``batch_size`` rows are held on the client at a time.
+- Columns without a codec go to Arrow as the driver returns them.
+- Codec columns are decoded along the codec chain, as in the codec API spec.
+  They are then rendered with the codec's ``to_spark``. When a column's
+  decoded values are numeric NumPy arrays that share their trailing shape, the
+  batch becomes one nested Arrow list array built from a single concatenated
+  buffer, without per-element Python objects. For each column, the fast path
+  is first checked against ``to_spark`` on a sample value. If they differ, the
+  column falls back to per-value rendering.
+- Codec columns that do not implement ``dj.SparkAdapter`` raise, as in the
+  specification's consumer pattern, unless ``opaque="skip"`` drops them.
+
+``write_parquet(query, path)`` writes the batches to one Parquet file, with one
+row group per batch, so memory stays bounded by ``batch_size`` rows.
+
+Usage:
+    from spark_export import record_batches, write_parquet
+
+    rows = write_parquet(RecordingStats & 'session_id > 10', 'silver/stats.parquet',
+                         batch_size=5000)
+
+    for batch in record_batches(Recording, batch_size=1000):
+        ...  # pyarrow.RecordBatch
+
+    python spark_export.py --schema my_pipeline --table Recording --out recording.parquet
+
+The export connection is separate from ``dj.conn()``, so it does not see
+uncommitted changes from the caller's transaction. The Arrow schema is
+inferred from the first batch. Pass ``schema=`` when a column can be entirely
+null in the first batch.
+"""
+
+import argparse
+import json
+import logging
+import re
+from contextlib import contextmanager
+
+import datajoint as dj
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10_000
+MAX_OFFSET = 2**31 - 1  # Arrow list arrays use int32 offsets
+
+
+@contextmanager
+def server_cursor(sql, batch_size):
+    """Unbuffered cursor over ``sql`` on a connection of its own."""
+    if dj.config["database.backend"] == "postgresql":
+        import psycopg2
+
+        conn = psycopg2.connect(
+            host=dj.config["database.host"],
+            port=int(dj.config["database.port"]),
+            user=dj.config["database.user"],
+            password=dj.config["database.password"],
+            dbname=dj.config["database.name"] or "postgres",
+        )
+        cursor = conn.cursor(name="dj_spark_export")  # named → server-side
+        cursor.itersize = batch_size
+    else:
+        import pymysql
+
+        conn = pymysql.connect(
+            host=dj.config["database.host"],
+            port=int(dj.config["database.port"]),
+            user=dj.config["database.user"],
+            password=dj.config["database.password"],
+        )
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(sql)
+        yield cursor
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class ColumnDecoder:
+    """Decode the stored values of one codec attribute and render them for Spark."""
+
+    def __init__(self, codec):
+        self.codec = codec
+        self.chain = None
+        self.vectorized = None  # decided on the first batch
+
+    def _resolve(self, raw):
+        # Store-backed values arrive as JSON, in-table values as bytes
+        is_store = not isinstance(raw, (bytes, bytearray, memoryview))
+        chain = [self.codec]
+        dtype = self.codec.get_dtype(is_store)
+        while (match := re.fullmatch(r"<(\w+)(@\w*)?>", dtype)) is not None:
+            chain.append(dj.get_codec(match.group(1)))
+            dtype = chain[-1].get_dtype(is_store)
+        self.chain = chain[::-1]
+
+    def decode(self, raw, key):
+        if raw is None:
+            return None
+        if self.chain is None:
+            self._resolve(raw)
+        if isinstance(raw, str):
+            raw = json.loads(raw)
+        elif isinstance(raw, memoryview):
+            raw = bytes(raw)
+        for codec in self.chain:
+            raw = codec.decode(raw, key=key)
+        return raw
+
+    def render(self, values, keys):
+        """Arrow array of the batch's decoded ``values``."""
+        if self.vectorized is not False:
+            array = ndarray_column(values)
+            if array is not None and self.vectorized is None:
+                self.vectorized = array[0].as_py() == self.codec.to_spark(values[0], key=keys[0])
+                if not self.vectorized:
+                    logger.info(f"<{self.codec.name}>.to_spark differs from the array layout; rendering per value")
+            if array is not None and self.vectorized:
+                return array
+        return pa.array([
+            None if value is None else self.codec.to_spark(value, key=key)
+            for value, key in zip(values, keys)
+        ])
+
+
+def ndarray_column(values):
+    """
+    Nested Arrow list array of numeric ndarrays sharing their trailing shape, or None.
+
+    Equivalent to ``pa.array([v.tolist() for v in values])``, but built from a
+    single concatenated buffer.
+    """
+    first = values[0] if values else None
+    if not isinstance(first, np.ndarray) or first.ndim == 0 or first.dtype.kind not in "biuf":
+        return None
+    if 0 in first.shape[1:]:  # no list offsets for zero-length rows; render per value
+        return None
+    if not all(
+        isinstance(v, np.ndarray) and v.dtype == first.dtype and v.shape[1:] == first.shape[1:]
+        for v in values
+    ):
+        return None
+    flat = np.concatenate([v.reshape(-1) for v in values])
+    if flat.size > MAX_OFFSET:
+        return None
+    array = pa.array(flat)
+    for size in reversed(first.shape[1:]):
+        array = pa.ListArray.from_arrays(pa.array(np.arange(0, len(array) + 1, size, dtype=np.int32)), array)
+    offsets = np.zeros(len(values) + 1, dtype=np.int32)
+    np.cumsum([len(v) for v in values], out=offsets[1:])
+    return pa.ListArray.from_arrays(pa.array(offsets), array)
+
+
+def record_batches(query, *, batch_size=BATCH_SIZE, schema=None, opaque="raise"):
+    """
+    Stream ``query`` as Spark-renderable Arrow record batches.
+
+    Parameters
+    ----------
+    query : QueryExpression
+        Table (class or instance) or query expression to export.
+    batch_size : int
+        Rows per record batch, and per fetch from the server-side cursor.
+    schema : pyarrow.Schema, optional
+        Target schema. Defaults to the schema inferred from the first batch.
+    opaque : {"raise", "skip"}
+        What to do with codec columns that do not implement ``dj.SparkAdapter``.
+
+    Yields
+    ------
+    pyarrow.RecordBatch
+    """
+    query = query() if isinstance(query, type) else query
+    heading = query.heading
+    primary_key = query.primary_key
+    decoders = {}
+    for name in heading.names:
+        codec = heading[name].codec
+        if codec is None:
+            continue
+        if isinstance(codec, dj.SparkAdapter):
+            decoders[name] = ColumnDecoder(codec)
+        elif opaque == "skip":
+            decoders[name] = None
+        else:
+            raise dj.DataJointError(
+                f"Column {name!r} uses codec <{codec.name}>, which does not implement SparkAdapter"
+            )
+
+    with server_cursor(query.make_sql(), batch_size) as cursor:
+        rows = cursor.fetchmany(batch_size)
+        names = [d[0] for d in cursor.description]  # named PostgreSQL cursors set it on the first fetch
+        while rows:
+            columns = dict(zip(names, zip(*rows)))
+            keys = [dict(zip(primary_key, k)) for k in zip(*(columns[k] for k in primary_key))] \
+                if primary_key else [{}] * len(rows)
+            arrays = {}
+            for name in names:
+                if name not in decoders:
+                    arrays[name] = pa.array(columns[name])
+                elif decoders[name] is not None:
+                    decoder = decoders[name]
+                    values = [decoder.decode(raw, key) for raw, key in zip(columns[name], keys)]
+                    arrays[name] = decoder.render(values, keys)
+            batch = pa.RecordBatch.from_pydict(arrays)
+            if schema is None:
+                schema = batch.schema
+            yield batch.cast(schema) if batch.schema != schema else batch
+            rows = cursor.fetchmany(batch_size)
+
+
+def write_parquet(query, path, *, batch_size=BATCH_SIZE, schema=None, opaque="raise", compression="zstd"):
+    """
+    Write ``query`` to one Parquet file, a row group per batch.
+
+    Takes the parameters of ``record_batches``, plus ``compression`` for
+    ``pyarrow.parquet.ParquetWriter``. Returns the number of rows written.
+    The Parquet schema comes from the first batch, so an empty query writes no
+    file unless ``schema`` is given.
+    """
+    rows = 0
+    writer = None
+    try:
+        for batch in record_batches(query, batch_size=batch_size, schema=schema, opaque=opaque):
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema, compression=compression)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        if writer is None and schema is not None:
+            writer = pq.ParquetWriter(path, schema, compression=compression)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Export a DataJoint table to Parquet")
+    parser.add_argument("--schema", required=True)
+    parser.add_argument("--table", required=True, help="Table class name, e.g. Recording")
+    parser.add_argument("--out", required=True, help="Parquet file to write")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--skip-opaque", action="store_true", help="Drop codec columns without SparkAdapter")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    table = getattr(dj.virtual_schema(args.schema), args.table)
+    rows = write_parquet(
+        table, args.out, batch_size=args.batch_size, opaque="skip" if args.skip_opaque else "raise"
+    )
+    if rows:
+        logger.info(f"✓ Wrote {rows:,} rows of {args.schema}.{args.table} to {args.out}")
+    else:
+        logger.warning(f"{args.schema}.{args.table} is empty; no file written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Example: concurrent chunk uploads inside a ``staged_insert1`` block.
+
+``staged.store(field, ext)`` returns an ``fsspec`` mapping. Each assignment to
+it is written synchronously by the calling thread, so a Zarr-style writer
+waits for one upload round trip per chunk file. On S3 or MinIO that latency,
+not bandwidth, limits the write rate.
+
+``concurrent_chunks(staged, field, ext)`` wraps the mapping in
+``ConcurrentChunkStore``:
+
+- Assignments are queued and uploaded by a thread pool. At most
+  ``max_pending`` chunks are held in memory at once. When the queue is full,
+  the writer blocks until a slot frees up.
+- Reads of a chunk that is still uploading return the queued bytes. A second
+  write of the same key waits for the first, so the last write wins.
+- ``stats`` reports items, bytes, bytes/s, mean and maximum queue depth, and
+  the time the writer spent blocked on a full queue.
+
+The atomicity model of ``staged_insert1`` is unchanged, provided the
+``concurrent_chunks`` block is nested inside the ``staged_insert1`` block:
+
+- On clean exit, every upload is waited for before the staged block computes
+  metadata and inserts the row. If any upload failed, its error is re-raised
+  there. The staged object is then deleted and no row is inserted.
+- On an exception, uploads that have not started are cancelled and running
+  ones finish before the exception reaches ``staged_insert1``. Its cleanup
+  therefore sees every file that was written, and no upload can recreate a
+  file after it has been deleted.
+
+Usage:
+    from staged_concurrent import concurrent_chunks
+
+    with ImagingSession.staged_insert1 as staged:
+        staged.rec['subject_id'] = 1
+        staged.rec['session_id'] = 1
+        with concurrent_chunks(staged, 'frames', '.zarr', threads=16) as store:
+            z = zarr.open(store, mode='w', shape=(1000, 512, 512),
+                          chunks=(1, 512, 512), dtype='uint16')
+            for i in range(1000):
+                z[i] = acquire_frame()
+        staged.rec['n_frames'] = 1000
+        staged.rec['frame_rate'] = 30.0
+    print(store.stats)
+
+This works with writers that store chunks through the ``MutableMapping``
+interface, such as zarr-python 2 and custom chunk writers. zarr-python 3 opens
+an ``FSMap`` through its own asynchronous store, which already writes chunks
+concurrently. ``staged.open()`` single-file writes are not affected.
+"""
+
+import threading
+import time
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+UPLOAD_THREADS = 16
+MAX_PENDING = 64  # chunks held in memory at once
+
+
+class ConcurrentChunkStore(MutableMapping):
+    """
+    Mapping that uploads assigned values to ``mapper`` on a thread pool.
+
+    Parameters
+    ----------
+    mapper : MutableMapping
+        Destination, normally the ``fsspec.FSMap`` from ``staged.store()``.
+    threads : int
+        Upload threads.
+    max_pending : int
+        Values queued or uploading at once. Assignments block beyond this.
+    """
+
+    def __init__(self, mapper, threads=UPLOAD_THREADS, max_pending=MAX_PENDING):
+        self.mapper = mapper
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="staged-upload")
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.pending = {}  # key -> value, until its upload finishes
+        self.futures = {}  # key -> latest upload
+        self.errors = []
+        self.items = 0
+        self.bytes = 0
+        self.blocked_s = 0.0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.start = None
+        self.elapsed_s = None
+
+    def _upload(self, key, value):
+        try:
+            self.mapper[key] = value
+        except Exception as e:
+            self.errors.append(e)
+        finally:
+            with self.lock:
+                if self.pending.get(key) is value:
+                    del self.pending[key]
+            self.slots.release()
+
+    def _raise(self):
+        if self.errors:
+            raise self.errors[0]
+
+    def _settle(self, key):
+        """Wait for the latest upload of ``key``, if any."""
+        future = self.futures.get(key)
+        if future is not None:
+            future.result()
+
+    def __setitem__(self, key, value):
+        self._raise()
+        if self.start is None:
+            self.start = time.perf_counter()
+        value = value if isinstance(value, bytes) else bytes(memoryview(value))
+        self._settle(key)  # keep writes to one key in order
+        start = time.perf_counter()
+        self.slots.acquire()  # backpressure: block while the queue is full
+        self.blocked_s += time.perf_counter() - start
+        with self.lock:
+            self.pending[key] = value
+            depth = len(self.pending)
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+        self.items += 1
+        self.bytes += len(value)
+        self.futures[key] = self.pool.submit(self._upload, key, value)
+
+    def __getitem__(self, key):
+        with self.lock:
+            if key in self.pending:
+                return self.pending[key]
+        return self.mapper[key]
+
+    def __delitem__(self, key):
+        self._settle(key)
+        del self.mapper[key]
+
+    def __contains__(self, key):
+        with self.lock:
+            if key in self.pending:
+                return True
+        return key in self.mapper
+
+    def __iter__(self):
+        self.flush()
+        return iter(self.mapper)
+
+    def __len__(self):
+        self.flush()
+        return len(self.mapper)
+
+    def flush(self):
+        """Wait for every queued upload; raise the first upload error."""
+        wait(list(self.futures.values()))
+        if self.start is not None:
+            self.elapsed_s = time.perf_counter() - self.start
+        self._raise()
+
+    def close(self):
+        """Flush, then stop the upload threads."""
+        try:
+            self.flush()
+        finally:
+            self.pool.shutdown(wait=True)
+
+    def abort(self):
+        """Cancel uploads that have not started and wait for the running ones."""
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    @property
+    def stats(self):
+        elapsed = self.elapsed_s or float("nan")
+        return {
+            "items": self.items,
+            "bytes": self.bytes,
+            "elapsed_s": elapsed,
+            "bytes_per_s": self.bytes / elapsed,
+            "mean_queue_depth": self.depth_total / self.items if self.items else 0.0,
+            "max_queue_depth": self.max_depth,
+            "blocked_s": self.blocked_s,
+        }
+
+
+@contextmanager
+def concurrent_chunks(staged, field, ext="", threads=UPLOAD_THREADS, max_pending=MAX_PENDING):
+    """
+    Concurrent-upload mapping for ``staged.store(field, ext)``.
+
+    Nest it inside the ``staged_insert1`` block. On exit it waits for every
+    upload and re-raises the first error. On an exception it cancels queued
+    uploads and waits for running ones, so ``staged_insert1`` cleanup removes
+    everything that was written.
+
+    Yields
+    ------
+    ConcurrentChunkStore
+    """
+    store = ConcurrentChunkStore(staged.store(field, ext), threads, max_pending)
+    try:
+        yield store
+    except BaseException:
+        store.abort()
+        raise
+    store.close()
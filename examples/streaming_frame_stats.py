@@ -0,0 +1,169 @@
+"""
+Example: single-pass, bounded-memory per-pixel statistics over large TIFF movies.
+
+The calcium-imaging tutorial's ``AverageFrame.make`` loads the whole stack with
+``io.imread(file_path)`` and then calls ``movie.mean(axis=0)``. Peak memory is
+the size of the movie, plus a float64 copy for the mean. That is fine for the
+tutorial's example scans but not for two-photon sessions of tens of GB.
+
+``frame_stats`` reads the movie in blocks of frames and folds each block into
+running per-pixel accumulators, so memory is bounded by a few blocks regardless
+of the recording length:
+
+- Uncompressed, contiguous TIFFs are memory-mapped and workers slice their
+  blocks straight from the page cache.
+- Anything else (compressed, tiled, or non-contiguous pages) is streamed page
+  block by page block on one reader thread.
+
+Blocks are reduced on a thread pool; NumPy releases the GIL in its reductions.
+Block results are merged with the parallel variance formula of Chan et al., so
+``std`` is as accurate as a two-pass computation. The merge does not depend on
+block order.
+
+Usage:
+    from streaming_frame_stats import frame_stats
+
+    @schema
+    class AverageFrame(dj.Imported):
+        ...
+        def make(self, key):
+            file_name = (Scan & key).fetch1('file_name')
+            stats = frame_stats(DATA_DIR / file_name)  # mean only
+            self.insert1({**key, 'average_frame': stats['mean']})
+
+Request more statistics in the same pass with
+``frame_stats(path, stats=('mean', 'std', 'max'))``.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import tifffile
+
+STATS = ('mean', 'std', 'min', 'max')
+BLOCK_FRAMES = 256
+
+
+class _Accumulator:
+    """Running per-pixel count, mean, sum of squared deviations, min and max."""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.n = 0
+        self.mean = None
+        self.m2 = None
+        self.min = None
+        self.max = None
+
+    def add(self, block):
+        """Merge the statistics of one ``(frames, rows, cols)`` block."""
+        n, mean, m2, lo, hi = block
+        if self.n == 0:
+            self.n, self.mean, self.m2, self.min, self.max = block
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * (n / total)
+        if self.m2 is not None:
+            self.m2 += m2 + delta * delta * (self.n * n / total)
+        if self.min is not None:
+            np.minimum(self.min, lo, out=self.min)
+        if self.max is not None:
+            np.maximum(self.max, hi, out=self.max)
+        self.n = total
+
+    def result(self):
+        out = {'n_frames': self.n}
+        if 'mean' in self.stats:
+            out['mean'] = self.mean
+        if 'std' in self.stats:
+            out['std'] = np.sqrt(self.m2 / self.n)
+        if 'min' in self.stats:
+            out['min'] = self.min
+        if 'max' in self.stats:
+            out['max'] = self.max
+        return out
+
+
+def block_stats(frames, stats):
+    """
+    Statistics of one block of frames.
+
+    Returns
+    -------
+    tuple
+        ``(n, mean, m2, min, max)``; ``m2``, ``min`` and ``max`` are ``None``
+        unless requested.
+    """
+    frames = np.asarray(frames)
+    if frames.ndim == 2:  # single-page file
+        frames = frames[None]
+    mean = frames.mean(axis=0, dtype=np.float64)
+    m2 = None
+    if 'std' in stats:
+        m2 = np.zeros_like(mean)
+        for frame in frames:  # one frame at a time: no block-sized float64 temporary
+            diff = frame - mean
+            m2 += diff * diff
+    lo = frames.min(axis=0) if 'min' in stats else None
+    hi = frames.max(axis=0) if 'max' in stats else None
+    return len(frames), mean, m2, lo, hi
+
+
+def _blocks(tif, block_frames):
+    """Yield blocks of frames, memory-mapped if possible, else read page by page."""
+    series = tif.series[0]
+    n_frames = series.shape[0] if len(series.shape) > 2 else 1
+    movie = None
+    if series.dataoffset is not None:  # uncompressed and contiguous
+        movie = tifffile.memmap(tif.filehandle.path, mode='r', series=0)
+        if movie.ndim == 2:
+            movie = movie[None]
+    for start in range(0, n_frames, block_frames):
+        stop = min(start + block_frames, n_frames)
+        if movie is not None:
+            yield movie[start:stop]
+        else:
+            yield tif.asarray(key=range(start, stop))
+
+
+def frame_stats(path, stats=('mean',), block_frames=BLOCK_FRAMES, workers=None):
+    """
+    Per-pixel statistics of a ``(frames, rows, cols)`` TIFF stack in one pass.
+
+    Parameters
+    ----------
+    path : str or Path
+        TIFF file with one frame per page (or an ImageJ/OME stack).
+    stats : sequence of str
+        Any of ``'mean'``, ``'std'``, ``'min'``, ``'max'``.
+    block_frames : int
+        Frames per block. Memory use is about ``2 * workers`` blocks.
+    workers : int, optional
+        Reduction threads (default: number of CPUs).
+
+    Returns
+    -------
+    dict
+        ``n_frames`` plus one ``(rows, cols)`` array per requested statistic;
+        ``mean`` and ``std`` are float64, ``min`` and ``max`` keep the movie's dtype.
+    """
+    unknown = set(stats) - set(STATS)
+    if unknown:
+        raise ValueError(f"Unknown statistics: {sorted(unknown)}; choose from {STATS}")
+    workers = workers or os.cpu_count()
+    accumulator = _Accumulator(stats)
+    with tifffile.TiffFile(path) as tif, ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for frames in _blocks(tif, block_frames):
+            if len(pending) >= 2 * workers:  # bound the blocks held in memory
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    accumulator.add(future.result())
+            pending.add(pool.submit(block_stats, frames, stats))
+        for future in pending:
+            accumulator.add(future.result())
+    if accumulator.n == 0:
+        raise ValueError(f"{path} contains no frames")
+    return accumulator.result()
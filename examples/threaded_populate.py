@@ -0,0 +1,176 @@
+"""
+Example: thread-pool populate with one ``dj.Instance`` connection per thread.
+
+``populate()`` calls ``make()`` one key at a time. When ``make()`` mostly
+waits on I/O, such as reading objects from S3 or loading external files, the
+CPU sits idle. ``populate(processes=N)`` overlaps those waits, but every worker
+process holds its own interpreter, imports and connection.
+
+``threaded_populate()`` overlaps them in one process:
+
+- Each worker thread creates its own ``dj.Instance``, with a separate
+  connection and config, and builds the table on it through ``factory``.
+  Nothing is shared between threads through ``dj.conn()``, so this also works
+  with ``DJ_THREAD_SAFE=true``.
+- The pending keys (``key_source - table``) are listed once and put on a
+  shared queue. Each thread takes the next key and calls ``populate(key)`` on
+  its own table, so no two threads work on the same key.
+- With ``reserve_jobs=True`` the jobs table is refreshed once. Each thread
+  then calls ``_populate1(key, jobs)``, the per-key step of
+  ``populate(reserve_jobs=True)``. It reserves the key in the jobs table,
+  calls ``make()`` and marks the job complete or failed. ``populate()`` itself
+  is not used here: in distributed mode it installs a SIGTERM handler, which
+  only the main thread may do. Threads then also coordinate with workers in
+  other processes or on other hosts, as in the distributed tutorial. Keys
+  reserved elsewhere are skipped.
+
+``factory(instance)`` must return the table to populate, declared on
+``instance.Schema(...)``. Tables that ``make()`` reads must be bound to the
+same instance. The simplest way is to declare the pipeline inside a function
+and read the upstream tables from its scope, or through ``self.upstream``.
+
+Usage:
+    from threaded_populate import threaded_populate
+
+    def analysis(instance):
+        schema = instance.Schema('tutorial_distributed')
+
+        @schema
+        class Experiment(dj.Manual):
+            definition = ...
+
+        @schema
+        class Analysis(dj.Computed):
+            definition = ...
+
+            def make(self, key):
+                n = (Experiment & key).fetch1('n_samples')
+                ...
+
+        return Analysis
+
+    threaded_populate(analysis, threads=16)
+    threaded_populate(analysis, 'exp_id < 100', threads=16, reserve_jobs=True)
+
+Threads share the interpreter, so this speeds up ``make()`` functions that
+wait on I/O, on the database, or in NumPy code that releases the GIL. Use
+``populate(processes=N)`` or ``pipelined_populate.py`` for pure-Python
+computation.
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import datajoint as dj
+
+logger = logging.getLogger(__name__)
+
+THREADS = 8
+
+
+def instance_kwargs():
+    """``dj.Instance`` arguments matching the global ``dj.config`` connection settings."""
+    return {
+        "host": dj.config["database.host"],
+        "user": dj.config["database.user"],
+        "password": dj.config["database.password"],
+        "port": dj.config["database.port"],
+        "backend": dj.config["database.backend"],
+    }
+
+
+def threaded_populate(
+    factory,
+    *restrictions,
+    threads=THREADS,
+    reserve_jobs=False,
+    suppress_errors=False,
+    make_kwargs=None,
+    connect=None,
+):
+    """
+    Populate a table from a pool of threads, each with its own ``dj.Instance``.
+
+    Parameters
+    ----------
+    factory : callable
+        ``factory(instance)`` returns the computed or imported table, declared on
+        ``instance.Schema(...)``. Called once per thread and once to list keys.
+    *restrictions
+        Restrictions on ``key_source``, as in ``populate()``.
+    threads : int
+        Worker threads, each with its own connection.
+    reserve_jobs : bool
+        Also reserve each key in the jobs table, for coordination with other
+        processes.
+    suppress_errors : bool
+        Log failing keys and continue instead of raising.
+    make_kwargs : dict, optional
+        Keyword arguments passed to ``make()``.
+    connect : dict, optional
+        ``dj.Instance`` arguments (default: from ``dj.config``; required in
+        thread-safe mode).
+
+    Returns
+    -------
+    dict
+        ``{"success_count": int, "error_list": list}``, as from ``populate()``,
+        summed over all keys.
+    """
+    connect = connect or instance_kwargs()
+    table = factory(dj.Instance(**connect))
+    todo = table.key_source
+    for restriction in restrictions:
+        todo &= restriction
+    keys = queue.SimpleQueue()
+    for key in (todo - table).keys(order_by='KEY'):
+        keys.put(key)
+    if reserve_jobs:
+        table.jobs.refresh()
+
+    success_count = 0
+    error_list = []
+    lock = threading.Lock()
+    failed = threading.Event()
+
+    def populate_one(local, key):
+        if not reserve_jobs:
+            return local.populate(key, suppress_errors=suppress_errors, make_kwargs=make_kwargs)
+        status = local._populate1(
+            key,
+            local.jobs,
+            suppress_errors=suppress_errors,
+            return_exception_objects=False,
+            make_kwargs=make_kwargs,
+        )
+        # True: computed; (key, error): failed with suppress_errors; False: reserved or done elsewhere
+        return {
+            "success_count": int(status is True),
+            "error_list": [status] if isinstance(status, tuple) else [],
+        }
+
+    def work():
+        nonlocal success_count
+        local = factory(dj.Instance(**connect))
+        while not failed.is_set():
+            try:
+                key = keys.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                result = populate_one(local, key)
+            except Exception:
+                failed.set()  # stop the other threads after their current key
+                raise
+            with lock:
+                success_count += result["success_count"]
+                error_list.extend(result["error_list"])
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="populate") as pool:
+        futures = [pool.submit(work) for _ in range(threads)]
+    for future in futures:
+        future.result()  # raise the first error
+    logger.info(f"threaded_populate: {success_count} succeeded, {len(error_list)} failed")
+    return {"success_count": success_count, "error_list": error_list}
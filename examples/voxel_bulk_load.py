@@ -0,0 +1,400 @@
+"""
+Example: chunked bulk load of an Allen CCF annotation volume into the ``Voxel`` table.
+
+The Allen CCF tutorial declares ``Voxel`` (one row per annotated voxel, keyed by
+``(x, y, z)`` with ``index(y, z)`` for slice queries) but skips loading it: a
+10 µm annotation volume is hundreds of millions of rows, far too many for
+row-by-row inserts.
+
+This script streams the NRRD volume a few planes at a time and loads each block
+with the backend's native bulk loader: ``LOAD DATA LOCAL INFILE`` on MySQL and
+``COPY ... FROM STDIN`` on PostgreSQL. The rest of the load is set up for speed
+and safety:
+
+- The ``index(y, z)`` secondary index is dropped before the load and rebuilt
+  once afterwards, instead of being maintained row by row.
+- Region labels are checked against ``BrainRegion`` for each block before it is
+  written. Foreign-key checks can then be switched off for the load session
+  where the server allows it.
+- Every block is committed on its own. If the load fails, the rows already
+  written for that ``ccf_id`` are deleted, so the table is never left
+  half-loaded.
+- Voxels labeled 0 (outside the brain) are not stored.
+
+Raw and gzip NRRD encodings are streamed without decoding the whole file.
+Raw files are memory-mapped; gzip files are decompressed incrementally.
+
+This script fills ``Voxel`` for one ``CCF`` entry in place of ``Voxel.make``.
+Run it once per atlas, after ``BrainRegion`` has been populated.
+
+Usage:
+    python voxel_bulk_load.py --schema tutorial_allen_ccf --ccf-id 1 \\
+        --nrrd data/annotation_10.nrrd --resolution 10
+
+MySQL needs ``local_infile=ON`` on the server. Without it the script falls
+back to multi-row INSERT statements.
+"""
+
+import argparse
+import gzip
+import io
+import logging
+import os
+import re
+import tempfile
+import time
+
+import datajoint as dj
+import numpy as np
+import pandas as pd
+
+# Configuration
+BLOCK_PLANES = 8  # Planes along the slowest axis loaded per block
+DEFERRED_INDEXES = (("y", "z"),)  # Secondary indexes rebuilt after the load
+COLUMNS = ("ccf_id", "x", "y", "z", "region_id")
+
+NRRD_TYPES = {
+    "uchar": "u1", "unsigned char": "u1", "uint8": "u1", "uint8_t": "u1",
+    "ushort": "u2", "unsigned short": "u2", "uint16": "u2", "uint16_t": "u2",
+    "uint": "u4", "unsigned int": "u4", "uint32": "u4", "uint32_t": "u4",
+    "int": "i4", "int32": "i4", "int32_t": "i4",
+    "ulonglong": "u8", "uint64": "u8", "uint64_t": "u8",
+}
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+# --- NRRD streaming ---
+
+def read_nrrd_header(path):
+    """
+    Parse an NRRD header.
+
+    Returns
+    -------
+    dict
+        ``shape`` as ``(planes, rows, cols)`` (slowest axis first), ``dtype``,
+        ``encoding`` and the byte ``offset`` of the data.
+    """
+    fields = {}
+    with open(path, "rb") as f:
+        magic = f.readline().decode("ascii").strip()
+        if not magic.startswith("NRRD"):
+            raise ValueError(f"{path} is not an NRRD file")
+        for line in iter(f.readline, b""):
+            line = line.decode("ascii").rstrip("\r\n")
+            if not line:
+                break
+            if line.startswith("#") or ":=" in line:
+                continue
+            name, _, value = line.partition(":")
+            fields[name.strip().lower()] = value.strip()
+        offset = f.tell()
+
+    if "data file" in fields or "datafile" in fields:
+        raise ValueError("Detached NRRD headers are not supported")
+    sizes = [int(s) for s in fields["sizes"].split()]
+    if len(sizes) != 3:
+        raise ValueError(f"Expected a 3-D volume, got sizes {sizes}")
+    dtype = np.dtype(NRRD_TYPES[fields["type"]])
+    if dtype.itemsize > 1:
+        dtype = dtype.newbyteorder("<" if fields.get("endian", "little") == "little" else ">")
+    encoding = fields.get("encoding", "raw")
+    if encoding == "gz":
+        encoding = "gzip"
+    if encoding not in ("raw", "gzip"):
+        raise ValueError(f"Unsupported NRRD encoding: {encoding}")
+    # NRRD lists the fastest axis first; NumPy C order lists it last
+    return {"shape": tuple(reversed(sizes)), "dtype": dtype, "encoding": encoding, "offset": offset}
+
+
+def iter_blocks(path, block_planes=BLOCK_PLANES):
+    """
+    Yield ``(first_plane, block)`` with ``block`` of shape ``(k, rows, cols)``.
+
+    Only one block is held in memory at a time.
+    """
+    header = read_nrrd_header(path)
+    planes, rows, cols = header["shape"]
+    dtype = header["dtype"]
+
+    if header["encoding"] == "raw":
+        volume = np.memmap(path, dtype=dtype, mode="r", offset=header["offset"], shape=header["shape"])
+        for start in range(0, planes, block_planes):
+            yield start, np.asarray(volume[start:start + block_planes])
+        return
+
+    plane_bytes = rows * cols * dtype.itemsize
+    with open(path, "rb") as raw:
+        raw.seek(header["offset"])
+        with gzip.GzipFile(fileobj=raw) as f:
+            for start in range(0, planes, block_planes):
+                k = min(block_planes, planes - start)
+                data = f.read(k * plane_bytes)
+                if len(data) != k * plane_bytes:
+                    raise ValueError(f"{path} ended after {start} of {planes} planes")
+                yield start, np.frombuffer(data, dtype=dtype).reshape(k, rows, cols)
+
+
+def voxel_frame(ccf_id, first_plane, block, resolution):
+    """
+    Rows for the non-zero voxels of a block.
+
+    Axes follow the tutorial: ``x`` (AP) is the fastest axis of the Allen
+    volume, ``y`` (DV) the middle one and ``z`` (ML) the slowest, all in µm.
+    """
+    kz, iy, ix = np.nonzero(block)
+    return pd.DataFrame({
+        "ccf_id": np.full(len(kz), ccf_id, dtype=np.int32),
+        "x": (ix * resolution).astype(np.int32),
+        "y": (iy * resolution).astype(np.int32),
+        "z": ((first_plane + kz) * resolution).astype(np.int32),
+        "region_id": block[kz, iy, ix].astype(np.int64),
+    })
+
+
+# --- Backend bulk loaders ---
+
+class MySQLLoader:
+    """``LOAD DATA LOCAL INFILE`` from a temporary CSV file per block."""
+
+    def __init__(self, database, table):
+        import pymysql
+
+        self.database, self.table = database, table
+        self.name = f"`{database}`.`{table}`"
+        self.conn = pymysql.connect(
+            host=dj.config["database.host"],
+            port=int(dj.config["database.port"]),
+            user=dj.config["database.user"],
+            password=dj.config["database.password"],
+            database=database,
+            local_infile=True,
+            autocommit=False,
+        )
+        self.native = True
+        with self.conn.cursor() as cur:
+            cur.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+
+    def indexes(self):
+        """``{name: columns}`` of non-unique, non-primary indexes."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) "
+                "FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND NON_UNIQUE = 1 "
+                "GROUP BY INDEX_NAME",
+                (self.database, self.table),
+            )
+            return {name: tuple(columns.split(",")) for name, columns in cur.fetchall()}
+
+    def drop_index(self, name):
+        with self.conn.cursor() as cur:
+            cur.execute(f"ALTER TABLE {self.name} DROP INDEX `{name}`")
+
+    def create_index(self, name, columns):
+        with self.conn.cursor() as cur:
+            cur.execute(f"ALTER TABLE {self.name} ADD INDEX `{name}` ({', '.join(columns)})")
+
+    def load(self, frame):
+        if self.native:
+            with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+                frame.to_csv(f, header=False, index=False)
+            try:
+                with self.conn.cursor() as cur:
+                    cur.execute(
+                        f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.name} "
+                        f"FIELDS TERMINATED BY ',' ({', '.join(COLUMNS)})",
+                        (f.name,),
+                    )
+                self.conn.commit()
+                return
+            except Exception as e:  # server has local_infile=OFF
+                self.conn.rollback()
+                logger.warning(f"LOAD DATA LOCAL INFILE unavailable ({e}); using multi-row INSERT")
+                self.native = False
+            finally:
+                os.unlink(f.name)
+        with self.conn.cursor() as cur:
+            cur.executemany(
+                f"INSERT INTO {self.name} ({', '.join(COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+                frame.itertuples(index=False, name=None),
+            )
+        self.conn.commit()
+
+    def delete(self, ccf_id):
+        with self.conn.cursor() as cur:
+            cur.execute(f"DELETE FROM {self.name} WHERE ccf_id = %s", (ccf_id,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresLoader:
+    """``COPY ... FROM STDIN`` streaming CSV from memory."""
+
+    def __init__(self, database, table):
+        import psycopg2
+
+        self.database, self.table = database, table
+        self.name = f'"{database}"."{table}"'
+        self.conn = psycopg2.connect(
+            host=dj.config["database.host"],
+            port=int(dj.config["database.port"]),
+            user=dj.config["database.user"],
+            password=dj.config["database.password"],
+            dbname=dj.config["database.name"] or "postgres",
+        )
+        with self.conn.cursor() as cur:
+            try:  # skips FK triggers; requires superuser
+                cur.execute("SET session_replication_role = replica")
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+        self.definitions = {}
+
+    def indexes(self):
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT indexname, indexdef FROM pg_indexes "
+                "WHERE schemaname = %s AND tablename = %s AND indexdef NOT LIKE 'CREATE UNIQUE%%'",
+                (self.database, self.table),
+            )
+            found = {}
+            for name, definition in cur.fetchall():
+                self.definitions[name] = definition
+                columns = re.search(r"\(([^)]*)\)\s*$", definition).group(1)
+                found[name] = tuple(c.strip().strip('"') for c in columns.split(","))
+            return found
+
+    def drop_index(self, name):
+        with self.conn.cursor() as cur:
+            cur.execute(f'DROP INDEX "{self.database}"."{name}"')
+        self.conn.commit()
+
+    def create_index(self, name, columns):
+        with self.conn.cursor() as cur:
+            cur.execute(self.definitions[name])
+        self.conn.commit()
+
+    def load(self, frame):
+        buffer = io.StringIO()
+        frame.to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+        with self.conn.cursor() as cur:
+            cur.copy_expert(
+                f"COPY {self.name} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        self.conn.commit()
+
+    def delete(self, ccf_id):
+        with self.conn.cursor() as cur:
+            cur.execute(f"DELETE FROM {self.name} WHERE ccf_id = %s", (ccf_id,))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+LOADERS = {"mysql": MySQLLoader, "postgresql": PostgresLoader}
+
+
+def load_voxels(voxel, brain_region, ccf_id, nrrd_path, resolution, block_planes=BLOCK_PLANES):
+    """
+    Bulk-load one annotation volume into ``voxel`` for ``ccf_id``.
+
+    Parameters
+    ----------
+    voxel, brain_region : dj.Table
+        The tutorial's ``Voxel`` and ``BrainRegion`` tables.
+    ccf_id : int
+        CCF entry the voxels belong to; must have no voxels yet.
+    nrrd_path : str or Path
+        Annotation volume (raw or gzip NRRD) of region IDs.
+    resolution : float
+        Voxel size in µm.
+    block_planes : int
+        Planes along the slowest axis per block.
+
+    Returns
+    -------
+    dict
+        ``rows``, ``blocks``, ``load_s``, ``index_s`` and ``rows_per_s``.
+    """
+    if len(voxel & {"ccf_id": ccf_id}):
+        raise dj.DataJointError(f"Voxel already has rows for ccf_id={ccf_id}")
+    valid = set((brain_region & {"ccf_id": ccf_id}).to_arrays("region_id").tolist())
+    if not valid:
+        raise dj.DataJointError(f"Populate BrainRegion for ccf_id={ccf_id} first")
+
+    loader = LOADERS[dj.config["database.backend"]](voxel.database, voxel.table_name)
+    deferred = {
+        name: columns for name, columns in loader.indexes().items() if columns in DEFERRED_INDEXES
+    }
+    result = {"rows": 0, "blocks": 0}
+    start = time.perf_counter()
+    try:
+        for name in deferred:
+            logger.info(f"Dropping index {name} {deferred[name]} for the load")
+            loader.drop_index(name)
+        try:
+            for first_plane, block in iter_blocks(nrrd_path, block_planes):
+                frame = voxel_frame(ccf_id, first_plane, block, resolution)
+                unknown = set(np.unique(frame["region_id"]).tolist()) - valid
+                if unknown:
+                    raise dj.DataJointError(
+                        f"Planes {first_plane}+ have labels not in BrainRegion: {sorted(unknown)[:10]}"
+                    )
+                loader.load(frame)
+                result["rows"] += len(frame)
+                result["blocks"] += 1
+                if result["blocks"] % 10 == 0:
+                    rate = result["rows"] / (time.perf_counter() - start)
+                    logger.info(f"  {result['rows']:,} voxels loaded ({rate:,.0f} rows/s)")
+        except BaseException:
+            logger.error(f"Load failed; removing the voxels of ccf_id={ccf_id}")
+            loader.delete(ccf_id)
+            raise
+        result["load_s"] = time.perf_counter() - start
+    finally:
+        index_start = time.perf_counter()
+        for name, columns in deferred.items():
+            logger.info(f"Rebuilding index {name} {columns}")
+            loader.create_index(name, columns)
+        result["index_s"] = time.perf_counter() - index_start
+        loader.close()
+    result["rows_per_s"] = result["rows"] / (result["load_s"] + result["index_s"])
+    return result
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Bulk-load an Allen CCF annotation volume into Voxel")
+    parser.add_argument("--schema", required=True, help="Schema with the tutorial's tables")
+    parser.add_argument("--ccf-id", type=int, required=True)
+    parser.add_argument("--nrrd", required=True, help="Annotation volume (raw or gzip NRRD)")
+    parser.add_argument("--resolution", type=float, required=True, help="Voxel size in µm")
+    parser.add_argument(
+        "--block-planes",
+        type=int,
+        default=BLOCK_PLANES,
+        help=f"Planes per block (default: {BLOCK_PLANES})",
+    )
+
+    args = parser.parse_args()
+
+    tables = dj.virtual_schema(args.schema)
+    logger.info(f"=== Loading {args.nrrd} into {args.schema}.voxel (ccf_id={args.ccf_id}) ===")
+    result = load_voxels(
+        tables.Voxel, tables.BrainRegion, args.ccf_id, args.nrrd, args.resolution, args.block_planes
+    )
+    logger.info(
+        f"✓ Loaded {result['rows']:,} voxels in {result['load_s']:.1f}s "
+        f"+ {result['index_s']:.1f}s index build ({result['rows_per_s']:,.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+batched.py - Batched event detection
+
+This module is a batched-populate variant of processing.EventDetection.
+Sessions are grouped into batches; each make() call computes the events of a
+whole batch in one vectorized pass and inserts all event rows as Part rows in a
+single statement, within the one transaction populate() opens per batch.
+Tables are declared but schema must be activated before use.
+"""
+import datajoint as dj
+import numpy as np
+import pandas as pd
+
+from . import processing
+
+# Create schema without activating - caller must activate before use
+schema = dj.Schema()
+
+
+@schema
+class EventBatch(dj.Manual):
+    definition = """
+    batch_id : int32
+    ---
+    batch_size : int32
+    """
+
+    class Member(dj.Part):
+        definition = """
+        -> master
+        -> processing.ProcessedSession
+        """
+
+    @classmethod
+    def assign(cls, batch_size, *restrictions):
+        """Group ProcessedSession keys not yet in a batch into batches of batch_size."""
+        pending = ((processing.ProcessedSession & dj.AndList(restrictions)) - cls.Member).keys()
+        start = len(cls())
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        with cls.connection.transaction:
+            cls.insert([
+                {'batch_id': start + i, 'batch_size': len(batch)}
+                for i, batch in enumerate(batches)])
+            cls.Member.insert([
+                {'batch_id': start + i, **key}
+                for i, batch in enumerate(batches) for key in batch])
+        return len(batches)
+
+
+@schema
+class BatchedEventDetection(dj.Computed):
+    definition = """
+    -> EventBatch
+    ---
+    n_events : int64
+    """
+
+    class Event(dj.Part):
+        definition = """
+        -> master
+        -> processing.ProcessedSession
+        event_id : int32
+        ---
+        event_time : float32
+        amplitude : float32
+        """
+
+    def make(self, key):
+        sessions = (
+            (processing.ProcessedSession * processing.ProcessingParams)
+            & (EventBatch.Member & key)
+        ).proj('n_events', 'threshold').to_pandas().reset_index()
+
+        n_max = int(sessions['n_events'].max())
+        phase = np.array([processing.session_phase(k) for k in sessions.to_dict('records')])
+        times, amplitudes = processing.detect_events(
+            phase, sessions['threshold'].to_numpy(), n_max)
+
+        # Sessions may detect fewer than n_max events; keep only the valid ones
+        valid = np.arange(n_max) < sessions['n_events'].to_numpy()[:, None]
+        rows = sessions.index.repeat(valid.sum(axis=1))
+        events = pd.DataFrame({
+            'batch_id': key['batch_id'],
+            'subject_id': sessions['subject_id'].to_numpy()[rows],
+            'session_date': sessions['session_date'].to_numpy()[rows],
+            'params_id': sessions['params_id'].to_numpy()[rows],
+            'event_id': np.nonzero(valid)[1].astype(np.int32),
+            'event_time': times[valid],
+            'amplitude': amplitudes[valid],
+        })
+
+        self.insert1({**key, 'n_events': len(events)})
+        self.Event.insert(events)
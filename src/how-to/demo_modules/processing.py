@@ -4,7 +4,11 @@ processing.py - Data processing tables
 This module defines computed tables that process raw acquisition data.
 Tables are declared but schema must be activated before use.
 """
+import zlib
+
 import datajoint as dj
+import numpy as np
+
 from . import acquisition
 
 # Create schema without activating - caller must activate before use
@@ -47,4 +51,28 @@ class EventDetection(dj.Computed):
     """
 
     def make(self, key):
-        pass
+        n_events, threshold = (ProcessedSession * ProcessingParams & key).fetch1(
+            'n_events', 'threshold')
+        times, amplitudes = detect_events(
+            np.array([session_phase(key)]), np.array([threshold]), n_events)
+        self.insert([
+            {**key, 'event_id': i, 'event_time': t, 'amplitude': a}
+            for i, (t, a) in enumerate(zip(times[0], amplitudes[0]))])
+
+
+def session_phase(key):
+    """Deterministic per-session phase in [0, 1) derived from the session key."""
+    ident = f"{key['subject_id']}/{key['session_date']}/{key['params_id']}"
+    return zlib.crc32(ident.encode()) / 2**32
+
+
+def detect_events(phase, threshold, n_events):
+    """
+    Synthetic event detection, vectorized over sessions.
+
+    Returns (event_time, amplitude) arrays of shape (len(phase), n_events).
+    """
+    event_id = np.arange(n_events)
+    times = (event_id + phase[:, None]) * 0.5
+    amplitudes = threshold[:, None] + np.abs(np.sin((event_id + 1) * phase[:, None]))
+    return times.astype(np.float32), amplitudes.astype(np.float32)